@@ -1,7 +1,16 @@
-from . import io, processing, viz
+import importlib
+
+from . import io, processing
 from .__version__ import version as __version__
 
 __all__ = ['__version__']
 __all__ += io.__all__
 __all__ += processing.__all__
-__all__ += viz.__all__
+__all__ += ['viz']
+
+
+def __getattr__(name):
+    # Visualization loads matplotlib and is therefore imported on first use
+    if name == 'viz':
+        return importlib.import_module('.viz', __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
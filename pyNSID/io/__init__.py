@@ -9,12 +9,21 @@ Submodules
 
     hdf_utils
     nsi_data
+    derived
     dimension
+    catalog
+    file_pool
+    export
 
 """
 from sidpy.sid import Dimension, Translator
-from . import hdf_utils, dimension
+from . import hdf_utils, dimension, derived
+from .derived import ComponentView
 from .nsi_data import NSIDataset
+from .catalog import NSIDCatalog
+from .file_pool import H5FilePool, get_default_pool
+from .export import export_subset
 
-__all__ = ['NSIDataset', 'hdf_utils', 'dimension',
-           'Dimension', 'Translator']
+__all__ = ['NSIDataset', 'hdf_utils', 'dimension', 'derived', 'ComponentView',
+           'Dimension', 'Translator', 'NSIDCatalog',
+           'H5FilePool', 'get_default_pool', 'export_subset']
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Searchable SQLite catalog of NSID Main datasets spread over many HDF5 files
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import json
+import sqlite3
+from collections import namedtuple
+from warnings import warn
+
+import h5py
+import numpy as np
+
+from sidpy.base.string_utils import validate_single_string_arg
+from sidpy.hdf.hdf_utils import get_attr
+
+from .hdf_utils import get_all_main
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['NSIDCatalog', 'CatalogEntry', 'scan_file']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS datasets (
+    file_path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    dset_path TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    ndim INTEGER NOT NULL,
+    dtype TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    data_type TEXT,
+    modality TEXT,
+    source TEXT,
+    quantity TEXT,
+    units TEXT,
+    dimensions TEXT,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (file_path, dset_path)
+);
+CREATE INDEX IF NOT EXISTS datasets_data_type ON datasets (data_type);
+CREATE INDEX IF NOT EXISTS datasets_modality ON datasets (modality);
+CREATE INDEX IF NOT EXISTS datasets_source ON datasets (source);
+CREATE INDEX IF NOT EXISTS datasets_nbytes ON datasets (nbytes);
+"""
+
+_FIELDS = ['file_path', 'dset_path', 'shape', 'dtype', 'nbytes', 'data_type',
+           'modality', 'source', 'quantity', 'units', 'dimensions', 'mtime']
+
+
+class CatalogEntry(namedtuple('CatalogEntry', _FIELDS)):
+    """
+    Lightweight, picklable handle to a Main dataset recorded in a
+    :class:`NSIDCatalog`. Only paths and metadata are held, so entries can be
+    sent to worker processes and opened there.
+    """
+    __slots__ = ()
+
+    def open(self, mode='r', pool=None):
+        """
+        Opens the file containing this dataset and returns the Main dataset
+
+        Parameters
+        ----------
+        mode : str, optional. Default = 'r'
+            Mode in which the HDF5 file will be opened
+        pool : object, optional. Default = None
+            Object with a ``get_dataset(path, dset_path, mode=mode)`` method,
+            such as a pool of open file handles. If not provided, a new
+            :class:`h5py.File` is opened and must be closed by the caller
+
+        Returns
+        -------
+        h5_main : pyNSID.NSIDataset
+            Main dataset described by this entry
+        """
+        if pool is not None:
+            return pool.get_dataset(self.file_path, self.dset_path, mode=mode)
+        from .nsi_data import NSIDataset
+        h5_file = h5py.File(self.file_path, mode=mode)
+        return NSIDataset(h5_file[self.dset_path])
+
+
+def _summarize_dimensions(h5_main):
+    dimensions = []
+    for index, dim in enumerate(h5_main.dims):
+        summary = {'index': index, 'label': dim.label,
+                   'size': int(h5_main.shape[index])}
+        if len(dim) > 0:
+            h5_scale = dim[0]
+            for att_name in ['name', 'quantity', 'units', 'dimension_type']:
+                if att_name in h5_scale.attrs:
+                    val = get_attr(h5_scale, att_name)
+                    if isinstance(val, (np.generic, np.ndarray)):
+                        val = val.tolist()
+                    summary[att_name] = val
+            if h5_scale.shape[0] > 0:
+                # Scales of strings or other non-numeric values have no range
+                summary['first'], summary['last'] = None, None
+                if np.issubdtype(h5_scale.dtype, np.number):
+                    summary['first'] = float(np.real(h5_scale[0]))
+                    summary['last'] = float(np.real(h5_scale[-1]))
+        dimensions.append(summary)
+    return dimensions
+
+
+def scan_file(file_path, verbose=False):
+    """
+    Collects metadata of all Main datasets within a single HDF5 file
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the HDF5 file
+    verbose : bool, optional. Default = False
+        Whether or not to print debugging statements
+
+    Returns
+    -------
+    records : list of dict
+        One dictionary per Main dataset with the fields of
+        :class:`CatalogEntry`. An empty list is returned for files that could
+        not be opened as HDF5 files
+    """
+    file_path = validate_single_string_arg(file_path, 'file_path')
+    mtime = os.path.getmtime(file_path)
+    try:
+        h5_file = h5py.File(file_path, mode='r')
+    except (IOError, OSError) as exep:
+        if verbose:
+            print('Skipping {}: {}'.format(file_path, exep))
+        return []
+
+    records = []
+    with h5_file:
+        for h5_main in get_all_main(h5_file):
+            record = {'file_path': file_path,
+                      'dset_path': h5_main.name,
+                      'shape': tuple(int(x) for x in h5_main.shape),
+                      'dtype': h5_main.dtype.str,
+                      'nbytes': int(np.prod(h5_main.shape, dtype=np.int64) *
+                                    h5_main.dtype.itemsize),
+                      'dimensions': _summarize_dimensions(h5_main),
+                      'mtime': mtime}
+            for att_name in ['data_type', 'modality', 'source', 'quantity',
+                             'units']:
+                record[att_name] = get_attr(h5_main, att_name)
+            records.append(record)
+    if verbose:
+        print('Found {} Main datasets in {}'.format(len(records), file_path))
+    return records
+
+
+def _scan_file_safe(file_path):
+    try:
+        return file_path, scan_file(file_path), None
+    except Exception as exep:
+        return file_path, [], '{}: {}'.format(type(exep).__name__, exep)
+
+
+class NSIDCatalog(object):
+    """
+    Index of NSID Main datasets across many HDF5 files, stored in a local
+    SQLite database so that searches do not need to open any HDF5 file.
+
+    Files are scanned in parallel worker processes. Rescans are incremental:
+    only files whose modification time or size changed since the last scan
+    are opened again, and files that disappeared are dropped from the index.
+    Files that fail to scan are dropped as well and retried on the next scan.
+
+    >>> catalog = NSIDCatalog('nsid_index.sqlite')
+    >>> catalog.scan('/shared/microscopy')
+    >>> entries = catalog.query(data_type='spectrum_image', min_nbytes=2**30)
+    >>> h5_main = entries[0].open()
+    """
+
+    def __init__(self, db_path):
+        """
+        Parameters
+        ----------
+        db_path : str
+            Path to the SQLite database. It will be created if it does not
+            exist. Use ':memory:' for a temporary catalog
+        """
+        self.db_path = validate_single_string_arg(db_path, 'db_path')
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        """
+        Closes the connection to the database
+        """
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM datasets').fetchone()[0]
+
+    def _find_files(self, root_dir, extensions):
+        for dir_path, _, file_names in os.walk(root_dir):
+            for file_name in file_names:
+                if file_name.lower().endswith(extensions):
+                    yield os.path.abspath(os.path.join(dir_path, file_name))
+
+    def scan(self, root_dir, extensions=('.h5', '.hdf5'), n_jobs=-1,
+             verbose=False):
+        """
+        Walks a directory tree and updates the catalog with the Main datasets
+        of all new or modified HDF5 files
+
+        Parameters
+        ----------
+        root_dir : str
+            Directory that will be searched recursively
+        extensions : str or tuple of str, optional
+            File extensions (case-insensitive) of the files to be scanned
+        n_jobs : int, optional. Default = -1 (all cores)
+            Number of worker processes used to open files
+        verbose : bool, optional. Default = False
+            Whether or not to print debugging statements
+
+        Returns
+        -------
+        stats : dict
+            Number of files that were 'added', 'updated', 'removed',
+            'unchanged' or 'failed' during this scan
+        """
+        root_dir = validate_single_string_arg(root_dir, 'root_dir')
+        if not os.path.isdir(root_dir):
+            raise ValueError('{} is not a directory'.format(root_dir))
+        if isinstance(extensions, (str, unicode)):
+            extensions = (extensions,)
+        extensions = tuple(ext.lower() for ext in extensions)
+
+        root_prefix = os.path.join(os.path.abspath(root_dir), '')
+        known = dict()
+        for path, mtime, size in self._conn.execute(
+                'SELECT path, mtime, size FROM files'):
+            if path.startswith(root_prefix):
+                known[path] = (mtime, size)
+
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0,
+                 'failed': 0}
+        to_scan = []
+        file_stats = dict()
+        for file_path in self._find_files(root_dir, extensions):
+            stat = os.stat(file_path)
+            file_stats[file_path] = (stat.st_mtime, stat.st_size)
+            if known.get(file_path) == file_stats[file_path]:
+                stats['unchanged'] += 1
+            else:
+                to_scan.append(file_path)
+
+        removed = [path for path in known if path not in file_stats]
+        with self._conn:
+            for path in removed:
+                self._conn.execute('DELETE FROM files WHERE path = ?', (path,))
+        stats['removed'] = len(removed)
+
+        if verbose:
+            print('{} files to scan, {} unchanged, {} removed'
+                  ''.format(len(to_scan), stats['unchanged'], len(removed)))
+        if len(to_scan) == 0:
+            return stats
+
+        if len(to_scan) == 1 or n_jobs == 1:
+            results = [_scan_file_safe(path) for path in to_scan]
+        else:
+            # joblib is only needed here and would otherwise slow down imports
+            from joblib import Parallel, delayed
+            results = Parallel(n_jobs=n_jobs)(delayed(_scan_file_safe)(path)
+                                              for path in to_scan)
+
+        with self._conn:
+            for file_path, records, error in results:
+                if error is not None:
+                    warn('Could not scan {}: {}'.format(file_path, error))
+                    stats['failed'] += 1
+                    # Entries of an earlier version of the file are stale
+                    self._conn.execute('DELETE FROM files WHERE path = ?',
+                                       (file_path,))
+                    continue
+                stats['updated' if file_path in known else 'added'] += 1
+                self._conn.execute('DELETE FROM files WHERE path = ?',
+                                   (file_path,))
+                self._conn.execute('INSERT INTO files VALUES (?, ?, ?)',
+                                   (file_path,) + file_stats[file_path])
+                self._conn.executemany(
+                    'INSERT INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, '
+                    '?, ?, ?, ?)',
+                    [(rec['file_path'], rec['dset_path'],
+                      json.dumps(rec['shape']), len(rec['shape']),
+                      rec['dtype'], rec['nbytes'], rec['data_type'],
+                      rec['modality'], rec['source'], rec['quantity'],
+                      rec['units'], json.dumps(rec['dimensions']),
+                      rec['mtime']) for rec in records])
+        if verbose:
+            print('Scan complete: {}'.format(stats))
+        return stats
+
+    def query(self, data_type=None, modality=None, source=None, quantity=None,
+              units=None, ndim=None, min_nbytes=None, max_nbytes=None,
+              path_contains=None, dimension_type=None):
+        """
+        Finds Main datasets in the catalog that satisfy all provided criteria
+
+        Parameters
+        ----------
+        data_type, modality, source, quantity, units : str, optional
+            Exact values of the corresponding attributes of the Main dataset
+        ndim : int, optional
+            Number of dimensions of the Main dataset
+        min_nbytes, max_nbytes : int, optional
+            Bounds on the uncompressed size of the Main dataset in bytes
+        path_contains : str, optional
+            Substring that the file path must contain
+        dimension_type : str, optional
+            Main datasets must contain at least one dimension of this type
+            (case-insensitive). E.g. - 'spectral'
+
+        Returns
+        -------
+        entries : list of CatalogEntry
+            Picklable handles to the matching Main datasets
+        """
+        clauses = []
+        values = []
+        for column, val in zip(['data_type', 'modality', 'source', 'quantity',
+                                'units'],
+                               [data_type, modality, source, quantity, units]):
+            if val is not None:
+                clauses.append('{} = ?'.format(column))
+                values.append(validate_single_string_arg(val, column))
+        if ndim is not None:
+            clauses.append('ndim = ?')
+            values.append(int(ndim))
+        if min_nbytes is not None:
+            clauses.append('nbytes >= ?')
+            values.append(int(min_nbytes))
+        if max_nbytes is not None:
+            clauses.append('nbytes <= ?')
+            values.append(int(max_nbytes))
+        if path_contains is not None:
+            clauses.append('instr(file_path, ?) > 0')
+            values.append(validate_single_string_arg(path_contains,
+                                                     'path_contains'))
+
+        sql = 'SELECT {} FROM datasets'.format(', '.join(_FIELDS))
+        if len(clauses) > 0:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY file_path, dset_path'
+
+        entries = []
+        for row in self._conn.execute(sql, values):
+            row = list(row)
+            row[2] = tuple(json.loads(row[2]))
+            row[10] = json.loads(row[10])
+            entry = CatalogEntry(*row)
+            if dimension_type is not None:
+                dim_types = [str(dim.get('dimension_type', '')).lower()
+                             for dim in entry.dimensions]
+                if dimension_type.lower() not in dim_types:
+                    continue
+            entries.append(entry)
+        return entries
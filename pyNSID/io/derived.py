@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy real valued views of complex datasets, computed block by block on read
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+from numbers import Integral
+
+import numpy as np
+import dask.array as da
+
+from sidpy.base.string_utils import validate_single_string_arg
+
+from .hdf_utils.base import get_block_shape, iter_block_slices
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['ComponentView', 'COMPONENTS']
+
+COMPONENTS = ['real', 'imag', 'magnitude', 'phase']
+
+_FUNCTIONS = {'real': np.real, 'imag': np.imag, 'magnitude': np.abs,
+              'phase': np.angle}
+
+
+class ComponentView(object):
+    """
+    Read-only view of the real part, imaginary part, magnitude or phase of a
+    (complex) dataset that behaves like a real valued array.
+
+    Nothing is read when the view is created. Indexing the view reads only
+    the selected region from the dataset, in blocks of at most `max_mem_mb`
+    that are aligned with its chunks, so that the complex values are never
+    held in memory all at once. Views can therefore be handed to viewers,
+    reductions and exporters in place of the dataset.
+
+    Attributes that the view does not define, such as ``dims``, ``file`` or
+    the methods of :class:`pyNSID.NSIDataset`, are looked up on the dataset.
+
+    Notes
+    -----
+    Views support indexing with integers, slices with positive steps and
+    Ellipsis. The phase is given in radians. The unwrapped phase along
+    `unwrap_axis` starts from the first element along that axis, so reads
+    of the unwrapped phase include all elements before the selected region
+    along that axis.
+
+    >>> magnitude = ComponentView(h5_main, 'magnitude')
+    >>> frame = magnitude[:, :, 10]
+    >>> mean = magnitude.to_dask().mean().compute()
+    """
+
+    def __init__(self, h5_dset, component='magnitude', unwrap_axis=None,
+                 max_mem_mb=64):
+        """
+        Parameters
+        ----------
+        h5_dset : h5py.Dataset, pyNSID.NSIDataset or numpy.ndarray
+            Dataset to view
+        component : str, optional. Default = 'magnitude'
+            'real', 'imag', 'magnitude' or 'phase'
+        unwrap_axis : int, optional
+            Axis along which the phase is unwrapped. Default - not unwrapped
+        max_mem_mb : float, optional. Default = 64
+            Upper bound on the size of the blocks read in MB
+        """
+        component = validate_single_string_arg(component, 'component')
+        if component not in COMPONENTS:
+            raise ValueError('component should be one of {}'.format(COMPONENTS))
+        if unwrap_axis is not None:
+            if component != 'phase':
+                raise ValueError('Only the phase can be unwrapped')
+            if not isinstance(unwrap_axis, Integral) or \
+                    not 0 <= unwrap_axis < len(h5_dset.shape):
+                raise ValueError('unwrap_axis should be a dimension of h5_dset')
+            unwrap_axis = int(unwrap_axis)
+        self.source = h5_dset
+        self.component = component
+        self.unwrap_axis = unwrap_axis
+        self.max_mem_mb = max_mem_mb
+        self.shape = tuple(h5_dset.shape)
+        self.ndim = len(self.shape)
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+        self.dtype = _FUNCTIONS[component](np.zeros(1, dtype=h5_dset.dtype)).dtype
+        self.chunks = getattr(h5_dset, 'chunks', None)
+
+    def __getattr__(self, name):
+        # Only called for attributes that the view does not define
+        if 'source' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.source, name)
+
+    @property
+    def data_descriptor(self):
+        """
+        Label of the values of the view
+        """
+        if self.component == 'phase':
+            return 'phase (rad)'
+        return '{} of {}'.format(self.component,
+                                 getattr(self.source, 'data_descriptor',
+                                         getattr(self.source, 'name', 'data')))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return '<{} of "{}" with shape {}>'.format(
+            self.component, getattr(self.source, 'name', 'array'), self.shape)
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[()]
+        return data if dtype is None else data.astype(dtype)
+
+    def _normalize_key(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(item is Ellipsis for item in key):
+            index = [item is Ellipsis for item in key].index(True)
+            fill = (slice(None),) * (self.ndim - len(key) + 1)
+            key = key[:index] + fill + key[index + 1:]
+        if len(key) > self.ndim or any(item is Ellipsis for item in key):
+            raise IndexError('Too many indices for a view with shape '
+                             '{}'.format(self.shape))
+        key = key + (slice(None),) * (self.ndim - len(key))
+
+        ranges = []
+        dropped = []
+        for axis, (item, size) in enumerate(zip(key, self.shape)):
+            if isinstance(item, slice):
+                start, stop, step = item.indices(size)
+                if step < 1:
+                    raise ValueError('Only positive steps are supported')
+                ranges.append((start, stop, step))
+            elif isinstance(item, Integral):
+                index = int(item) + size if item < 0 else int(item)
+                if not 0 <= index < size:
+                    raise IndexError('Index {} is out of bounds for axis {} '
+                                     'with size {}'.format(item, axis, size))
+                ranges.append((index, index + 1, 1))
+                dropped.append(axis)
+            else:
+                raise TypeError('Views can only be indexed with integers, '
+                                'slices and Ellipsis')
+        return ranges, dropped
+
+    def _compute(self, ranges):
+        # Reads the region spanned by ranges, with the unwrap axis in full
+        selection = tuple(slice(start, stop, step) for start, stop, step in ranges)
+        if self.unwrap_axis is None:
+            return _FUNCTIONS[self.component](np.asarray(self.source[selection]))
+        start, stop, step = ranges[self.unwrap_axis]
+        selection = list(selection)
+        selection[self.unwrap_axis] = slice(0, stop)
+        phase = np.unwrap(np.angle(np.asarray(self.source[tuple(selection)])),
+                          axis=self.unwrap_axis)
+        keep = [slice(None)] * self.ndim
+        keep[self.unwrap_axis] = slice(start, stop, step)
+        return phase[tuple(keep)]
+
+    def __getitem__(self, key):
+        ranges, dropped = self._normalize_key(key)
+        out_shape = tuple(len(range(*item)) for item in ranges)
+        out = np.empty(out_shape, dtype=self.dtype)
+        if out.size == 0:
+            return np.squeeze(out, axis=tuple(dropped))
+
+        # Blocks are laid out over the output and hold whole chunks of the
+        # source. The unwrap axis is never split
+        itemsize = np.dtype(self.source.dtype).itemsize
+        spans = [stop - start for start, stop, _ in ranges]
+        chunks = self.chunks
+        if self.unwrap_axis is not None:
+            axis = self.unwrap_axis
+            others = spans[:axis] + spans[axis + 1:]
+            other_chunks = None if chunks is None else \
+                chunks[:axis] + chunks[axis + 1:]
+            block = list(get_block_shape(others, itemsize * ranges[axis][1],
+                                         int(self.max_mem_mb * 1024 ** 2),
+                                         chunks=other_chunks))
+            block.insert(axis, spans[axis])
+        else:
+            block = list(get_block_shape(spans, itemsize,
+                                         int(self.max_mem_mb * 1024 ** 2),
+                                         chunks=chunks))
+        block = [max(1, size // step) for size, (_, _, step)
+                 in zip(block, ranges)]
+        if self.unwrap_axis is not None:
+            block[self.unwrap_axis] = out_shape[self.unwrap_axis]
+
+        for out_block in iter_block_slices(out_shape, block):
+            block_ranges = [(start + piece.start * step,
+                             start + (piece.stop - 1) * step + 1, step)
+                            for (start, _, step), piece in zip(ranges, out_block)]
+            out[out_block] = self._compute(block_ranges)
+        return np.squeeze(out, axis=tuple(dropped))
+
+    def to_dask(self, chunks=None):
+        """
+        Returns a lazy dask array that reads from this view
+
+        Parameters
+        ----------
+        chunks : tuple of int, optional
+            Chunks of the dask array. Default - the chunks of the dataset
+
+        Returns
+        -------
+        dask.array.core.Array
+        """
+        if chunks is None:
+            chunks = self.chunks if self.chunks is not None else 'auto'
+        return da.from_array(self, chunks=chunks)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Export of regions of interest from NSID Main datasets to new HDF5 files
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+import itertools
+
+import h5py
+import numpy as np
+
+from sidpy.base.string_utils import validate_single_string_arg
+
+from .hdf_utils import check_if_main, copy_attributes, copy_object_graph, \
+    link_as_main, get_block_shape, iter_block_slices, write_attributes
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['export_subset']
+
+
+def _get_dim_indices(h5_main, slice_dict):
+    """
+    Translates a dictionary of selections keyed by dimension label into one
+    array of source indices per dimension. Dimensions selected with a single
+    integer are flagged so that they can be dropped from the exported data
+    """
+    labels = [dim.label for dim in h5_main.dims]
+    for key in slice_dict.keys():
+        if key not in labels:
+            raise KeyError('Cannot slice {} on dimension: {}. Valid dimensions '
+                           'are: {}'.format(h5_main.name, key, labels))
+    indices = []
+    dropped = []
+    for label, size in zip(labels, h5_main.shape):
+        sel = slice_dict.get(label, slice(None))
+        if isinstance(sel, slice):
+            if sel.step is not None and sel.step < 1:
+                raise ValueError('Slices on dimension: {} should have a '
+                                 'positive step'.format(label))
+            inds = np.arange(size)[sel]
+        elif isinstance(sel, (int, np.integer)):
+            inds = np.arange(size)[[sel]]
+        elif isinstance(sel, (list, tuple, np.ndarray)):
+            inds = np.arange(size)[np.array(sel, dtype=np.int64)]
+            if np.any(np.diff(inds) <= 0):
+                raise ValueError('Indices selected on dimension: {} should be '
+                                 'unique and increasing'.format(label))
+        else:
+            raise TypeError('Selection on dimension: {} should be a slice, '
+                            'an integer or a list of indices. Got: {}'
+                            ''.format(label, type(sel)))
+        if len(inds) == 0:
+            raise ValueError('Selection on dimension: {} is empty'.format(label))
+        indices.append(inds)
+        dropped.append(isinstance(sel, (int, np.integer)))
+    return indices, dropped
+
+
+def _to_selection(inds):
+    # Regularly spaced indices can be read as a hyperslab
+    if len(inds) == 1:
+        return slice(int(inds[0]), int(inds[0]) + 1)
+    steps = np.diff(inds)
+    if np.all(steps == steps[0]):
+        return slice(int(inds[0]), int(inds[-1]) + 1, int(steps[0]))
+    return inds
+
+
+def _read_selection(h5_dset, selection):
+    """
+    Reads a selection made of slices and index arrays. h5py accepts a single
+    index array per read, so any further index arrays are read one index at a
+    time
+    """
+    list_dims = [axis for axis, sel in enumerate(selection)
+                 if isinstance(sel, np.ndarray)]
+    if len(list_dims) < 2:
+        return h5_dset[tuple(selection)]
+    shape = [len(range(*sel.indices(size))) if isinstance(sel, slice)
+             else len(sel) for sel, size in zip(selection, h5_dset.shape)]
+    data = np.empty(shape, dtype=h5_dset.dtype)
+    loop_dims = list_dims[1:]
+    for positions in itertools.product(*[range(shape[axis])
+                                         for axis in loop_dims]):
+        src = list(selection)
+        dst = [slice(None)] * len(shape)
+        for axis, pos in zip(loop_dims, positions):
+            ind = int(selection[axis][pos])
+            src[axis] = slice(ind, ind + 1)
+            dst[axis] = slice(pos, pos + 1)
+        data[tuple(dst)] = h5_dset[tuple(src)]
+    return data
+
+
+def _export_scale(h5_scale, inds, h5_group, exported):
+    """
+    Writes the selected values of a dimension scale, reusing a scale that was
+    already exported with the same selection
+    """
+    key = (h5py.h5o.get_info(h5_scale.id).fileno,
+           h5py.h5o.get_info(h5_scale.id).addr, inds.tobytes())
+    h5_new = exported.get(key)
+    if h5_new is not None and h5_new.parent == h5_group:
+        return h5_new
+    base_name = h5_scale.name.split('/')[-1]
+    name = base_name
+    index = 0
+    while name in h5_group:
+        index += 1
+        name = '{}_{:03d}'.format(base_name, index)
+    h5_new = h5_group.create_dataset(name, data=h5_scale[()][inds])
+    copy_attributes(h5_scale, h5_new, skip_refs=True)
+    # Dimensions are labelled, and looked up, by the 'name' of their scale
+    write_attributes(h5_new, {'name': name})
+    exported[key] = h5_new
+    return h5_new
+
+
+def _export_main(h5_main, slice_dict, h5_dest_grp, chunks, compression,
+                 max_mem_mb, exported, verbose):
+    indices, dropped = _get_dim_indices(h5_main, slice_dict)
+    kept = [axis for axis in range(h5_main.ndim) if not dropped[axis]]
+    if len(kept) == 0:
+        raise ValueError('Selection on {} leaves no dimension to export'
+                         ''.format(h5_main.name))
+    out_shape = tuple(len(indices[axis]) for axis in kept)
+
+    group_name = h5_main.parent.name.split('/')[-1]
+    h5_group = h5_dest_grp
+    if len(group_name) > 0:
+        h5_group = h5_dest_grp.require_group(group_name)
+    name = h5_main.name.split('/')[-1]
+    if name in h5_group:
+        raise ValueError('{} already contains an object named: {}'
+                         ''.format(h5_group, name))
+
+    kwargs = {'shape': out_shape, 'dtype': h5_main.dtype,
+              'fillvalue': h5_main.fillvalue}
+    if chunks is None and h5_main.chunks is not None:
+        chunks = tuple(min(h5_main.chunks[axis], size)
+                       for axis, size in zip(kept, out_shape))
+    if chunks is not None:
+        kwargs['chunks'] = chunks
+    if compression is None:
+        if h5_main.compression is not None:
+            kwargs.update({'compression': h5_main.compression,
+                           'compression_opts': h5_main.compression_opts,
+                           'shuffle': h5_main.shuffle})
+            kwargs.setdefault('chunks', True)
+    else:
+        kwargs['compression'] = compression
+    if h5_dest_grp.file.driver == 'mpio':
+        kwargs.pop('compression', None)
+        kwargs.pop('compression_opts', None)
+    h5_new = h5_group.create_dataset(name, **kwargs)
+    if verbose:
+        print('Exporting {} of {} to {}'.format(out_shape, h5_main.name,
+                                                 h5_new.name))
+
+    # Blocks are laid out in the space of the exported dataset and aligned
+    # with its chunks. h5py serializes all HDF5 calls, so reading blocks in
+    # threads would not overlap any I/O. Blocks are read and written in turn
+    block_shape = get_block_shape(out_shape, h5_main.dtype.itemsize,
+                                  int(max_mem_mb * 1024 ** 2),
+                                  chunks=h5_new.chunks)
+    for block in iter_block_slices(out_shape, block_shape):
+        # Dropped dimensions are read with a length of 1 and squeezed out
+        selection = [_to_selection(inds) for inds in indices]
+        for axis, blk in zip(kept, block):
+            selection[axis] = _to_selection(indices[axis][blk])
+        data = _read_selection(h5_main, selection)
+        h5_new[block] = data.reshape(tuple(blk.stop - blk.start
+                                           for blk in block))
+
+    dim_dict = dict()
+    for new_axis, axis in enumerate(kept):
+        dim_dict[new_axis] = _export_scale(h5_main.dims[axis][0],
+                                           indices[axis], h5_group, exported)
+    copy_attributes(h5_main, h5_new, skip_refs=True)
+    h5_new = link_as_main(h5_new, dim_dict)
+
+    h5_metadata = h5_main.parent.get('original_metadata')
+    if isinstance(h5_metadata, h5py.Group) and \
+            'original_metadata' not in h5_group:
+        copy_object_graph(h5_metadata, h5_group)
+    return h5_new
+
+
+def export_subset(h5_mains, h5_dest, slice_dicts=None, chunks=None,
+                  compression=None, max_mem_mb=256, verbose=False):
+    """
+    Exports regions of interest of NSID Main datasets to a new HDF5 file
+
+    Each Main dataset is written to a group named after its parent group and
+    keeps its name. Its dimension scales are sliced to match, and its
+    attributes as well as the `original_metadata` group next to it are
+    preserved. Data are streamed through blocks of bounded size, so that
+    datasets much larger than memory can be exported.
+
+    Parameters
+    ----------
+    h5_mains : pyNSID.NSIDataset, h5py.Dataset or list thereof
+        NSID Main datasets to export
+    h5_dest : str, h5py.File or h5py.Group
+        Path of the new file or group to which the datasets are exported
+    slice_dicts : dict or list of dict, optional. Default = export everything
+        Selections keyed by dimension label. Values may be slices, lists of
+        increasing indices or integers. Dimensions selected with an integer
+        are dropped. A single dictionary is applied to all datasets
+    chunks : tuple of int, optional. Default = chunking of the source
+        Chunk shape of the exported datasets
+    compression : str, optional. Default = compression of the source
+        Compression filter of the exported datasets. E.g. - 'gzip'
+    max_mem_mb : float, optional. Default = 256
+        Upper bound on the memory used for buffering data in MB
+    verbose : bool, optional. Default = False
+        Whether or not to print logs to assist in debugging
+
+    Returns
+    -------
+    h5_exported : list of pyNSID.NSIDataset
+        Exported datasets. They belong to the file opened for `h5_dest` when
+        a path was provided, which the caller is responsible for closing
+    """
+    if isinstance(h5_mains, h5py.Dataset):
+        h5_mains = [h5_mains]
+    if not isinstance(h5_mains, (list, tuple)):
+        raise TypeError('h5_mains should be a NSIDataset or a list of '
+                        'NSIDatasets')
+    for h5_main in h5_mains:
+        if not isinstance(h5_main, h5py.Dataset) or not check_if_main(h5_main):
+            raise TypeError('{} is not a NSID Main dataset'.format(h5_main))
+    if slice_dicts is None:
+        slice_dicts = dict()
+    if isinstance(slice_dicts, dict):
+        slice_dicts = [slice_dicts] * len(h5_mains)
+    if len(slice_dicts) != len(h5_mains):
+        raise ValueError('Provide one slice dictionary per dataset')
+    for slice_dict in slice_dicts:
+        if not isinstance(slice_dict, dict):
+            raise TypeError('slice_dicts should be a dictionary or a list of '
+                            'dictionaries')
+    if max_mem_mb <= 0:
+        raise ValueError('max_mem_mb should be a positive number')
+
+    opened = isinstance(h5_dest, (str, unicode))
+    if opened:
+        h5_dest = h5py.File(validate_single_string_arg(h5_dest, 'h5_dest'),
+                            mode='w')
+    elif not isinstance(h5_dest, (h5py.File, h5py.Group)):
+        raise TypeError('h5_dest should be a file path, h5py.File or '
+                        'h5py.Group object')
+
+    exported = dict()
+    h5_exported = []
+    try:
+        for h5_main, slice_dict in zip(h5_mains, slice_dicts):
+            h5_exported.append(_export_main(h5_main, slice_dict, h5_dest,
+                                            chunks, compression, max_mem_mb,
+                                            exported, verbose))
+    except Exception:
+        # The file opened here would otherwise be left open
+        if opened:
+            h5_dest.close()
+        raise
+    return h5_exported
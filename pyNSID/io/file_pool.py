@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded pool of open HDF5 file handles shared across multi-file workflows
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import h5py
+
+from sidpy.base.string_utils import validate_single_string_arg
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['H5FilePool', 'get_default_pool']
+
+_CACHE_KEYS = ['rdcc_nbytes', 'rdcc_nslots', 'rdcc_w0']
+
+
+class H5FilePool(object):
+    """
+    Thread-safe, least-recently-used pool of open :class:`h5py.File` handles
+    keyed by (path, mode).
+
+    Requesting a file that is already open returns the existing handle, so
+    repeated accesses cost a dictionary lookup instead of a filesystem
+    round-trip. Once more than `max_open` handles are open, the least recently
+    used one is closed.
+
+    Notes
+    -----
+    Closing a file also invalidates all datasets and groups obtained from it.
+    Use :meth:`lease` to keep a file open while it is being worked on,
+    especially when other threads share the pool. Leased files are never
+    evicted, even if this temporarily exceeds `max_open`, and are never
+    closed by :meth:`release` or :meth:`set_cache_settings`.
+
+    >>> pool = H5FilePool(max_open=128, rdcc_nbytes=64 * 1024 ** 2)
+    >>> with pool.lease('scan_001.h5') as h5_file:
+    ...     h5_main = pool.get_dataset('scan_001.h5', '/Measurement_000/Raw_Data')
+    >>> pool.close_all()
+    """
+
+    def __init__(self, max_open=64, rdcc_nbytes=None, rdcc_nslots=None,
+                 rdcc_w0=None):
+        """
+        Parameters
+        ----------
+        max_open : int, optional. Default = 64
+            Maximum number of simultaneously open file handles
+        rdcc_nbytes : int, optional
+            Default size of the raw data chunk cache of each file in bytes
+        rdcc_nslots : int, optional
+            Default number of chunk slots in the raw data chunk cache
+        rdcc_w0 : float, optional
+            Default chunk preemption policy, between 0 and 1
+        """
+        if int(max_open) < 1:
+            raise ValueError('max_open should be a positive integer')
+        self.max_open = int(max_open)
+        self._default_cache = {'rdcc_nbytes': rdcc_nbytes,
+                               'rdcc_nslots': rdcc_nslots,
+                               'rdcc_w0': rdcc_w0}
+        self._file_cache = dict()
+        self._handles = OrderedDict()
+        self._leases = dict()
+        # Files whose cache settings changed while they were leased
+        self._stale = set()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(path, mode):
+        path = os.path.abspath(validate_single_string_arg(path, 'path'))
+        if mode not in ['r', 'r+', 'a']:
+            raise ValueError("mode should be one of 'r', 'r+', or 'a'. Create "
+                             "new files with h5py.File before pooling them")
+        return path, mode
+
+    def set_cache_settings(self, path, rdcc_nbytes=None, rdcc_nslots=None,
+                           rdcc_w0=None):
+        """
+        Sets the chunk cache settings used whenever `path` is opened. A handle
+        to this file that is already open is closed so that the new settings
+        take effect the next time it is requested. If the file is leased, the
+        handle is only closed once the last lease is returned.
+
+        Parameters
+        ----------
+        path : str
+            Path to the HDF5 file
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache in bytes
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache
+        rdcc_w0 : float, optional
+            Chunk preemption policy, between 0 and 1
+        """
+        path, _ = self._normalize(path, 'r')
+        with self._lock:
+            self._file_cache[path] = {'rdcc_nbytes': rdcc_nbytes,
+                                      'rdcc_nslots': rdcc_nslots,
+                                      'rdcc_w0': rdcc_w0}
+            if self._is_leased(path):
+                self._stale.add(path)
+            else:
+                self.release(path)
+
+    def _is_leased(self, path):
+        return any([key[0] == path and count > 0
+                    for key, count in self._leases.items()])
+
+    def _open(self, path, mode):
+        settings = dict(self._default_cache)
+        for key, val in self._file_cache.get(path, dict()).items():
+            if val is not None:
+                settings[key] = val
+        kwargs = dict((key, settings[key]) for key in _CACHE_KEYS
+                      if settings[key] is not None)
+        return h5py.File(path, mode=mode, **kwargs)
+
+    def _get(self, path, mode):
+        path, mode = self._normalize(path, mode)
+        with self._lock:
+            # Any writable handle can serve any request
+            keys = [(path, 'r+'), (path, 'a')]
+            if mode == 'r':
+                keys.insert(0, (path, 'r'))
+            for key in keys:
+                h5_file = self._handles.get(key)
+                if h5_file is None:
+                    continue
+                if h5_file.id.valid:
+                    self._handles.move_to_end(key)
+                    self.hits += 1
+                    return key, h5_file
+                # Closed elsewhere. Forget about it
+                del self._handles[key]
+
+            self.misses += 1
+            if mode != 'r':
+                if self._leases.get((path, 'r'), 0) > 0:
+                    raise ValueError('{} is leased as read-only and cannot be '
+                                     'reopened in mode: {}'.format(path, mode))
+                self.release(path)
+            elif path in self._stale and not self._is_leased(path):
+                self._stale.discard(path)
+            key = (path, mode)
+            h5_file = self._open(path, mode)
+            self._handles[key] = h5_file
+            self._evict(keep=key)
+            return key, h5_file
+
+    def get_file(self, path, mode='r'):
+        """
+        Returns an open handle to the requested HDF5 file
+
+        Parameters
+        ----------
+        path : str
+            Path to the HDF5 file
+        mode : str, optional. Default = 'r'
+            'r', 'r+' or 'a'. An already open writable handle to the same file
+            serves requests in any mode. Requesting a writable handle closes
+            any read-only handle to the same file first
+
+        Returns
+        -------
+        h5_file : :class:`h5py.File`
+            Open file handle owned by the pool
+        """
+        return self._get(path, mode)[1]
+
+    def _evict(self, keep=None):
+        excess = len(self._handles) - self.max_open
+        for key in list(self._handles.keys()):
+            if excess <= 0:
+                break
+            if key == keep or self._leases.get(key, 0) > 0:
+                continue
+            self._handles.pop(key).close()
+            excess -= 1
+
+    @contextmanager
+    def lease(self, path, mode='r'):
+        """
+        Context manager that provides an open file handle which will not be
+        evicted until the context is exited
+
+        Parameters
+        ----------
+        path : str
+            Path to the HDF5 file
+        mode : str, optional. Default = 'r'
+            Mode in which the file should be open
+
+        Yields
+        ------
+        h5_file : :class:`h5py.File`
+            Open file handle owned by the pool
+        """
+        with self._lock:
+            key, h5_file = self._get(path, mode)
+            self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            yield h5_file
+        finally:
+            with self._lock:
+                self._leases[key] -= 1
+                if self._leases[key] == 0:
+                    del self._leases[key]
+                if key[0] in self._stale and not self._is_leased(key[0]):
+                    # Deferred by set_cache_settings
+                    self._stale.discard(key[0])
+                    self.release(key[0])
+                self._evict()
+
+    def get_dataset(self, path, dset_path, mode='r'):
+        """
+        Returns a dataset from a pooled file handle
+
+        Parameters
+        ----------
+        path : str
+            Path to the HDF5 file
+        dset_path : str
+            Absolute path of the dataset within the file
+        mode : str, optional. Default = 'r'
+            Mode in which the file should be open
+
+        Returns
+        -------
+        h5_dset : pyNSID.NSIDataset or :class:`h5py.Dataset`
+            NSIDataset if the dataset is a Main dataset, otherwise the plain
+            :class:`h5py.Dataset`
+        """
+        dset_path = validate_single_string_arg(dset_path, 'dset_path')
+        h5_dset = self.get_file(path, mode=mode)[dset_path]
+        if not isinstance(h5_dset, h5py.Dataset):
+            raise TypeError('{} in {} is not a h5py.Dataset'.format(dset_path,
+                                                                   path))
+        from .hdf_utils import check_if_main
+        from .nsi_data import NSIDataset
+        if check_if_main(h5_dset):
+            return NSIDataset(h5_dset)
+        return h5_dset
+
+    def release(self, path, mode=None):
+        """
+        Closes pooled handles to a file. Leased handles cannot be closed
+
+        Parameters
+        ----------
+        path : str
+            Path to the HDF5 file
+        mode : str, optional. Default = None
+            Only the handle opened in this mode will be closed. By default,
+            handles in all modes are closed
+        """
+        path = os.path.abspath(validate_single_string_arg(path, 'path'))
+        with self._lock:
+            keys = [key for key in self._handles
+                    if key[0] == path and mode in [None, key[1]]]
+            leased = [key for key in keys if self._leases.get(key, 0) > 0]
+            if len(leased) > 0:
+                raise ValueError('{} is leased in mode: {} and cannot be '
+                                 'closed'.format(path, leased[0][1]))
+            for key in keys:
+                self._handles.pop(key).close()
+
+    def close_all(self):
+        """
+        Closes all file handles in the pool, including leased ones
+        """
+        with self._lock:
+            self._stale.clear()
+            while len(self._handles) > 0:
+                _, h5_file = self._handles.popitem(last=False)
+                h5_file.close()
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __contains__(self, path):
+        path = os.path.abspath(path)
+        return any([key[0] == path for key in self._handles])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close_all()
+
+
+_DEFAULT_POOL = None
+_DEFAULT_POOL_LOCK = threading.Lock()
+
+
+def get_default_pool():
+    """
+    Returns the pool shared by :meth:`pyNSID.NSIDataset.from_file` and other
+    callers that do not provide their own pool
+
+    Returns
+    -------
+    pool : H5FilePool
+        Pool created with the default settings on first use
+    """
+    global _DEFAULT_POOL
+    with _DEFAULT_POOL_LOCK:
+        if _DEFAULT_POOL is None:
+            _DEFAULT_POOL = H5FilePool()
+        return _DEFAULT_POOL
@@ -8,11 +8,31 @@ Submodules
     :toctree: _autosummary
 
     base
+    attributes
     simple
     model
+    checksum
+    rechunk
+    repack
+    projection
+    summed_area
+    pyramid
+    statistics
+    profile
+    decimation
 
 """
 
 from .base import *
+from .attributes import *
 from .simple import *
 from .model import *
+from .checksum import *
+from .rechunk import *
+from .repack import *
+from .projection import *
+from .summed_area import *
+from .pyramid import *
+from .statistics import *
+from .profile import *
+from .decimation import *
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk reading and writing of HDF5 attributes
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+from enum import Enum
+from warnings import warn
+
+import h5py
+import numpy as np
+
+from sidpy.base.string_utils import clean_string_att
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['read_attributes', 'write_attributes']
+
+
+def _decode(att_val):
+    if isinstance(att_val, (bytes, np.bytes_)):
+        return att_val.decode('utf-8')
+    if isinstance(att_val, np.ndarray) and att_val.dtype.type == np.bytes_:
+        return np.array([x.decode('utf-8') for x in att_val.flat]
+                        ).reshape(att_val.shape)
+    return att_val
+
+
+def read_attributes(h5_obj, attr_names=None, exclude=None, skip_refs=False):
+    """
+    Reads the attributes of a h5py object in a single pass over its
+    attributes. Byte strings are decoded to str as in
+    :func:`sidpy.hdf.hdf_utils.get_attr`.
+
+    Parameters
+    ----------
+    h5_obj : h5py.Dataset, :class:`h5py.Group`, or :class:`h5py.File`
+        Object whose attributes are read
+    attr_names : list of str, optional. Default = all attributes
+        Names of the attributes of interest. Missing attributes are left out
+        of the returned dictionary
+    exclude : list of str, optional
+        Names of attributes that should not be read
+    skip_refs : bool, optional. Default = False
+        Whether or not object and region references should be left out
+
+    Returns
+    -------
+    attrs : dict
+        Attribute values keyed by name
+    """
+    if not isinstance(h5_obj, (h5py.Dataset, h5py.Group, h5py.File)):
+        raise TypeError('h5_obj should be a h5py.Dataset, h5py.Group or '
+                        'h5py.File object')
+    wanted = None if attr_names is None else set(attr_names)
+    exclude = set() if exclude is None else set(exclude)
+
+    names = []
+    h5py.h5a.iterate(h5_obj.id, names.append)
+
+    attrs = dict()
+    for name in names:
+        name = name.decode('utf-8')
+        if name in exclude or (wanted is not None and name not in wanted):
+            continue
+        att_val = _decode(h5_obj.attrs[name])
+        if skip_refs and isinstance(att_val, h5py.Reference):
+            # Region references are also instances of h5py.Reference
+            continue
+        attrs[name] = att_val
+    return attrs
+
+
+def _clean(att_val):
+    # Numeric arrays need no cleaning. Scanning them element-wise is slow
+    if isinstance(att_val, np.ndarray) and att_val.dtype.kind not in 'OSU':
+        return att_val
+    if isinstance(att_val, h5py.Reference):
+        return att_val
+    return clean_string_att(att_val)
+
+
+def write_attributes(h5_obj, attrs, force_to_str=True, verbose=False):
+    """
+    Writes a dictionary of attributes to a h5py object. All values are
+    validated and cleaned before any of them is written, following the
+    conventions of :func:`sidpy.hdf.hdf_utils.write_simple_attrs`
+
+    Parameters
+    ----------
+    h5_obj : h5py.Dataset, :class:`h5py.Group`, or :class:`h5py.File`
+        Object to which the attributes are written
+    attrs : dict
+        Attribute values keyed by name. None values are skipped and Enums are
+        written by name
+    force_to_str : bool, optional. Default = True
+        Whether or not to cast keys or values to string when they do not have
+        the correct types
+    verbose : bool, optional. Default = False
+        Whether or not to print debugging statements
+    """
+    if not isinstance(attrs, dict):
+        raise TypeError('attrs should be a dictionary but is instead of type '
+                        '{}'.format(type(attrs)))
+    if not isinstance(h5_obj, (h5py.File, h5py.Group, h5py.Dataset)):
+        raise TypeError('h5_obj should be a h5py File, Group or Dataset object'
+                        ' but is instead of type {}'.format(type(h5_obj)))
+
+    cleaned = []
+    for key, val in attrs.items():
+        if not isinstance(key, (str, unicode)):
+            if not force_to_str:
+                warn('Skipping attribute with key: {}. Expected str, got {}'
+                     ''.format(key, type(key)))
+                continue
+            warn('Converted key: {} from type: {} to str'
+                 ''.format(key, type(key)))
+            key = str(key)
+        if val is None:
+            continue
+        if isinstance(val, Enum):
+            val = val.name
+        if isinstance(val, dict):
+            raise ValueError('provided dictionary was nested, not flat. '
+                             'Flatten dictionary using sidpy.base.dict_utils.'
+                             'flatten_dict before writing attributes')
+        cleaned.append((key.strip(), val, _clean(val)))
+
+    for key, val, clean_val in cleaned:
+        if verbose:
+            print('Writing attribute: {} with value: {}'.format(key, clean_val))
+        try:
+            h5_obj.attrs[key] = clean_val
+        except Exception as excp:
+            if not force_to_str:
+                raise excp
+            warn('Casting attribute value: {} of type: {} to str'
+                 ''.format(val, type(val)))
+            clean_val = str(val)
+            h5_obj.attrs[key] = clean_val
@@ -8,7 +8,10 @@ Created on Fri May 22, 2020
 """
 from __future__ import division, print_function, absolute_import, unicode_literals
 import sys
+import itertools
 import h5py
+import numpy as np
+from h5py import h5, h5a, h5d, h5g, h5l, h5o, h5z
 
 from sidpy.hdf import hdf_utils as hut
 
@@ -18,7 +21,7 @@ if sys.version_info.major == 3:
     unicode = str
 
 
-def print_tree(parent, rel_paths=False, main_dsets_only=False):
+def print_tree(parent, rel_paths=False, main_dsets_only=False, max_depth=None):
     """
     Simple function to recursively print the contents of an hdf5 group
 
@@ -32,33 +35,470 @@ def print_tree(parent, rel_paths=False, main_dsets_only=False):
     main_dsets_only : bool, optional. default=False
         True - prints only groups and Main datasets
         False - prints all dataset and group objects
+    max_depth : int, optional. Default = None
+        Objects nested deeper than this many levels below `parent` will not be
+        printed. By default, the entire tree is printed
     """
     if not isinstance(parent, (h5py.File, h5py.Group)):
         raise TypeError('Provided object is not a h5py.File or h5py.Group '
                         'object')
 
-    def __print(name, obj):
-        show = True
-        if main_dsets_only:
-            show = False
-            from .simple import check_if_main
-            if check_if_main(obj) or isinstance(obj, h5py.Group):
-                show = True
-        if not show:
-            return
-
+    print(parent.name)
+    for node in iter_tree_summary(parent, max_depth=max_depth,
+                                  main_dsets_only=main_dsets_only,
+                                  validate_main=main_dsets_only):
+        if node['type'] not in ['group', 'dataset']:
+            continue
         if rel_paths:
-            print(name)
+            print(node['path'])
         else:
-            levels = name.count('/')
-            curr_name = name[name.rfind('/') + 1:]
+            levels = node['depth']
+            print(levels * '  ' + '├ ' + node['name'])
+            if node['type'] == 'group':
+                print((levels + 1) * '  ' + len(node['name']) * '-')
 
-            print(levels * '  ' + '├ ' + curr_name)
-            if isinstance(obj, h5py.Group):
-                print((levels + 1) * '  ' + len(curr_name) * '-')
 
-    print(parent.name)
-    parent.visititems(__print)
+_FILTER_NAMES = {h5z.FILTER_DEFLATE: 'gzip', h5z.FILTER_SHUFFLE: 'shuffle',
+                 h5z.FILTER_FLETCHER32: 'fletcher32', h5z.FILTER_SZIP: 'szip',
+                 h5z.FILTER_SCALEOFFSET: 'scaleoffset', 32000: 'lzf'}
+
+_MAIN_ATTRS = ['DIMENSION_LIST', 'quantity', 'units', 'main_data_name',
+               'data_type', 'modality', 'source']
+
+
+def _summarize_dataset(dset_id, node):
+    """
+    Fills `node` with the shape, storage and main-dataset information that
+    can be read from the dataset's header without reading any data
+    """
+    node['shape'] = dset_id.shape
+    node['dtype'] = dset_id.dtype
+    node['nbytes'] = int(np.prod(dset_id.shape, dtype=np.int64) *
+                         dset_id.dtype.itemsize)
+    node['storage_size'] = int(dset_id.get_storage_size())
+    dcpl = dset_id.get_create_plist()
+    node['chunks'] = None
+    if dcpl.get_layout() == h5d.CHUNKED:
+        node['chunks'] = dcpl.get_chunk()
+    filters = []
+    for index in range(dcpl.get_nfilters()):
+        code = dcpl.get_filter(index)[0]
+        filters.append(_FILTER_NAMES.get(code, str(code)))
+    node['filters'] = filters
+    node['compression_ratio'] = None
+    if node['storage_size'] > 0:
+        node['compression_ratio'] = node['nbytes'] / node['storage_size']
+    node['is_main'] = all([h5a.exists(dset_id, att_name.encode('utf-8'))
+                           for att_name in _MAIN_ATTRS])
+
+
+def iter_tree_summary(parent, max_depth=None, main_dsets_only=False,
+                      validate_main=False):
+    """
+    Lazily walks an HDF5 (sub-)tree using low-level link iteration and yields a
+    summary of each object in depth-first order.
+
+    Unlike :meth:`h5py.Group.visititems`, no high-level h5py object is
+    created per link and no data is read. Datasets are only opened at the
+    HDF5 library level to read their header. Since results are yielded as
+    soon as they are found, very large files can be streamed or paginated,
+    e.g. with :func:`itertools.islice`.
+
+    Parameters
+    ----------
+    parent : :class:`h5py.Group` or :class:`h5py.File`
+        HDF5 (sub-)tree to summarize
+    max_depth : int, optional. Default = None
+        Objects nested deeper than this many levels below `parent` are not
+        visited. 0 only summarizes the direct children of `parent`
+    main_dsets_only : bool, optional. Default = False
+        If True, only groups and Main datasets are yielded
+    validate_main : bool, optional. Default = False
+        Datasets carrying dimension scales and all mandatory Main dataset
+        attributes are flagged as Main. If True, these candidates are also
+        verified with :func:`~pyNSID.io.hdf_utils.check_if_main`
+
+    Yields
+    ------
+    node : dict
+        Summary with keys 'name', 'path' (relative to `parent`), 'depth' and
+        'type' ('group', 'dataset', 'datatype', 'soft_link' or
+        'external_link'). Groups also provide 'num_children'. Datasets also
+        provide 'shape', 'dtype', 'nbytes', 'storage_size', 'chunks',
+        'filters', 'compression_ratio' and 'is_main'
+    """
+    if not isinstance(parent, (h5py.File, h5py.Group)):
+        raise TypeError('Provided object is not a h5py.File or h5py.Group '
+                        'object')
+    if max_depth is not None:
+        max_depth = int(max_depth)
+
+    visited_groups = {h5o.get_info(parent.id).addr}
+
+    def __link_names(group_id):
+        names = []
+        group_id.links.iterate(names.append, idx_type=h5.INDEX_NAME,
+                               order=h5.ITER_NATIVE)
+        return names
+
+    def __walk(group_id, prefix, depth):
+        for link_name in __link_names(group_id):
+            name = link_name.decode('utf-8')
+            node = {'name': name, 'path': prefix + name, 'depth': depth}
+            link_type = group_id.links.get_info(link_name).type
+            if link_type == h5l.TYPE_SOFT:
+                node['type'] = 'soft_link'
+                node['target'] = group_id.links.get_val(link_name).decode('utf-8')
+                if not main_dsets_only:
+                    yield node
+                continue
+            if link_type == h5l.TYPE_EXTERNAL:
+                node['type'] = 'external_link'
+                file_name, obj_path = group_id.links.get_val(link_name)
+                node['target'] = (file_name.decode('utf-8'),
+                                  obj_path.decode('utf-8'))
+                if not main_dsets_only:
+                    yield node
+                continue
+
+            obj_info = h5o.get_info(group_id, link_name)
+            if obj_info.type == h5o.TYPE_GROUP:
+                node['type'] = 'group'
+                child_id = h5g.open(group_id, link_name)
+                node['num_children'] = child_id.get_num_objs()
+                yield node
+                if obj_info.addr in visited_groups:
+                    continue
+                visited_groups.add(obj_info.addr)
+                if max_depth is None or depth < max_depth:
+                    for child in __walk(child_id, node['path'] + '/',
+                                        depth + 1):
+                        yield child
+            elif obj_info.type == h5o.TYPE_DATASET:
+                node['type'] = 'dataset'
+                _summarize_dataset(h5d.open(group_id, link_name), node)
+                if node['is_main'] and validate_main:
+                    from .simple import check_if_main
+                    node['is_main'] = check_if_main(parent[node['path']])
+                if node['is_main'] or not main_dsets_only:
+                    yield node
+            elif not main_dsets_only:
+                node['type'] = 'datatype'
+                yield node
+
+    for node in __walk(parent.id, '', 0):
+        yield node
+
+
+def get_tree_summary(parent, max_depth=None, main_dsets_only=False,
+                     validate_main=False):
+    """
+    Returns a nested summary of an HDF5 (sub-)tree with per-dataset storage
+    size, chunking, compression ratio and Main dataset flags.
+
+    Parameters
+    ----------
+    parent : :class:`h5py.Group` or :class:`h5py.File`
+        HDF5 (sub-)tree to summarize
+    max_depth : int, optional. Default = None
+        Objects nested deeper than this many levels below `parent` are not
+        visited
+    main_dsets_only : bool, optional. Default = False
+        If True, only groups and Main datasets are included
+    validate_main : bool, optional. Default = False
+        If True, Main dataset candidates are verified with
+        :func:`~pyNSID.io.hdf_utils.check_if_main`
+
+    Returns
+    -------
+    tree : dict
+        Node for `parent` whose 'children' key holds the list of child
+        nodes. See :func:`iter_tree_summary` for the keys of each node. Group
+        nodes also carry the total 'nbytes' and 'storage_size' of all datasets
+        below them
+    """
+    tree = {'name': parent.name.split('/')[-1], 'path': '', 'depth': -1,
+            'type': 'group', 'children': [], 'nbytes': 0, 'storage_size': 0}
+    stack = [tree]
+    for node in iter_tree_summary(parent, max_depth=max_depth,
+                                  main_dsets_only=main_dsets_only,
+                                  validate_main=validate_main):
+        while stack[-1]['depth'] >= node['depth']:
+            stack.pop()
+        stack[-1]['children'].append(node)
+        if node['type'] == 'group':
+            node.update({'children': [], 'nbytes': 0, 'storage_size': 0})
+            stack.append(node)
+        elif node['type'] == 'dataset':
+            for group_node in stack:
+                for key in ['nbytes', 'storage_size']:
+                    group_node[key] = group_node.get(key, 0) + node[key]
+    return tree
+
+
+def get_filter_pipeline(h5_dset):
+    """
+    Returns the HDF5 filter pipeline of a dataset
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset of interest
+
+    Returns
+    -------
+    filters : tuple
+        (filter code, filter parameters) pairs in the order they are applied
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    dcpl = h5_dset.id.get_create_plist()
+    filters = []
+    for index in range(dcpl.get_nfilters()):
+        code, _, params, _ = dcpl.get_filter(index)
+        filters.append((code, tuple(params)))
+    return tuple(filters)
+
+
+def have_same_layout(h5_dset_1, h5_dset_2):
+    """
+    Checks whether two datasets store their data identically on disk, i.e. -
+    whether they share shape, dtype, chunk shape, filter pipeline and fill
+    value so that raw (still compressed) chunks can be exchanged between them.
+    The fill value matters since it is what unallocated chunks read as
+
+    Parameters
+    ----------
+    h5_dset_1 : :class:`h5py.Dataset`
+        First dataset
+    h5_dset_2 : :class:`h5py.Dataset`
+        Second dataset
+
+    Returns
+    -------
+    same : bool
+        True if both datasets are chunked and share the same storage layout
+    """
+    for param, param_name in zip([h5_dset_1, h5_dset_2],
+                                 ['h5_dset_1', 'h5_dset_2']):
+        if not isinstance(param, h5py.Dataset):
+            raise TypeError(param_name + ' should be a h5py.Dataset object')
+    if h5_dset_1.chunks is None or h5_dset_2.chunks is None:
+        return False
+    return all([h5_dset_1.shape == h5_dset_2.shape,
+                h5_dset_1.dtype == h5_dset_2.dtype,
+                h5_dset_1.chunks == h5_dset_2.chunks,
+                get_filter_pipeline(h5_dset_1) == get_filter_pipeline(h5_dset_2),
+                # Compared as bytes so that NaN fill values match
+                np.asarray(h5_dset_1.fillvalue).tobytes() ==
+                np.asarray(h5_dset_2.fillvalue).tobytes()])
+
+
+def iter_raw_chunks(h5_dset):
+    """
+    Iterates over the allocated chunks of a dataset without decompressing them
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Chunked dataset
+
+    Yields
+    ------
+    offset : tuple of int
+        Logical position of the first element of the chunk
+    filter_mask : int
+        Mask of the filters that were skipped when writing this chunk
+    raw_bytes : bytes
+        Chunk as stored in the file
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    if h5_dset.chunks is None:
+        raise ValueError('{} is not a chunked dataset'.format(h5_dset.name))
+    dset_id = h5_dset.id
+    for index in range(dset_id.get_num_chunks()):
+        offset = dset_id.get_chunk_info(index).chunk_offset
+        filter_mask, raw_bytes = dset_id.read_direct_chunk(offset)
+        yield offset, filter_mask, raw_bytes
+
+
+def copy_raw_chunks(h5_source, h5_dest):
+    """
+    Copies all allocated chunks from one dataset to another without
+    decompressing and recompressing them
+
+    Parameters
+    ----------
+    h5_source : :class:`h5py.Dataset`
+        Dataset to read the chunks from
+    h5_dest : :class:`h5py.Dataset`
+        Dataset with the same layout as `h5_source`. See
+        :func:`have_same_layout`
+
+    Returns
+    -------
+    num_chunks : int
+        Number of chunks that were copied
+    """
+    if not have_same_layout(h5_source, h5_dest):
+        raise ValueError('{} and {} do not share the same chunking, dtype, '
+                         'shape and filters'.format(h5_source, h5_dest))
+    num_chunks = 0
+    for offset, filter_mask, raw_bytes in iter_raw_chunks(h5_source):
+        h5_dest.id.write_direct_chunk(offset, raw_bytes, filter_mask)
+        num_chunks += 1
+    return num_chunks
+
+
+def iter_block_slices(shape, block_shape):
+    """
+    Splits an N-dimensional array into blocks
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of the array
+    block_shape : tuple of int
+        Shape of each block. Blocks at the upper edges may be smaller
+
+    Yields
+    ------
+    block : tuple of slice
+        Slices that select one block
+    """
+    if len(shape) != len(block_shape):
+        raise ValueError('shape: {} and block_shape: {} should have the same '
+                         'number of dimensions'.format(shape, block_shape))
+    starts = [range(0, size, max(1, int(step)))
+              for size, step in zip(shape, block_shape)]
+    for corner in itertools.product(*starts):
+        yield tuple(slice(start, min(start + int(step), size))
+                    for start, step, size in zip(corner, block_shape, shape))
+
+
+def get_block_shape(shape, itemsize, max_bytes, chunks=None):
+    """
+    Picks the shape of blocks used to stream through an array with bounded
+    memory. Blocks are whole multiples of `chunks` (when provided) and are
+    grown along the last dimensions first so that each block is as contiguous
+    as possible.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of the array
+    itemsize : int
+        Size of each element in bytes
+    max_bytes : int
+        Upper bound on the size of each block in bytes. A single chunk is
+        returned if even one chunk exceeds this size
+    chunks : tuple of int, optional. Default = None
+        Chunk shape of the dataset the blocks should be aligned with
+
+    Returns
+    -------
+    block_shape : tuple of int
+        Shape of each block
+    """
+    shape = tuple(int(x) for x in shape)
+    if len(shape) == 0:
+        return shape
+    if chunks is None:
+        chunks = (1,) * len(shape)
+    block = [max(1, min(int(chunk), size)) for chunk, size in zip(chunks, shape)]
+    for axis in reversed(range(len(shape))):
+        others = int(np.prod(block[:axis] + block[axis + 1:], dtype=np.int64))
+        units = max(1, int(max_bytes) // (others * itemsize * block[axis]))
+        block[axis] = min(shape[axis], block[axis] * units)
+        if block[axis] < shape[axis]:
+            break
+    return tuple(block)
+
+
+def datasets_equal(h5_dset_1, h5_dset_2, rtol=1e-05, atol=1e-08,
+                   max_mem_mb=256, use_checksums=False):
+    """
+    Checks whether two datasets hold the same values while reading as little as
+    possible. Shapes and dtypes are compared first. If both datasets share the
+    same storage layout, the raw chunks are compared without decompression.
+    Otherwise, the data are compared block by block within the given
+    tolerances and the comparison stops at the first mismatching block.
+
+    Parameters
+    ----------
+    h5_dset_1 : :class:`h5py.Dataset`
+        First dataset
+    h5_dset_2 : :class:`h5py.Dataset`
+        Second dataset
+    rtol : float, optional
+        Relative tolerance used when comparing decompressed values
+    atol : float, optional
+        Absolute tolerance used when comparing decompressed values
+    max_mem_mb : int, optional. Default = 256
+        Upper bound on the memory used for each block of decompressed values
+    use_checksums : bool, optional. Default = False
+        Whether or not to trust stored chunk checksums (see
+        :func:`~pyNSID.io.hdf_utils.write_chunk_checksums`). Matching
+        checksums with the same block shape are then taken as equality
+        without reading any data. Stored checksums describe the data at the
+        time they were written, so only enable this for datasets known not
+        to have been modified since. Differing checksums always fall back to
+        comparing the values
+
+    Returns
+    -------
+    equal : bool
+        Whether or not the datasets are equal
+    """
+    for param, param_name in zip([h5_dset_1, h5_dset_2],
+                                 ['h5_dset_1', 'h5_dset_2']):
+        if not isinstance(param, h5py.Dataset):
+            raise TypeError(param_name + ' should be a h5py.Dataset object')
+    if h5_dset_1.shape != h5_dset_2.shape or h5_dset_1.dtype != h5_dset_2.dtype:
+        return False
+
+    from .checksum import get_chunk_checksums
+    checksums_1, block_shape_1 = None, None
+    if use_checksums:
+        checksums_1, block_shape_1 = get_chunk_checksums(h5_dset_1)
+    if checksums_1 is not None:
+        checksums_2, block_shape_2 = get_chunk_checksums(h5_dset_2)
+        if checksums_2 is not None and block_shape_1 == block_shape_2 and \
+                np.array_equal(checksums_1, checksums_2):
+            return True
+
+    if have_same_layout(h5_dset_1, h5_dset_2):
+        # Identical raw chunks imply identical values. Differing raw chunks
+        # may still decompress to the same values, so fall through then
+        identical = h5_dset_1.id.get_num_chunks() == h5_dset_2.id.get_num_chunks()
+        if identical:
+            for offset, mask, raw_bytes in iter_raw_chunks(h5_dset_1):
+                try:
+                    other = h5_dset_2.id.read_direct_chunk(offset)
+                except (KeyError, ValueError, RuntimeError, OSError):
+                    # chunk not allocated in h5_dset_2
+                    other = None
+                if other != (mask, raw_bytes):
+                    identical = False
+                    break
+        if identical:
+            return True
+
+    block_shape = get_block_shape(h5_dset_1.shape, h5_dset_1.dtype.itemsize,
+                                  max_mem_mb * 1024 ** 2 // 2,
+                                  chunks=h5_dset_1.chunks)
+    for block in iter_block_slices(h5_dset_1.shape, block_shape):
+        data_1 = h5_dset_1[block]
+        data_2 = h5_dset_2[block]
+        if h5_dset_1.dtype.fields is not None or h5_dset_1.dtype.kind in 'SUOV':
+            same = np.array_equal(data_1, data_2)
+        else:
+            same = np.allclose(data_1, data_2, rtol=rtol, atol=atol,
+                               equal_nan=True)
+        if not same:
+            return False
+    return True
 
 
 def get_h5_obj_refs(obj_names, h5_refs):
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Per-chunk content checksums for fast equality, difference and integrity checks
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+import hashlib
+from multiprocessing.pool import ThreadPool
+
+import h5py
+import numpy as np
+
+from .base import get_block_shape, iter_block_slices
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['compute_chunk_checksums', 'write_chunk_checksums',
+           'get_chunk_checksums', 'diff_chunks', 'verify_chunk_checksums',
+           'verify_files']
+
+CHECKSUM_ALGORITHM = 'blake2b-128'
+_DIGEST_SIZE = 16
+_CHECKSUM_SUFFIX = '_chunk_checksums'
+
+
+def _default_block_shape(h5_dset):
+    if h5_dset.chunks is not None:
+        return h5_dset.chunks
+    # Contiguous datasets are hashed in blocks of about 16 MB
+    return get_block_shape(h5_dset.shape, h5_dset.dtype.itemsize, 16 * 1024 ** 2)
+
+
+def _hash_block(data):
+    digest = hashlib.blake2b(np.ascontiguousarray(data), digest_size=_DIGEST_SIZE)
+    return np.frombuffer(digest.digest(), dtype=np.uint8)
+
+
+def compute_chunk_checksums(h5_dset, block_shape=None, n_jobs=1):
+    """
+    Hashes the decompressed contents of a dataset block by block
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset to hash
+    block_shape : tuple of int, optional
+        Shape of the hashed blocks. Default - the chunk shape of `h5_dset` or
+        blocks of about 16 MB for contiguous datasets
+    n_jobs : int, optional. Default = 1
+        Number of threads that hash blocks while others are being read
+
+    Returns
+    -------
+    checksums : numpy.ndarray
+        uint8 array of shape (blocks along each dimension) + (16,) holding one
+        digest per block
+    block_shape : tuple of int
+        Shape of the hashed blocks
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    if h5_dset.dtype.hasobject:
+        raise TypeError('Checksums can only be computed for datasets with a '
+                        'fixed-size dtype')
+    if block_shape is None:
+        block_shape = _default_block_shape(h5_dset)
+    block_shape = tuple(int(x) for x in block_shape)
+    grid = tuple(int(np.ceil(size / step)) for size, step
+                 in zip(h5_dset.shape, block_shape))
+    blocks = list(iter_block_slices(h5_dset.shape, block_shape))
+
+    def __hash(block):
+        return _hash_block(h5_dset[block])
+
+    if n_jobs == 1 or len(blocks) < 2:
+        digests = [__hash(block) for block in blocks]
+    else:
+        # h5py serializes the reads, but hashlib releases the GIL while
+        # hashing, so reading and hashing overlap
+        pool = ThreadPool(None if n_jobs < 1 else n_jobs)
+        try:
+            digests = pool.map(__hash, blocks)
+        finally:
+            pool.close()
+    checksums = np.array(digests, dtype=np.uint8).reshape(grid + (_DIGEST_SIZE,))
+    return checksums, block_shape
+
+
+def write_chunk_checksums(h5_dset, block_shape=None, n_jobs=1):
+    """
+    Computes per-chunk checksums of a dataset and stores them in a compact
+    side dataset named '<dataset name>_chunk_checksums' next to it. An
+    object reference to the side dataset is written to the 'chunk_checksums'
+    attribute of `h5_dset`. Existing checksums are overwritten.
+
+    Stored checksums describe the data at the time they were computed. Call
+    this function again after modifying `h5_dset`.
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset to hash. Its file must be writable
+    block_shape : tuple of int, optional
+        Shape of the hashed blocks. Default - the chunk shape of `h5_dset`
+    n_jobs : int, optional. Default = 1
+        Number of threads used for hashing
+
+    Returns
+    -------
+    h5_checksums : :class:`h5py.Dataset`
+        Side dataset holding the checksums
+    """
+    checksums, block_shape = compute_chunk_checksums(h5_dset,
+                                                     block_shape=block_shape,
+                                                     n_jobs=n_jobs)
+    h5_parent = h5_dset.parent
+    name = h5_dset.name.split('/')[-1] + _CHECKSUM_SUFFIX
+    if name in h5_parent:
+        del h5_parent[name]
+    h5_checksums = h5_parent.create_dataset(name, data=checksums)
+    h5_checksums.attrs['checksum_of'] = h5_dset.name.split('/')[-1]
+    h5_checksums.attrs['algorithm'] = CHECKSUM_ALGORITHM
+    h5_checksums.attrs['block_shape'] = np.array(block_shape, dtype=np.int64)
+    h5_dset.attrs['chunk_checksums'] = h5_checksums.ref
+    return h5_checksums
+
+
+def _find_checksum_dset(h5_dset):
+    h5_checksums = None
+    if 'chunk_checksums' in h5_dset.attrs:
+        ref = h5_dset.attrs['chunk_checksums']
+        if isinstance(ref, h5py.Reference) and ref:
+            h5_checksums = h5_dset.file[ref]
+    if h5_checksums is None:
+        name = h5_dset.name.split('/')[-1] + _CHECKSUM_SUFFIX
+        h5_checksums = h5_dset.parent.get(name)
+    if not isinstance(h5_checksums, h5py.Dataset):
+        return None
+    if h5_checksums.attrs.get('algorithm') != CHECKSUM_ALGORITHM:
+        return None
+    return h5_checksums
+
+
+def get_chunk_checksums(h5_dset):
+    """
+    Returns the checksums previously stored with :func:`write_chunk_checksums`
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset of interest
+
+    Returns
+    -------
+    checksums : numpy.ndarray or None
+        Stored checksums. None if no valid checksums were found
+    block_shape : tuple of int or None
+        Shape of the hashed blocks
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    h5_checksums = _find_checksum_dset(h5_dset)
+    if h5_checksums is None:
+        return None, None
+    block_shape = tuple(int(x) for x in h5_checksums.attrs['block_shape'])
+    grid = tuple(int(np.ceil(size / step)) for size, step
+                 in zip(h5_dset.shape, block_shape))
+    if h5_checksums.shape != grid + (_DIGEST_SIZE,):
+        return None, None
+    return h5_checksums[()], block_shape
+
+
+def _get_or_compute(h5_dset, block_shape, n_jobs, use_stored):
+    checksums, stored_shape = None, None
+    if use_stored:
+        checksums, stored_shape = get_chunk_checksums(h5_dset)
+    if checksums is not None and (block_shape is None or
+                                  stored_shape == tuple(block_shape)):
+        return checksums, stored_shape
+    return compute_chunk_checksums(h5_dset, block_shape=block_shape,
+                                   n_jobs=n_jobs)
+
+
+def diff_chunks(h5_dset_1, h5_dset_2, n_jobs=1, use_stored=True):
+    """
+    Lists the blocks whose contents differ between two datasets of the same
+    shape and dtype. Stored checksums are used where available and computed
+    on the fly otherwise.
+
+    Parameters
+    ----------
+    h5_dset_1 : :class:`h5py.Dataset`
+        First dataset
+    h5_dset_2 : :class:`h5py.Dataset`
+        Second dataset
+    n_jobs : int, optional. Default = 1
+        Number of threads used when checksums need to be computed
+    use_stored : bool, optional. Default = True
+        Whether or not stored checksums may be used. Set to False to re-hash
+        datasets that may have been modified since their checksums were
+        written
+
+    Returns
+    -------
+    blocks : list of tuple of slice
+        Slices selecting each block that differs
+    """
+    for param, param_name in zip([h5_dset_1, h5_dset_2],
+                                 ['h5_dset_1', 'h5_dset_2']):
+        if not isinstance(param, h5py.Dataset):
+            raise TypeError(param_name + ' should be a h5py.Dataset object')
+    if h5_dset_1.shape != h5_dset_2.shape:
+        raise ValueError('Datasets have different shapes: {} and {}'
+                         ''.format(h5_dset_1.shape, h5_dset_2.shape))
+    if h5_dset_1.dtype != h5_dset_2.dtype:
+        raise ValueError('Datasets have different dtypes: {} and {}'
+                         ''.format(h5_dset_1.dtype, h5_dset_2.dtype))
+
+    checksums_1, block_shape = _get_or_compute(h5_dset_1, None, n_jobs,
+                                               use_stored)
+    checksums_2, _ = _get_or_compute(h5_dset_2, block_shape, n_jobs,
+                                     use_stored)
+    mismatch = np.any(checksums_1 != checksums_2, axis=-1)
+    blocks = []
+    for index in zip(*np.nonzero(mismatch)):
+        blocks.append(tuple(slice(ind * step, min((ind + 1) * step, size))
+                            for ind, step, size in zip(index, block_shape,
+                                                       h5_dset_1.shape)))
+    return blocks
+
+
+def verify_chunk_checksums(h5_dset, n_jobs=1):
+    """
+    Re-hashes a dataset and compares the result against its stored checksums
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset with checksums written by :func:`write_chunk_checksums`
+    n_jobs : int, optional. Default = 1
+        Number of threads used for hashing
+
+    Returns
+    -------
+    blocks : list of tuple of slice
+        Slices selecting each block whose contents no longer match the stored
+        checksum. Empty if the dataset is intact
+    """
+    stored, block_shape = get_chunk_checksums(h5_dset)
+    if stored is None:
+        raise ValueError('{} does not have stored checksums'.format(h5_dset.name))
+    current, _ = compute_chunk_checksums(h5_dset, block_shape=block_shape,
+                                         n_jobs=n_jobs)
+    blocks = []
+    for index in zip(*np.nonzero(np.any(stored != current, axis=-1))):
+        blocks.append(tuple(slice(ind * step, min((ind + 1) * step, size))
+                            for ind, step, size in zip(index, block_shape,
+                                                       h5_dset.shape)))
+    return blocks
+
+
+def _verify_file(file_path):
+    report = dict()
+    with h5py.File(file_path, mode='r') as h5_file:
+        targets = []
+
+        def __collect(name, obj):
+            if isinstance(obj, h5py.Dataset) and \
+                    _find_checksum_dset(obj) is not None:
+                targets.append(name)
+
+        h5_file.visititems(__collect)
+        for name in targets:
+            report['/' + name] = verify_chunk_checksums(h5_file[name])
+    return file_path, report
+
+
+def verify_files(file_paths, n_jobs=-1):
+    """
+    Verifies all datasets carrying stored checksums in many files, one file
+    per worker process
+
+    Parameters
+    ----------
+    file_paths : str or list of str
+        Paths to the HDF5 files
+    n_jobs : int, optional. Default = -1 (all cores)
+        Number of worker processes
+
+    Returns
+    -------
+    report : dict
+        For each file path, a dictionary mapping the path of each dataset
+        with checksums to the list of corrupted blocks
+    """
+    if isinstance(file_paths, (str, unicode)):
+        file_paths = [file_paths]
+    if len(file_paths) < 2 or n_jobs == 1:
+        results = [_verify_file(path) for path in file_paths]
+    else:
+        # joblib is only needed here and would otherwise slow down imports
+        from joblib import Parallel, delayed
+        results = Parallel(n_jobs=n_jobs)(delayed(_verify_file)(path)
+                                          for path in file_paths)
+    return dict(results)
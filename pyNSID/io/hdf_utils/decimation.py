@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-resolution minimum / maximum summaries of long one dimensional datasets
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+
+import h5py
+import numpy as np
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['compute_minmax', 'compute_minmax_levels', 'write_minmax_pyramid',
+           'get_minmax_pyramid']
+
+_MINMAX_SUFFIX = '_minmax'
+
+
+def _validate_curve(h5_dset):
+    if len(h5_dset.shape) != 1:
+        raise ValueError('Min / max summaries are only available for one '
+                         'dimensional datasets')
+    if np.iscomplexobj(h5_dset):
+        raise TypeError('Summarize a real valued component of complex '
+                        'datasets, see pyNSID.io.derived.ComponentView')
+
+
+def _reduce(minmax, factor):
+    starts = np.arange(0, len(minmax), factor)
+    return np.stack([np.fmin.reduceat(minmax[:, 0], starts),
+                     np.fmax.reduceat(minmax[:, 1], starts)], axis=1)
+
+
+def compute_minmax(h5_dset, bucket, start=0, stop=None, max_mem_mb=64):
+    """
+    Computes the minimum and maximum of consecutive buckets of samples of a
+    one dimensional dataset in a single streaming pass. NaNs are ignored.
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset or array-like
+        One dimensional dataset with real values
+    bucket : int
+        Number of samples per bucket. The last bucket may hold fewer
+    start : int, optional. Default = 0
+        First sample
+    stop : int, optional. Default = length of the dataset
+        Sample at which to stop
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+
+    Returns
+    -------
+    minmax : numpy.ndarray
+        Minimum and maximum of each bucket, of shape (buckets, 2)
+    """
+    _validate_curve(h5_dset)
+    bucket = int(bucket)
+    if bucket < 1:
+        raise ValueError('bucket should be a positive integer')
+    start, stop, _ = slice(start, stop).indices(h5_dset.shape[0])
+    num_buckets = max(0, -(-(stop - start) // bucket))
+    minmax = np.empty((num_buckets, 2), dtype=np.float64)
+    itemsize = np.dtype(h5_dset.dtype).itemsize
+    # Blocks hold whole buckets
+    block = max(1, int(max_mem_mb * 1024 ** 2) // itemsize // bucket) * bucket
+    for block_start in range(start, stop, block):
+        data = np.asarray(h5_dset[block_start:min(stop, block_start + block)],
+                          dtype=np.float64)
+        starts = np.arange(0, len(data), bucket)
+        first = (block_start - start) // bucket
+        minmax[first:first + len(starts), 0] = np.fmin.reduceat(data, starts)
+        minmax[first:first + len(starts), 1] = np.fmax.reduceat(data, starts)
+    return minmax
+
+
+def compute_minmax_levels(h5_dset, base=64, factor=8, min_buckets=2048,
+                          max_mem_mb=64):
+    """
+    Computes min / max summaries of a one dimensional dataset at increasingly
+    coarse resolutions in a single streaming pass over the dataset. Each
+    level combines `factor` buckets of the previous level, until a level has
+    at most `min_buckets` buckets.
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset or array-like
+        One dimensional dataset with real values
+    base : int, optional. Default = 64
+        Number of samples per bucket of the finest level
+    factor : int, optional. Default = 8
+        Ratio between the bucket sizes of consecutive levels
+    min_buckets : int, optional. Default = 2048
+        Number of buckets below which no coarser levels are computed
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+
+    Returns
+    -------
+    levels : list of (int, numpy.ndarray)
+        Samples per bucket and min / max of each bucket, by increasing
+        bucket size
+    """
+    if int(factor) < 2:
+        raise ValueError('factor should be an integer larger than 1')
+    bucket = int(base)
+    level = compute_minmax(h5_dset, bucket, max_mem_mb=max_mem_mb)
+    levels = [(bucket, level)]
+    while len(level) > int(min_buckets):
+        level = _reduce(level, int(factor))
+        bucket *= int(factor)
+        levels.append((bucket, level))
+    return levels
+
+
+def write_minmax_pyramid(h5_dset, base=64, factor=8, min_buckets=2048,
+                         max_mem_mb=64):
+    """
+    Computes the levels of :func:`compute_minmax_levels` and stores them in a
+    group named '<dataset name>_minmax' next to `h5_dset`. An object
+    reference to the group is written to the 'minmax_pyramid' attribute of
+    `h5_dset`. Existing summaries are overwritten.
+
+    Notes
+    -----
+    Levels are datasets named 'level_<bucket>' of shape (buckets, 2) that
+    hold the minimum and maximum of each bucket. Stored summaries describe
+    the data at the time they were computed. Call this function again after
+    modifying `h5_dset`.
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        One dimensional dataset with real values. Its file must be writable
+    base, factor, min_buckets, max_mem_mb :
+        See :func:`compute_minmax_levels`
+
+    Returns
+    -------
+    h5_pyramid : :class:`h5py.Group`
+        Group holding the levels
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    levels = compute_minmax_levels(h5_dset, base=base, factor=factor,
+                                   min_buckets=min_buckets,
+                                   max_mem_mb=max_mem_mb)
+    h5_parent = h5_dset.parent
+    name = h5_dset.name.split('/')[-1] + _MINMAX_SUFFIX
+    if name in h5_parent:
+        del h5_parent[name]
+    h5_pyramid = h5_parent.create_group(name)
+    for bucket, level in levels:
+        h5_level = h5_pyramid.create_dataset('level_{}'.format(bucket),
+                                             data=level)
+        h5_level.attrs['bucket'] = bucket
+    h5_pyramid.attrs['minmax_of'] = h5_dset.name.split('/')[-1]
+    h5_dset.attrs['minmax_pyramid'] = h5_pyramid.ref
+    return h5_pyramid
+
+
+def get_minmax_pyramid(h5_dset):
+    """
+    Returns the levels previously stored with :func:`write_minmax_pyramid`
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset of interest
+
+    Returns
+    -------
+    levels : list of (int, :class:`h5py.Dataset`)
+        Samples per bucket and dataset of each level, by increasing bucket
+        size. Empty if no valid summary was found
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    h5_pyramid = None
+    if 'minmax_pyramid' in h5_dset.attrs:
+        ref = h5_dset.attrs['minmax_pyramid']
+        if isinstance(ref, h5py.Reference) and ref:
+            h5_pyramid = h5_dset.file[ref]
+    if h5_pyramid is None:
+        h5_pyramid = h5_dset.parent.get(h5_dset.name.split('/')[-1] +
+                                        _MINMAX_SUFFIX)
+    if not isinstance(h5_pyramid, h5py.Group) or len(h5_dset.shape) != 1:
+        return []
+    levels = []
+    for h5_level in h5_pyramid.values():
+        if not isinstance(h5_level, h5py.Dataset) or \
+                'bucket' not in h5_level.attrs:
+            continue
+        bucket = int(h5_level.attrs['bucket'])
+        if h5_level.shape != (-(-h5_dset.shape[0] // bucket), 2):
+            return []
+        levels.append((bucket, h5_level))
+    return sorted(levels, key=lambda level: level[0])
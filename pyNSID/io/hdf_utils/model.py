@@ -24,6 +24,8 @@ from sidpy.hdf.hdf_utils import lazy_load_array, get_attr, write_simple_attrs, \
 from sidpy.sid import Dimension
 
 from .simple import link_as_main, check_if_main, validate_dims_against_main, validate_anc_h5_dsets, copy_dataset
+from .checksum import write_chunk_checksums
+from .attributes import write_attributes
 from ..dimension import validate_dimensions
 
 if sys.version_info.major == 3:
@@ -33,7 +35,7 @@ if sys.version_info.major == 3:
 def write_main_dataset(h5_parent_group, main_data, main_data_name, 
                         quantity, units, data_type, modality, source, 
                         dim_dict, main_dset_attrs=None, verbose=False,
-                        slow_to_fast=False, **kwargs):
+                        slow_to_fast=False, chunk_checksums=False, **kwargs):
 
     """
 
@@ -69,6 +71,9 @@ def write_main_dataset(h5_parent_group, main_data, main_data_name,
         flat dictionary of data to be added to the dataset, 
     verbose : bool, Optional, default=False
         If set to true - prints debugging logs
+    chunk_checksums : bool, Optional, default=False
+        If set to true - per-chunk checksums of the written data are stored
+        alongside the main dataset. See :func:`write_chunk_checksums`
     kwargs will be passed onto the creation of the dataset. Please pass chunking, compression, dtype, and other
         arguments this way
 
@@ -165,9 +170,9 @@ def write_main_dataset(h5_parent_group, main_data, main_data_name,
             print('Created empty dataset: {} for writing Dask dataset: {}'.format(h5_main, main_data))
             print('Dask array will be written to HDF5 dataset: "{}" in file: "{}"'.format(h5_main.name,
                                                                                           h5_main.file.filename))
-        # Step 2 - now ask Dask to dump data to disk
-        da.to_hdf5(h5_main.file.filename, {h5_main.name: main_data})
-        # main_data.to_hdf5(h5_main.file.filename, h5_main.name)  # Does not work with python 2 for some reason
+        # Step 2 - now ask Dask to write the data through the handle that is already open,
+        # rather than opening the file a second time by its name
+        da.store(main_data, h5_main, lock=True)
     else:
         # Case 3 - large empty dataset
         h5_main = h5_parent_group.create_dataset(main_data_name, main_data, **kwargs)
@@ -187,7 +192,7 @@ def write_main_dataset(h5_parent_group, main_data, main_data_name,
         elif isinstance(this_dim, Dimension):
             this_dim_dset = h5_parent_group.create_dataset(this_dim.name,data=this_dim.values)
             attrs_to_write={'name':  this_dim.name, 'units': this_dim.units, 'quantity':  this_dim.quantity, 'dimension_type': this_dim.dimension_type, 'nsid_version' : '0.0.1'}
-            write_simple_attrs(this_dim_dset, attrs_to_write)
+            write_attributes(this_dim_dset, attrs_to_write)
 
         else:
             print(i,' not a good dimension')
@@ -202,16 +207,20 @@ def write_main_dataset(h5_parent_group, main_data, main_data_name,
     attrs_to_write['modality'] =  modality
     attrs_to_write['source'] =  source
     
-    write_simple_attrs(h5_main, attrs_to_write)
+    if isinstance(main_dset_attrs, dict):
+        # Written in the same batch, overriding defaults as before
+        attrs_to_write.update(main_dset_attrs)
+        if verbose:
+            print('Added provided attributes to those of main dataset')
+    write_attributes(h5_main, attrs_to_write)
 
-    
     if verbose:
         print('Wrote dimensions and attributes to main dataset')
 
-    if isinstance(main_dset_attrs, dict):
-        write_simple_attrs(h5_main, main_dset_attrs)
+    if chunk_checksums and not isinstance(main_data, (list, tuple)):
+        write_chunk_checksums(h5_main)
         if verbose:
-            print('Wrote provided attributes to main dataset')
+            print('Wrote chunk checksums of main dataset')
 
     #ToDo: check if we need  write_book_keeping_attrs(h5_main)
     NSID_data_main = link_as_main(h5_main, dimensional_dict)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Intensity profiles along lines through images, read chunk by chunk
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+
+import h5py
+import numpy as np
+
+from sidpy.base.num_utils import contains_integers
+from sidpy.hdf.hdf_utils import get_attr
+from sidpy.sid import Dimension
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['get_line_profile']
+
+# Grid used to split reads of datasets that are not chunked
+_CONTIGUOUS_TILE = 256
+
+
+def _get_scales(h5_dset, spatial_dims):
+    # Dimension scales, units and quantities, or pixels if there are no scales.
+    # Views such as ComponentView forward dims to their dataset
+    dims = getattr(h5_dset, 'dims', None)
+    scales = []
+    units = []
+    quantities = []
+    for dim in spatial_dims:
+        scale, unit, quantity = None, 'pixels', 'distance'
+        if dims is not None and len(dims[dim]) > 0:
+            h5_scale = dims[dim][0]
+            if isinstance(h5_scale, h5py.Dataset) and \
+                    h5_scale.shape == (h5_dset.shape[dim],):
+                scale = np.asarray(h5_scale[()], dtype=np.float64)
+                if 'units' in h5_scale.attrs:
+                    unit = get_attr(h5_scale, 'units')
+                if 'quantity' in h5_scale.attrs:
+                    quantity = get_attr(h5_scale, 'quantity')
+        if scale is None:
+            scale = np.arange(h5_dset.shape[dim], dtype=np.float64)
+        scales.append(scale)
+        units.append(unit)
+        quantities.append(quantity)
+    return scales, units, quantities
+
+
+def _to_pixels(values, scale):
+    # Fractional pixel indices of physical coordinates along a monotonic scale
+    pixels = np.arange(len(scale), dtype=np.float64)
+    if len(scale) > 1 and scale[-1] < scale[0]:
+        scale, pixels = scale[::-1], pixels[::-1]
+    inside = (values >= min(scale[0], scale[-1])) & \
+        (values <= max(scale[0], scale[-1]))
+    return np.interp(values, scale, pixels), inside
+
+
+def _read_pixels(h5_dset, spatial_dims, indices, pixels):
+    # Values at integer pixels (N x 2), reading only the chunks that hold them
+    chunk_shape = []
+    for dim in spatial_dims:
+        chunks = getattr(h5_dset, 'chunks', None)
+        chunk_shape.append(chunks[dim] if chunks else _CONTIGUOUS_TILE)
+    chunk_shape = np.array(chunk_shape)
+    selection = [0] * len(h5_dset.shape)
+    for dim, index in (indices or {}).items():
+        selection[dim] = index
+    transpose = spatial_dims[0] > spatial_dims[1]
+
+    chunk_ids = pixels // chunk_shape
+    values = None
+    crossed = np.unique(chunk_ids, axis=0)
+    for chunk_id in crossed:
+        start = chunk_id * chunk_shape
+        stop = [min(begin + size, h5_dset.shape[dim]) for begin, size, dim
+                in zip(start, chunk_shape, spatial_dims)]
+        for dim, begin, end in zip(spatial_dims, start, stop):
+            selection[dim] = slice(int(begin), int(end))
+        block = np.asarray(h5_dset[tuple(selection)])
+        if transpose:
+            block = block.T
+        if values is None:
+            values = np.empty(len(pixels), dtype=block.dtype)
+        mask = np.all(chunk_ids == chunk_id, axis=1)
+        local = pixels[mask] - start
+        values[mask] = block[local[:, 0], local[:, 1]]
+    return values, [tuple(int(item) for item in chunk_id)
+                    for chunk_id in crossed]
+
+
+def get_line_profile(h5_dset, points, spatial_dims, width=1, num_samples=None,
+                     indices=None, return_chunks=False):
+    """
+    Samples an image along a line or polyline given in physical coordinates.
+    Only the chunks of the dataset that the samples fall into are read.
+    Values between pixels are interpolated bilinearly.
+
+    Coordinates are converted to pixels with the dimension scales attached to
+    `h5_dset`. Datasets without dimension scales are sampled in pixels.
+
+    Notes
+    -----
+    Samples are spaced evenly along the path, by about one pixel unless
+    `num_samples` is given. With a `width` of more than one pixel, each
+    sample is the mean of `width` samples spaced one pixel apart across the
+    path. Samples outside the image are NaN and are left out of the mean.
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset, pyNSID.NSIDataset or array-like
+        Image or dataset with at least two dimensions
+    points : array-like
+        Vertices of the path as [[x0, y0], [x1, y1], ...], where x and y are
+        coordinates along the first and second spatial dimension
+    spatial_dims : list of int
+        Indices of the two spatial dimensions
+    width : int, optional. Default = 1
+        Width of the profile in pixels
+    num_samples : int, optional
+        Number of samples along the path
+    indices : dict, optional
+        Index at which each of the other dimensions is held, by dimension.
+        Default - index 0
+    return_chunks : bool, optional. Default = False
+        Whether or not to also return the chunks that were read
+
+    Returns
+    -------
+    profile : numpy.ndarray
+        1D array of values along the path
+    distance : sidpy.sid.Dimension
+        Distance of each sample from the first vertex along the path
+    chunks : list of tuple of int
+        Only if `return_chunks` - chunk indices along the spatial dimensions
+        of the chunks that were read
+    """
+    spatial_dims = list(spatial_dims)
+    if len(spatial_dims) != 2 or not contains_integers(spatial_dims, min_val=0) \
+            or max(spatial_dims) >= len(h5_dset.shape) or \
+            spatial_dims[0] == spatial_dims[1]:
+        raise ValueError('spatial_dims should be two distinct dimensions of '
+                         'h5_dset')
+    spatial_dims = [int(dim) for dim in spatial_dims]
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 2:
+        raise ValueError('points should hold at least two vertices as '
+                         '[[x0, y0], [x1, y1], ...]')
+    if int(width) < 1:
+        raise ValueError('width should be a positive integer')
+    width = int(width)
+    shape = [h5_dset.shape[dim] for dim in spatial_dims]
+    scales, units, quantities = _get_scales(h5_dset, spatial_dims)
+
+    # Distance along the path is measured in physical units
+    lengths = np.sqrt(np.sum(np.diff(points, axis=0) ** 2, axis=1))
+    cumulative = np.concatenate([[0], np.cumsum(lengths)])
+    vertex_pixels = np.stack([_to_pixels(points[:, axis], scales[axis])[0]
+                              for axis in range(2)], axis=1)
+    if num_samples is None:
+        pixel_length = np.sum(np.sqrt(np.sum(np.diff(vertex_pixels, axis=0) ** 2,
+                                             axis=1)))
+        num_samples = int(np.ceil(pixel_length)) + 1
+    num_samples = max(2, int(num_samples))
+    distance = np.linspace(0, cumulative[-1], num_samples)
+
+    samples = np.stack([np.interp(distance, cumulative, points[:, axis])
+                        for axis in range(2)], axis=1)
+    pixels = []
+    inside = np.ones(num_samples, dtype=bool)
+    for axis in range(2):
+        axis_pixels, axis_inside = _to_pixels(samples[:, axis], scales[axis])
+        pixels.append(axis_pixels)
+        inside &= axis_inside
+    pixels = np.stack(pixels, axis=1)
+
+    # Unit normals of the segment holding each sample, in pixels
+    segment = np.clip(np.searchsorted(cumulative, distance, side='right') - 1,
+                      0, len(points) - 2)
+    direction = np.diff(vertex_pixels, axis=0)[segment]
+    norm = np.sqrt(np.sum(direction ** 2, axis=1, keepdims=True))
+    direction = direction / np.where(norm > 0, norm, 1)
+    normal = np.stack([-direction[:, 1], direction[:, 0]], axis=1)
+    offsets = np.arange(width) - (width - 1) / 2.
+    # samples x width x 2
+    positions = pixels[:, None, :] + offsets[None, :, None] * normal[:, None, :]
+    valid = inside[:, None] & np.all((positions >= -0.5) &
+                                     (positions <= np.array(shape) - 0.5),
+                                     axis=2)
+
+    # Corners of the pixels around each position
+    limits = np.array([max(0, size - 2) for size in shape])
+    corner = np.clip(np.floor(positions), 0, limits).astype(np.int64)
+    fraction = np.clip(positions - corner, 0, 1)
+    for axis, size in enumerate(shape):
+        if size == 1:
+            fraction[..., axis] = 0
+    steps = np.array([[0, 0], [1, 0], [0, 1], [1, 1]])
+    neighbours = np.minimum(corner[..., None, :] + steps,
+                            np.array(shape) - 1)[valid]
+    weights = np.stack([(1 - fraction[..., 0]) * (1 - fraction[..., 1]),
+                        fraction[..., 0] * (1 - fraction[..., 1]),
+                        (1 - fraction[..., 0]) * fraction[..., 1],
+                        fraction[..., 0] * fraction[..., 1]], axis=-1)[valid]
+
+    chunks = []
+    dtype = np.result_type(np.dtype(h5_dset.dtype), np.float64)
+    values = np.full(valid.shape, np.nan, dtype=dtype)
+    if neighbours.size > 0:
+        unique, inverse = np.unique(neighbours.reshape(-1, 2), axis=0,
+                                    return_inverse=True)
+        pixel_values, chunks = _read_pixels(h5_dset, spatial_dims, indices,
+                                            unique)
+        corner_values = pixel_values[inverse.ravel()].reshape(-1, 4)
+        values[valid] = np.sum(corner_values * weights, axis=1)
+    with np.errstate(invalid='ignore'):
+        counts = valid.sum(axis=1)
+        profile = np.where(counts > 0,
+                           np.nansum(values, axis=1) / np.maximum(counts, 1),
+                           np.nan)
+
+    distance = Dimension(distance, name='distance', quantity=quantities[0],
+                         units=units[0], dimension_type='spatial')
+    if return_chunks:
+        return profile, distance, chunks
+    return profile, distance
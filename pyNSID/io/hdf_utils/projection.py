@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming reductions of datasets along one dimension, stored next to them
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import h5py
+import numpy as np
+
+from .base import get_block_shape, iter_block_slices
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['compute_projection', 'get_projection', 'clear_projection_cache']
+
+_PROJECTION_SUFFIX = '_projection'
+_REDUCTIONS = ['sum', 'mean']
+
+# Projections that are not stored in the file of their dataset
+_MEMORY_CACHE = OrderedDict()
+_MEMORY_CACHE_SIZE = 16
+_MEMORY_CACHE_LOCK = threading.Lock()
+
+
+def _validate(shape, dim, start, stop, reduction):
+    if reduction not in _REDUCTIONS:
+        raise ValueError('reduction should be one of {}'.format(_REDUCTIONS))
+    dim = int(dim)
+    if not 0 <= dim < len(shape):
+        raise ValueError('dim should be between 0 and {}'.format(len(shape) - 1))
+    start, stop, _ = slice(start, stop).indices(shape[dim])
+    if stop <= start:
+        raise ValueError('The range of indices along dimension {} is empty'
+                         ''.format(dim))
+    return dim, start, stop
+
+
+def compute_projection(h5_dset, dim, start=0, stop=None, reduction='mean',
+                       max_mem_mb=64, callback=None, cancel=None):
+    """
+    Sums or averages a dataset along one dimension while holding at most a
+    block of about `max_mem_mb` in memory. Blocks are aligned with the chunks
+    of the dataset so that each chunk is decompressed once.
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset or numpy.ndarray
+        Dataset to reduce
+    dim : int
+        Index of the dimension to reduce
+    start : int, optional. Default = 0
+        First index along `dim` to include
+    stop : int, optional. Default = size of `dim`
+        Index along `dim` at which to stop
+    reduction : str, optional. Default = 'mean'
+        'sum' or 'mean'
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+    callback : callable, optional
+        Called with the fraction of the data processed after each block
+    cancel : threading.Event, optional
+        Stops the computation when set
+
+    Returns
+    -------
+    projection : numpy.ndarray or None
+        Array with the shape of `h5_dset` without `dim`, in float64 or
+        complex128 precision. None if the computation was cancelled
+    """
+    shape = tuple(h5_dset.shape)
+    dim, start, stop = _validate(shape, dim, start, stop, reduction)
+    acc_dtype = np.complex128 if np.dtype(h5_dset.dtype).kind == 'c' \
+        else np.float64
+    projection = np.zeros(shape[:dim] + shape[dim + 1:], dtype=acc_dtype)
+
+    block_shape = get_block_shape(shape, np.dtype(h5_dset.dtype).itemsize,
+                                  int(max_mem_mb * 1024 ** 2),
+                                  chunks=getattr(h5_dset, 'chunks', None))
+    blocks = []
+    for block in iter_block_slices(shape, block_shape):
+        lower = max(block[dim].start, start)
+        upper = min(block[dim].stop, stop)
+        if lower < upper:
+            blocks.append(block[:dim] + (slice(lower, upper),) + block[dim + 1:])
+
+    for index, block in enumerate(blocks):
+        if cancel is not None and cancel.is_set():
+            return None
+        data = np.asarray(h5_dset[block])
+        projection[block[:dim] + block[dim + 1:]] += data.sum(axis=dim,
+                                                              dtype=acc_dtype)
+        if callback is not None:
+            callback((index + 1) / len(blocks))
+
+    if reduction == 'mean':
+        projection /= stop - start
+    return projection
+
+
+def _projection_name(h5_dset, dim, start, stop, reduction):
+    return '{}{}_{}_dim_{}_{}_{}'.format(h5_dset.name.split('/')[-1],
+                                       _PROJECTION_SUFFIX, reduction, dim,
+                                       start, stop)
+
+
+def _memory_key(h5_dset, name):
+    return os.path.abspath(h5_dset.file.filename), h5_dset.parent.name, name
+
+
+def clear_projection_cache():
+    """
+    Forgets the projections kept in memory
+    """
+    with _MEMORY_CACHE_LOCK:
+        _MEMORY_CACHE.clear()
+
+
+def get_projection(h5_dset, dim, start=0, stop=None, reduction='mean',
+                   persist=False, recompute=False, max_mem_mb=64,
+                   callback=None, cancel=None):
+    """
+    Returns the sum or average of a dataset along one dimension, computing it
+    with :func:`compute_projection` only if it was not computed before.
+
+    Projections are kept in memory for the lifetime of the interpreter. With
+    `persist`, they are instead stored as datasets next to `h5_dset`, named
+    after it, the reduction, the dimension and the range of indices, unless
+    the file was opened as read-only. Projections stored earlier are always
+    read back.
+
+    Notes
+    -----
+    Stored projections are not updated when `h5_dset` is modified. Use
+    `recompute` to refresh them.
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset
+        Dataset to reduce
+    dim : int
+        Index of the dimension to reduce
+    start : int, optional. Default = 0
+        First index along `dim` to include
+    stop : int, optional. Default = size of `dim`
+        Index along `dim` at which to stop
+    reduction : str, optional. Default = 'mean'
+        'sum' or 'mean'
+    persist : bool, optional. Default = False
+        Whether or not to write the projection to the file of `h5_dset`
+    recompute : bool, optional. Default = False
+        Whether or not to ignore and replace a stored projection
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+    callback : callable, optional
+        Called with the fraction of the data processed after each block
+    cancel : threading.Event, optional
+        Stops the computation when set
+
+    Returns
+    -------
+    projection : numpy.ndarray or None
+        Array with the shape of `h5_dset` without `dim`. None if the
+        computation was cancelled
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    dim, start, stop = _validate(h5_dset.shape, dim, start, stop, reduction)
+    name = _projection_name(h5_dset, dim, start, stop, reduction)
+    h5_parent = h5_dset.parent
+    key = _memory_key(h5_dset, name)
+
+    if not recompute:
+        h5_stored = h5_parent.get(name)
+        if isinstance(h5_stored, h5py.Dataset):
+            return h5_stored[()]
+        with _MEMORY_CACHE_LOCK:
+            if key in _MEMORY_CACHE:
+                _MEMORY_CACHE.move_to_end(key)
+                return _MEMORY_CACHE[key]
+
+    projection = compute_projection(h5_dset, dim, start=start, stop=stop,
+                                    reduction=reduction, max_mem_mb=max_mem_mb,
+                                    callback=callback, cancel=cancel)
+    if projection is None:
+        return projection
+
+    if persist and h5_dset.file.mode == 'r+':
+        if name in h5_parent:
+            del h5_parent[name]
+        h5_stored = h5_parent.create_dataset(name, data=projection)
+        h5_stored.attrs['projection_of'] = h5_dset.name.split('/')[-1]
+        h5_stored.attrs['reduction'] = reduction
+        h5_stored.attrs['dimension'] = dim
+        h5_stored.attrs['index_range'] = np.array([start, stop], dtype=np.int64)
+    else:
+        with _MEMORY_CACHE_LOCK:
+            _MEMORY_CACHE[key] = projection
+            _MEMORY_CACHE.move_to_end(key)
+            while len(_MEMORY_CACHE) > _MEMORY_CACHE_SIZE:
+                _MEMORY_CACHE.popitem(last=False)
+    return projection
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-resolution pyramids of images and volumes for fast display of large
+images and volumes
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+
+import h5py
+import numpy as np
+
+from sidpy.base.num_utils import contains_integers
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['write_image_pyramid', 'get_image_pyramid', 'write_volume_pyramid',
+           'get_volume_pyramid']
+
+_PYRAMID_SUFFIX = '_pyramid'
+_VOLUME_PYRAMID_SUFFIX = '_volume_pyramid'
+
+
+def _validate_dims(h5_dset, spatial_dims, num_dims=2):
+    spatial_dims = list(spatial_dims)
+    if len(spatial_dims) != num_dims or \
+            not contains_integers(spatial_dims, min_val=0) or \
+            max(spatial_dims) >= len(h5_dset.shape) or \
+            len(set(spatial_dims)) != num_dims:
+        raise ValueError('spatial_dims should be {} distinct dimensions of '
+                         'h5_dset'.format(num_dims))
+    return sorted(int(dim) for dim in spatial_dims)
+
+
+def _downsample(block):
+    # Mean over 2 x 2 blocks. A trailing odd row or column is dropped
+    rows, cols = block.shape[0] // 2 * 2, block.shape[1] // 2 * 2
+    block = block[:rows, :cols]
+    return (block[0::2, 0::2] + block[1::2, 0::2] + block[0::2, 1::2] +
+            block[1::2, 1::2]) / 4
+
+
+def _downsample_volume(block):
+    # Mean over 2 x 2 x 2 blocks. Trailing odd planes, rows or columns are
+    # dropped
+    block = block[tuple(slice(0, size // 2 * 2) for size in block.shape)]
+    shape = []
+    for size in block.shape:
+        shape += [size // 2, 2]
+    return block.reshape(shape).mean(axis=(1, 3, 5))
+
+
+def _read_image_rows(h5_source, spatial_dims, start, stop):
+    if h5_source.ndim == 2:
+        return np.asarray(h5_source[start:stop])
+    # Dimensions other than the spatial dimensions are held at index 0
+    selection = [0] * h5_source.ndim
+    selection[spatial_dims[0]] = slice(start, stop)
+    selection[spatial_dims[1]] = slice(None)
+    return np.asarray(h5_source[tuple(selection)])
+
+
+def _read_volume_planes(h5_source, spatial_dims, start, stop):
+    # Dimensions other than the spatial dimensions are held at index 0
+    selection = [0] * h5_source.ndim
+    for dim in spatial_dims:
+        selection[dim] = slice(None)
+    selection[spatial_dims[0]] = slice(start, stop)
+    return np.asarray(h5_source[tuple(selection)])
+
+
+def _get_pyramid_group(h5_dset, attr_name, suffix):
+    h5_pyramid = None
+    if attr_name in h5_dset.attrs:
+        ref = h5_dset.attrs[attr_name]
+        if isinstance(ref, h5py.Reference) and ref:
+            h5_pyramid = h5_dset.file[ref]
+    if h5_pyramid is None:
+        h5_pyramid = h5_dset.parent.get(h5_dset.name.split('/')[-1] + suffix)
+    return h5_pyramid
+
+
+def _get_levels(h5_dset, h5_pyramid, spatial_dims):
+    if not isinstance(h5_pyramid, h5py.Group) or \
+            'spatial_dims' not in h5_pyramid.attrs:
+        return []
+    stored_dims = [int(dim) for dim in h5_pyramid.attrs['spatial_dims']]
+    if spatial_dims is not None and sorted(spatial_dims) != stored_dims:
+        return []
+    levels = []
+    for h5_level in h5_pyramid.values():
+        if not isinstance(h5_level, h5py.Dataset) or \
+                'factor' not in h5_level.attrs:
+            continue
+        factor = int(h5_level.attrs['factor'])
+        expected = tuple(h5_dset.shape[dim] // factor for dim in stored_dims)
+        if h5_level.shape != expected:
+            return []
+        levels.append((factor, h5_level))
+    return sorted(levels, key=lambda level: level[0])
+
+
+def write_image_pyramid(h5_dset, spatial_dims, min_size=256, max_mem_mb=64):
+    """
+    Builds a multi-resolution pyramid of an image without loading it into
+    memory and stores it in a group named '<dataset name>_pyramid' next to
+    it. Each level averages 2 x 2 pixels of the previous level until the
+    largest side of the image is at most `min_size`. An object reference to
+    the group is written to the 'image_pyramid' attribute of `h5_dset`.
+    Existing pyramids are overwritten.
+
+    Notes
+    -----
+    Levels are two dimensional datasets named 'level_<factor>', where factor
+    is the number of pixels of the original image along each side of a pixel
+    of the level. The spatial dimensions are stored in ascending order.
+    Dimensions other than the spatial dimensions are held at index 0. A
+    trailing odd row or column is dropped from each level. Stored pyramids
+    describe the data at the time they were computed. Call this function
+    again after modifying `h5_dset`.
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Image or stack of images. Its file must be writable
+    spatial_dims : list of int
+        Indices of the two spatial dimensions
+    min_size : int, optional. Default = 256
+        Size below which no further levels are built
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+
+    Returns
+    -------
+    h5_pyramid : :class:`h5py.Group`
+        Group holding the levels of the pyramid
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    spatial_dims = _validate_dims(h5_dset, spatial_dims)
+    dtype = np.complex128 if h5_dset.dtype.kind == 'c' else np.float64
+
+    h5_parent = h5_dset.parent
+    name = h5_dset.name.split('/')[-1] + _PYRAMID_SUFFIX
+    if name in h5_parent:
+        del h5_parent[name]
+    h5_pyramid = h5_parent.create_group(name)
+
+    h5_source = h5_dset
+    shape = [h5_dset.shape[dim] for dim in spatial_dims]
+    factor = 1
+    while max(shape) > min_size and min(shape) >= 2:
+        factor *= 2
+        shape = [size // 2 for size in shape]
+        source_dims = spatial_dims if h5_source is h5_dset else [0, 1]
+        source_cols = h5_source.shape[source_dims[1]]
+        # Blocks hold an even number of rows of the source
+        row_bytes = source_cols * np.dtype(dtype).itemsize
+        rows = max(2, int(max_mem_mb * 1024 ** 2) // row_bytes // 2 * 2)
+        h5_level = h5_pyramid.create_dataset('level_{}'.format(factor),
+                                             shape=tuple(shape), dtype=dtype,
+                                             chunks=True)
+        h5_level.attrs['factor'] = factor
+        for start in range(0, shape[0] * 2, rows):
+            stop = min(shape[0] * 2, start + rows)
+            block = _read_image_rows(h5_source, source_dims, start, stop)
+            h5_level[start // 2: stop // 2] = _downsample(block.astype(dtype))
+        h5_source = h5_level
+
+    h5_pyramid.attrs['pyramid_of'] = h5_dset.name.split('/')[-1]
+    h5_pyramid.attrs['spatial_dims'] = np.array(spatial_dims, dtype=np.int64)
+    h5_dset.attrs['image_pyramid'] = h5_pyramid.ref
+    return h5_pyramid
+
+
+def get_image_pyramid(h5_dset, spatial_dims=None):
+    """
+    Returns the levels of the pyramid previously stored with
+    :func:`write_image_pyramid`
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset of interest
+    spatial_dims : list of int, optional
+        Spatial dimensions the pyramid should have been built for, in any
+        order
+
+    Returns
+    -------
+    levels : list of (int, :class:`h5py.Dataset`)
+        Downsampling factor and dataset of each level, by increasing factor.
+        Empty if no valid pyramid was found
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    h5_pyramid = _get_pyramid_group(h5_dset, 'image_pyramid', _PYRAMID_SUFFIX)
+    return _get_levels(h5_dset, h5_pyramid, spatial_dims)
+
+
+def write_volume_pyramid(h5_dset, spatial_dims, min_size=128, max_mem_mb=64):
+    """
+    Builds a multi-resolution pyramid of a volume without loading it into
+    memory and stores it in a group named '<dataset name>_volume_pyramid'
+    next to it. Each level averages 2 x 2 x 2 voxels of the previous level
+    until the largest side of the volume is at most `min_size`. An object
+    reference to the group is written to the 'volume_pyramid' attribute of
+    `h5_dset`. Existing pyramids are overwritten.
+
+    Notes
+    -----
+    Levels are three dimensional datasets named 'level_<factor>', where
+    factor is the number of voxels of the original volume along each side of
+    a voxel of the level. The spatial dimensions are stored in ascending
+    order. Dimensions other than the spatial dimensions are held at index 0.
+    Trailing odd planes, rows and columns are dropped from each level.
+    Stored pyramids describe the data at the time they were computed. Call
+    this function again after modifying `h5_dset`.
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Volume with at least three dimensions. Its file must be writable
+    spatial_dims : list of int
+        Indices of the three spatial dimensions
+    min_size : int, optional. Default = 128
+        Size below which no further levels are built
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB. At least two planes
+        are read at a time
+
+    Returns
+    -------
+    h5_pyramid : :class:`h5py.Group`
+        Group holding the levels of the pyramid
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    spatial_dims = _validate_dims(h5_dset, spatial_dims, num_dims=3)
+    dtype = np.complex128 if h5_dset.dtype.kind == 'c' else np.float64
+
+    h5_parent = h5_dset.parent
+    name = h5_dset.name.split('/')[-1] + _VOLUME_PYRAMID_SUFFIX
+    if name in h5_parent:
+        del h5_parent[name]
+    h5_pyramid = h5_parent.create_group(name)
+
+    h5_source = h5_dset
+    shape = [h5_dset.shape[dim] for dim in spatial_dims]
+    factor = 1
+    while max(shape) > min_size and min(shape) >= 2:
+        factor *= 2
+        shape = [size // 2 for size in shape]
+        source_dims = spatial_dims if h5_source is h5_dset else [0, 1, 2]
+        # Blocks hold an even number of planes of the source
+        plane_bytes = h5_source.shape[source_dims[1]] * \
+            h5_source.shape[source_dims[2]] * np.dtype(dtype).itemsize
+        planes = max(2, int(max_mem_mb * 1024 ** 2) // plane_bytes // 2 * 2)
+        h5_level = h5_pyramid.create_dataset('level_{}'.format(factor),
+                                             shape=tuple(shape), dtype=dtype,
+                                             chunks=True)
+        h5_level.attrs['factor'] = factor
+        for start in range(0, shape[0] * 2, planes):
+            stop = min(shape[0] * 2, start + planes)
+            block = _read_volume_planes(h5_source, source_dims, start, stop)
+            h5_level[start // 2: stop // 2] = \
+                _downsample_volume(block.astype(dtype))
+        h5_source = h5_level
+
+    h5_pyramid.attrs['pyramid_of'] = h5_dset.name.split('/')[-1]
+    h5_pyramid.attrs['spatial_dims'] = np.array(spatial_dims, dtype=np.int64)
+    h5_dset.attrs['volume_pyramid'] = h5_pyramid.ref
+    return h5_pyramid
+
+
+def get_volume_pyramid(h5_dset, spatial_dims=None):
+    """
+    Returns the levels of the pyramid previously stored with
+    :func:`write_volume_pyramid`
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset of interest
+    spatial_dims : list of int, optional
+        Spatial dimensions the pyramid should have been built for, in any
+        order
+
+    Returns
+    -------
+    levels : list of (int, :class:`h5py.Dataset`)
+        Downsampling factor and dataset of each level, by increasing factor.
+        Empty if no valid pyramid was found
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    h5_pyramid = _get_pyramid_group(h5_dset, 'volume_pyramid',
+                                    _VOLUME_PYRAMID_SUFFIX)
+    return _get_levels(h5_dset, h5_pyramid, spatial_dims)
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded-memory, out-of-core rechunking of HDF5 datasets
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import tempfile
+
+import h5py
+import numpy as np
+
+from sidpy.base.num_utils import contains_integers
+from sidpy.base.string_utils import validate_single_string_arg
+
+from .base import get_block_shape, iter_block_slices
+from .simple import check_if_main, copy_attributes, copy_linked_objects
+from .checksum import get_chunk_checksums, write_chunk_checksums
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['plan_rechunk', 'rechunk_dataset']
+
+_TEMP_SUFFIX = '_rechunk_tmp'
+
+
+def _aligned_block(shape, read_chunks, write_chunks):
+    # Smallest block that covers whole chunks of both layouts
+    return tuple(int(min(size, np.lcm(int(read), int(write))))
+                 for size, read, write in zip(shape, read_chunks, write_chunks))
+
+
+def _stage(shape, itemsize, read_chunks, write_chunks, max_bytes):
+    block = _aligned_block(shape, read_chunks, write_chunks)
+    fits = int(np.prod(block, dtype=np.int64)) * itemsize <= max_bytes
+    if not fits:
+        # Blocks stay aligned with the written chunks. Chunks being read are
+        # then decompressed more than once, but memory stays bounded
+        block = get_block_shape(shape, itemsize, max_bytes,
+                                chunks=write_chunks)
+    return {'read_chunks': tuple(read_chunks),
+            'write_chunks': tuple(write_chunks),
+            'block_shape': block, 'aligned': fits}
+
+
+def plan_rechunk(shape, itemsize, source_chunks, target_chunks, max_mem_mb=256):
+    """
+    Plans how to convert a dataset from one chunk layout to another within a
+    memory limit.
+
+    A single pass is used when blocks covering whole chunks of both layouts
+    fit in memory. Otherwise, the data is first written to an intermediate
+    layout whose chunks are the element-wise minimum of both layouts, which
+    usually allows both passes to work on whole chunks. E.g. - converting
+    frame-wise chunks to spectral pencils goes through small tiles.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of the dataset
+    itemsize : int
+        Size of each element in bytes
+    source_chunks : tuple of int or None
+        Current chunk shape. None for contiguous datasets
+    target_chunks : tuple of int
+        Desired chunk shape
+    max_mem_mb : float, optional. Default = 256
+        Upper bound on the size of the blocks held in memory in MB
+
+    Returns
+    -------
+    stages : list of dict
+        One dictionary per pass with the chunk shapes being read
+        ('read_chunks') and written ('write_chunks'), the shape of the blocks
+        that are copied ('block_shape') and whether or not these blocks are
+        aligned with the chunks being read ('aligned')
+    """
+    shape = tuple(int(x) for x in shape)
+    if source_chunks is None:
+        # Hyperslabs of contiguous datasets can be read efficiently
+        source_chunks = (1,) * len(shape)
+    for chunks, name in zip([source_chunks, target_chunks],
+                            ['source_chunks', 'target_chunks']):
+        if len(chunks) != len(shape):
+            raise ValueError('{} should have as many dimensions as shape: {}'
+                             ''.format(name, shape))
+    source_chunks = tuple(min(int(x), size) for x, size in zip(source_chunks, shape))
+    target_chunks = tuple(min(int(x), size) for x, size in zip(target_chunks, shape))
+    max_bytes = int(max_mem_mb * 1024 ** 2)
+
+    direct = _stage(shape, itemsize, source_chunks, target_chunks, max_bytes)
+    if direct['aligned']:
+        return [direct]
+    scratch_chunks = tuple(min(src, tgt) for src, tgt
+                           in zip(source_chunks, target_chunks))
+    if scratch_chunks in [source_chunks, target_chunks]:
+        return [direct]
+    stages = [_stage(shape, itemsize, source_chunks, scratch_chunks, max_bytes),
+              _stage(shape, itemsize, scratch_chunks, target_chunks, max_bytes)]
+    if not any([stage['aligned'] for stage in stages]):
+        return [direct]
+    return stages
+
+
+def _copy_blocks(h5_src, h5_dest, block_shape):
+    for block in iter_block_slices(h5_src.shape, block_shape):
+        h5_dest[block] = h5_src[block]
+
+
+def rechunk_dataset(h5_dset, chunks, max_mem_mb=256, compression=None,
+                    h5_dest_grp=None, alias=None, scratch_dir=None,
+                    verbose=False):
+    """
+    Rewrites a dataset with a new chunk shape without loading it into memory.
+
+    The dataset is either replaced in place or written as a new dataset.
+    Attributes are preserved and, for NSID Main datasets, dimension scales are
+    attached to the rechunked dataset. Stored chunk checksums are recomputed
+    for the new layout. See :func:`plan_rechunk` for how the copy is staged.
+
+    Notes
+    -----
+    When replacing in place, the rechunked data is fully written under a
+    temporary name before the original dataset is unlinked and the copy is
+    renamed. An interruption therefore never leaves a partially rechunked
+    dataset behind. Object references to the original dataset held by other
+    objects are not updated, and open handles to it become invalid. HDF5 does
+    not reclaim the space of the unlinked dataset until the file is repacked.
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset
+        Dataset to rechunk
+    chunks : tuple of int
+        Desired chunk shape
+    max_mem_mb : float, optional. Default = 256
+        Upper bound on the size of the blocks held in memory in MB
+    compression : str, optional. Default = compression of `h5_dset`
+        Compression filter of the rechunked dataset. E.g. - 'gzip'
+    h5_dest_grp : h5py.Group or h5py.File, optional
+        Group in which a new dataset is written. If neither `h5_dest_grp` nor
+        `alias` are provided, `h5_dset` is replaced in place
+    alias : str, optional. Default = name of `h5_dset`
+        Name of the new dataset
+    scratch_dir : str, optional. Default = directory of the file
+        Directory in which a temporary file holding the intermediate dataset
+        is created when the plan needs two passes
+    verbose : bool, optional. Default = False
+        Whether or not to print logs to assist in debugging
+    Returns
+    -------
+    h5_new : pyNSID.NSIDataset or h5py.Dataset
+        Rechunked dataset
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    if not contains_integers(chunks, min_val=1) or \
+            len(chunks) != len(h5_dset.shape):
+        raise ValueError('chunks should be a tuple of {} positive integers'
+                         ''.format(len(h5_dset.shape)))
+    chunks = tuple(min(int(x), size) for x, size in zip(chunks, h5_dset.shape))
+    if h5_dest_grp is not None and not isinstance(h5_dest_grp,
+                                                  (h5py.File, h5py.Group)):
+        raise TypeError("'h5_dest_grp' should either be a h5py.File or "
+                        "h5py.Group object")
+    if alias is not None:
+        alias = validate_single_string_arg(alias, 'alias')
+    in_place = h5_dest_grp is None and alias is None
+    if h5_dest_grp is None:
+        h5_dest_grp = h5_dset.parent
+    name = h5_dset.name.split('/')[-1]
+    if in_place:
+        alias = name + _TEMP_SUFFIX
+    elif alias is None:
+        alias = name
+    if alias in h5_dest_grp:
+        raise ValueError('{} already contains an object named: {}'
+                         ''.format(h5_dest_grp, alias))
+
+    is_main = check_if_main(h5_dset)
+    has_checksums = get_chunk_checksums(h5_dset)[0] is not None
+
+    kwargs = {'shape': h5_dset.shape, 'dtype': h5_dset.dtype, 'chunks': chunks,
+              'fillvalue': h5_dset.fillvalue}
+    if compression is None:
+        kwargs.update({'compression': h5_dset.compression,
+                       'compression_opts': h5_dset.compression_opts,
+                       'shuffle': h5_dset.shuffle,
+                       'fletcher32': h5_dset.fletcher32})
+    else:
+        kwargs['compression'] = compression
+    if h5_dest_grp.file.driver == 'mpio':
+        kwargs.pop('compression', None)
+        kwargs.pop('compression_opts', None)
+
+    stages = plan_rechunk(h5_dset.shape, h5_dset.dtype.itemsize, h5_dset.chunks,
+                          chunks, max_mem_mb=max_mem_mb)
+    if verbose:
+        for index, stage in enumerate(stages):
+            print('Pass {}: {} -> {} in blocks of {}'
+                  ''.format(index, stage['read_chunks'], stage['write_chunks'],
+                            stage['block_shape']))
+
+    h5_new = h5_dest_grp.create_dataset(alias, **kwargs)
+    try:
+        if len(stages) == 1:
+            _copy_blocks(h5_dset, h5_new, stages[0]['block_shape'])
+        else:
+            if scratch_dir is None:
+                scratch_dir = os.path.dirname(os.path.abspath(h5_dset.file.filename))
+            handle, scratch_path = tempfile.mkstemp(suffix='.h5',
+                                                    dir=scratch_dir)
+            os.close(handle)
+            try:
+                with h5py.File(scratch_path, mode='w') as h5_scratch:
+                    h5_tmp = h5_scratch.create_dataset(
+                        'scratch', shape=h5_dset.shape, dtype=h5_dset.dtype,
+                        chunks=stages[0]['write_chunks'])
+                    _copy_blocks(h5_dset, h5_tmp, stages[0]['block_shape'])
+                    _copy_blocks(h5_tmp, h5_new, stages[1]['block_shape'])
+            finally:
+                os.remove(scratch_path)
+    except BaseException:
+        del h5_dest_grp[alias]
+        raise
+
+    copy_attributes(h5_dset, h5_new, skip_refs=True)
+    if h5_new.file == h5_dset.file:
+        for dim_ind, dim in enumerate(h5_dset.dims):
+            for h5_scale in dim.values():
+                h5_new.dims[dim_ind].attach_scale(h5_scale)
+            if len(dim.label) > 0:
+                h5_new.dims[dim_ind].label = dim.label
+        # The old checksums describe the old chunks
+        for att_name in h5_dset.attrs.keys():
+            if att_name == 'chunk_checksums':
+                continue
+            att_val = h5_dset.attrs[att_name]
+            if isinstance(att_val, h5py.Reference) and not \
+                    isinstance(att_val, h5py.RegionReference):
+                h5_new.attrs[att_name] = att_val
+    else:
+        copy_linked_objects(h5_dset, h5_new, verbose=verbose)
+        if has_checksums:
+            # Copied along with the other linked objects but describe the
+            # old chunks
+            h5_stale = h5_new.file[h5_new.attrs['chunk_checksums']]
+            del h5_new.file[h5_stale.name]
+
+    if in_place:
+        # Keep the REFERENCE_LIST of the scales free of dangling entries
+        for dim_ind, dim in enumerate(h5_dset.dims):
+            for h5_scale in dim.values():
+                h5_dset.dims[dim_ind].detach_scale(h5_scale)
+        del h5_dest_grp[name]
+        h5_dest_grp.move(alias, name)
+        h5_new = h5_dest_grp[name]
+    if has_checksums:
+        write_chunk_checksums(h5_new)
+
+    if is_main:
+        from ..nsi_data import NSIDataset
+        return NSIDataset(h5_new)
+    return h5_new
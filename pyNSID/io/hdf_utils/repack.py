@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Compact rewriting of HDF5 files to reclaim the space of deleted objects
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import time
+import tempfile
+
+import h5py
+
+from sidpy.base.string_utils import validate_single_string_arg
+
+from .simple import _object_key, _resolve_object_graph, _copy_object_graph
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['repack_file']
+
+
+def _copy_links(h5_src_grp, h5_dest_grp, new_objs, visited):
+    """
+    Recreates soft links, external links and the additional names of objects
+    reachable through more than one hard link. The object graph copier
+    visits each object once, under a single name
+    """
+    key = _object_key(h5_src_grp)
+    if key in visited:
+        return
+    visited.add(key)
+    for name in h5_src_grp.keys():
+        link = h5_src_grp.get(name, getlink=True)
+        if isinstance(link, h5py.SoftLink):
+            h5_dest_grp[name] = h5py.SoftLink(link.path)
+        elif isinstance(link, h5py.ExternalLink):
+            h5_dest_grp[name] = h5py.ExternalLink(link.filename, link.path)
+        else:
+            h5_obj = h5_src_grp[name]
+            if name not in h5_dest_grp:
+                h5_dest_grp[name] = new_objs[_object_key(h5_obj)]
+            if isinstance(h5_obj, h5py.Group):
+                _copy_links(h5_obj, h5_dest_grp[name], new_objs, visited)
+
+
+def repack_file(file_path, output_path=None, layouts=None, verbose=False):
+    """
+    Rewrites an HDF5 file compactly. HDF5 does not reuse the space of deleted
+    or resized objects, which accumulates in files that are modified often.
+
+    All groups, datasets, attributes and links are rewritten. Object
+    references and dimension scales are pointed to the rewritten objects.
+    Datasets are copied with HDF5's native object copy, which moves chunks
+    without decompressing them, unless a new layout is requested for them.
+    In that case, :func:`dask.array.store` re-encodes the data with reads and
+    writes of different blocks overlapping.
+
+    Notes
+    -----
+    When repacking in place, the compact copy is written to a temporary file
+    in the same directory, which then replaces the original file. The
+    original file is left untouched if anything goes wrong. The file must not
+    be open elsewhere while it is being repacked.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the HDF5 file to repack
+    output_path : str, optional. Default = repack in place
+        Path of the compact copy
+    layouts : dict, optional
+        New layouts for some datasets. Maps the absolute path of a dataset to
+        a dictionary with its new 'chunks' and / or 'compression'
+    verbose : bool, optional. Default = False
+        Whether or not to print logs to assist in debugging
+
+    Returns
+    -------
+    report : dict
+        'original_size' and 'repacked_size' of the file and the
+        'reclaimed_bytes' in bytes, the number of objects copied
+        ('num_objects'), the storage size of the data copied ('data_bytes'),
+        the 'elapsed_time' in seconds and the 'throughput' in MB/s
+    """
+    file_path = os.path.abspath(validate_single_string_arg(file_path,
+                                                           'file_path'))
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError('{} does not exist'.format(file_path))
+    in_place = output_path is None
+    if in_place:
+        handle, output_path = tempfile.mkstemp(
+            suffix='.h5', dir=os.path.dirname(file_path))
+        os.close(handle)
+    else:
+        output_path = os.path.abspath(validate_single_string_arg(output_path,
+                                                                 'output_path'))
+        if output_path == file_path:
+            raise ValueError('output_path should differ from file_path. Leave '
+                             'it empty to repack in place')
+    original_size = os.path.getsize(file_path)
+
+    start = time.time()
+    try:
+        with h5py.File(file_path, mode='r') as h5_src:
+            userblock_size = h5_src.userblock_size
+            with h5py.File(output_path, mode='w', libver=h5_src.libver,
+                           userblock_size=userblock_size) as h5_dest:
+                nodes = _resolve_object_graph([h5_src],
+                                              dest_fileno=_object_key(h5_dest)[0])
+                if verbose:
+                    print('Copying {} objects from {} to {}'
+                          ''.format(len(nodes), file_path, output_path))
+                new_objs = _copy_object_graph(nodes, h5_dest, dict(),
+                                              layouts=layouts, verbose=verbose)
+                _copy_links(h5_src, h5_dest, new_objs, set())
+                data_bytes = sum([new_objs[key].id.get_storage_size()
+                                  for key, node in nodes.items()
+                                  if isinstance(node['obj'], h5py.Dataset)])
+        if userblock_size > 0:
+            with open(file_path, mode='rb') as file_handle:
+                userblock = file_handle.read(userblock_size)
+            with open(output_path, mode='r+b') as file_handle:
+                file_handle.write(userblock)
+        if in_place:
+            os.replace(output_path, file_path)
+            output_path = file_path
+    except BaseException:
+        if in_place and os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    elapsed = time.time() - start
+
+    repacked_size = os.path.getsize(output_path)
+    report = {'original_size': original_size,
+              'repacked_size': repacked_size,
+              'reclaimed_bytes': original_size - repacked_size,
+              'num_objects': len(nodes),
+              'data_bytes': data_bytes,
+              'elapsed_time': elapsed,
+              'throughput': data_bytes / 1024 ** 2 / max(elapsed, 1E-9)}
+    if verbose:
+        print('Reclaimed {} bytes of {} in {:.2f} s ({:.1f} MB/s)'
+              ''.format(report['reclaimed_bytes'], original_size, elapsed,
+                        report['throughput']))
+    return report
@@ -6,6 +6,10 @@ Created on Tue Nov  3 21:14:25 2015
 """
 from __future__ import division, print_function, absolute_import, unicode_literals
 import collections
+try:
+    from collections.abc import Iterable
+except ImportError:
+    from collections import Iterable
 from warnings import warn
 import sys
 import h5py
@@ -22,11 +26,32 @@ from sidpy.hdf.hdf_utils import get_auxiliary_datasets, link_h5_obj_as_alias, \
     get_attr, write_simple_attrs, lazy_load_array, \
     validate_h5_objs_in_same_h5_file
 
-from .base import write_book_keeping_attrs
+from .base import write_book_keeping_attrs, datasets_equal, have_same_layout, \
+    copy_raw_chunks
+from .attributes import read_attributes, write_attributes
 from ..dimension import validate_dimensions
 
 if sys.version_info.major == 3:
     unicode = str
+
+# Attributes managed by the HDF5 dimension scale API. These hold object
+# references and are rebuilt by attaching scales rather than being copied
+_DIM_SCALE_ATTRS = ['CLASS', 'NAME', 'REFERENCE_LIST', 'DIMENSION_LIST',
+                    'DIMENSION_LABELS']
+
+
+def _dim_scale_attrs(h5_obj):
+    """
+    Returns the names of the attributes of `h5_obj` that belong to the
+    dimension scale API. Objects that are neither dimension scales nor have
+    scales or labels attached may carry user attributes of the same names
+    """
+    if isinstance(h5_obj, h5py.Dataset) and \
+            (h5py.h5ds.is_scale(h5_obj.id) or
+             'DIMENSION_LIST' in h5_obj.attrs or
+             'DIMENSION_LABELS' in h5_obj.attrs):
+        return _DIM_SCALE_ATTRS
+    return ['DIMENSION_LIST']
 """
 __all__ = ['assign_group_index', 'check_and_link_ancillary', 'check_for_matching_attrs', 'check_for_old',
            'check_if_main', 'copy_attributes', 'copy_main_attributes']
@@ -201,10 +226,10 @@ def check_and_link_ancillary(h5_dset, anc_names, h5_main=None, anc_refs=None):
     def __check_and_link_single(h5_obj_ref, target_ref_name):
         if isinstance(h5_obj_ref, h5py.Reference):
             # TODO: Same HDF5 file?
-            h5_dset.attrs[target_ref_name] = h5_obj_ref
+            write_attributes(h5_dset, {target_ref_name: h5_obj_ref})
         elif isinstance(h5_obj_ref, (h5py.Dataset, h5py.Group, h5py.File)):
             validate_h5_objs_in_same_h5_file(h5_obj_ref, h5_dset)
-            h5_dset.attrs[target_ref_name] = h5_obj_ref.ref
+            write_attributes(h5_dset, {target_ref_name: h5_obj_ref.ref})
         elif h5_main is not None:
             h5_anc = get_auxiliary_datasets(h5_main, aux_dset_name=[target_ref_name])
             if len(h5_anc) == 1:
@@ -268,26 +293,25 @@ def copy_attributes(source, dest, skip_refs=True, verbose=False):
                  'in different files'.format(source, dest))
         skip_dset_refs = True
 
-    for att_name in source.attrs.keys():
-        print(att_name)
-        if att_name not in ['DIMENSION_LIST']:
-            att_val = get_attr(source, att_name)
+    new_attrs = dict()
+    for att_name, att_val in read_attributes(
+            source, exclude=_dim_scale_attrs(source)).items():
         """
         Don't copy references unless asked
         """
-        if isinstance(att_val, h5py.Reference) and not isinstance(att_val, h5py.RegionReference):
-            if not skip_dset_refs:
-                if verbose:
-                    print('dset ref copying ' + att_name)
-                dest.attrs[att_name] = att_val
-        elif isinstance(att_val, h5py.RegionReference):
+        if isinstance(att_val, h5py.RegionReference):
             # handled in dedicated if condition below
             continue
-        else:
-            # everything else
+        elif isinstance(att_val, h5py.Reference):
+            if skip_dset_refs:
+                continue
             if verbose:
-                print('simple copying ' + att_name)
-            dest.attrs[att_name] = clean_string_att(att_val)
+                print('dset ref copying ' + att_name)
+        elif verbose:
+            # everything else
+            print('simple copying ' + att_name)
+        new_attrs[att_name] = att_val
+    write_attributes(dest, new_attrs)
 
     if not skip_refs:
         # This can be copied across files without problems
@@ -467,9 +491,17 @@ def check_if_main(h5_main, verbose=False):
     ### Check for Validity of Dimensional Scales 
     for i, dimension in enumerate(h5_main.dims):
         # check for all required attributes
+        if len(dimension.label) == 0 or dimension.label not in h5_group:
+            if verbose:
+                print('Dimension {} of {} has no attached dimension scale'.format(i, h5_main.name))
+            return False
         h5_dim_dset =  h5_group[dimension.label]
-        attr_success.append(np.all([att in h5_dim_dset.attrs for att in attrs_names]))
-        dset_success.append(np.all([attr_success, isinstance(h5_dim_dset, h5py.Dataset)]))
+        if isinstance(h5_dim_dset, h5py.Dataset):
+            dim_attrs = read_attributes(h5_dim_dset, attr_names=attrs_names)
+        else:
+            dim_attrs = dict()
+        attr_success.append(len(dim_attrs) == len(attrs_names))
+        dset_success.append(np.all([attr_success[-1], isinstance(h5_dim_dset, h5py.Dataset)]))
         # dimensional scale has to be 1D
         if len(h5_dim_dset.shape) == 1:
             # and of the same length as the shape of the dataset
@@ -493,7 +525,8 @@ def check_if_main(h5_main, verbose=False):
 
     #Check for all required attributes in dataset
     main_attrs_names = ['quantity', 'units', 'main_data_name','data_type', 'modality', 'source']
-    main_attr_success = np.all([att in h5_main.attrs for att in main_attrs_names])
+    main_attrs = read_attributes(h5_main, attr_names=main_attrs_names)
+    main_attr_success = len(main_attrs) == len(main_attrs_names)
     if verbose:
         print('All Attributes in dataset: ', main_attr_success)
     if not main_attr_success:
@@ -502,7 +535,7 @@ def check_if_main(h5_main, verbose=False):
         return False
 
     for attr_name in main_attrs_names:
-        val = get_attr(h5_main, attr_name)
+        val = main_attrs[attr_name]
         if not isinstance(val, (str, unicode)):
             if verbose:
                 print('Attribute {} of {} found to be {}. Expected a string'.format(attr_name, h5_main.name, val))
@@ -563,8 +596,9 @@ def link_as_main(h5_main, dim_dict):
     # Attach Scales
     ################
     for i, this_dim_dset in  dim_dict.items():
-        this_dim_dset.make_scale(this_dim_dset.attrs['name'])
-        h5_main.dims[int(i)].label = this_dim_dset.attrs['name']
+        dim_name = read_attributes(this_dim_dset, attr_names=['name'])['name']
+        this_dim_dset.make_scale(dim_name)
+        h5_main.dims[int(i)].label = dim_name
         h5_main.dims[int(i)].attach_scale(this_dim_dset)
         
     from ..nsi_data import NSIDataset
@@ -790,11 +824,12 @@ def create_results_group(h5_main, tool_name, h5_parent_group=None):
 
     # Also add some basic attributes like source and tool name. This will allow relaxation of nomenclature restrictions:
     # this are NOT being used right now but will be in the subsequent versions of pyNSID
-    write_simple_attrs(h5_group, {'tool': tool_name, 'num_source_dsets': 1})
+    group_attrs = {'tool': tool_name, 'num_source_dsets': 1}
     # in this case, there is only one source
     if h5_parent_group.file == h5_main.file:
         for dset_ind, dset in enumerate([h5_main]):
-            h5_group.attrs['source_' + '{:03d}'.format(dset_ind)] = dset.ref
+            group_attrs['source_' + '{:03d}'.format(dset_ind)] = dset.ref
+    write_attributes(h5_group, group_attrs)
 
     return h5_group
 
@@ -813,11 +848,11 @@ def copy_main_attributes(h5_main, h5_new):
         if not isinstance(param, h5py.Dataset):
             raise TypeError(param_name + ' should be a h5py.Dataset object')
 
+    main_attrs = read_attributes(h5_main, attr_names=['quantity', 'units'])
     for att_name in ['quantity', 'units']:
-        if att_name not in h5_main.attrs:
+        if att_name not in main_attrs:
             raise KeyError('Attribute: {} does not exist in {}'.format(att_name, h5_main))
-        val = get_attr(h5_main, att_name)
-        h5_new.attrs[att_name] = clean_string_att(val)
+    write_attributes(h5_new, main_attrs)
 
 
 def create_empty_dataset(source_dset, dtype, dset_name, h5_group=None, new_attrs=None, skip_refs=False):
@@ -920,7 +955,7 @@ def create_empty_dataset(source_dset, dtype, dset_name, h5_group=None, new_attrs
     ################                              
     if source_dset.file != h5_group.file:
         copy_linked_objects(source_dset, h5_new_dset)
-    h5_new_dset.attrs.update(new_attrs)
+    write_attributes(h5_new_dset, new_attrs)
 
     if check_if_main(h5_new_dset):
         from ..nsi_data import NSIDataset
@@ -932,6 +967,183 @@ def create_empty_dataset(source_dset, dtype, dset_name, h5_group=None, new_attrs
     return h5_new_dset
 
 
+_ALLOC_TIMES = {'default': h5py.h5d.ALLOC_TIME_DEFAULT,
+                'early': h5py.h5d.ALLOC_TIME_EARLY,
+                'incremental': h5py.h5d.ALLOC_TIME_INCR,
+                'late': h5py.h5d.ALLOC_TIME_LATE}
+_FILL_TIMES = {'ifset': h5py.h5d.FILL_TIME_IFSET,
+               'alloc': h5py.h5d.FILL_TIME_ALLOC,
+               'never': h5py.h5d.FILL_TIME_NEVER}
+
+
+def create_empty_datasets(source_dset, specs, h5_group=None, skip_refs=False,
+                          chunks=None, compression=None, fillvalue=None,
+                          alloc_time='late', fill_time=None, verbose=False):
+    """
+    Creates several empty Main datasets shaped like `source_dset` in one pass,
+    e.g. - the guess, fit and error datasets of a fitting process.
+
+    Unlike calling :func:`create_empty_dataset` once per dataset, the source
+    is validated, its attributes read and its dimension scales resolved only
+    once. All new datasets share the same dimension scales.
+    Parameters
+    ----------
+    source_dset : h5py.Dataset object
+        NSID Main dataset that provides the shape, attributes and dimension
+        scales of the new datasets
+    specs : list of tuple
+        One (name, dtype) or (name, dtype, attrs) tuple per dataset, where
+        attrs is a dictionary of additional attributes
+    h5_group : :class:`h5py.Group`, optional. Default = parent of `source_dset`
+        Group within which the datasets will be created
+    skip_refs : bool, optional. Default = False
+        Should object references be skipped when copying attributes from the
+        `source_dset`
+    chunks : tuple of int, optional. Default = chunking of `source_dset`
+        Chunk shape of the new datasets
+    compression : str, optional. Default = compression of `source_dset`
+        Compression filter of the new datasets
+    fillvalue : scalar, optional
+        Value returned when reading elements that were never written
+    alloc_time : str, optional. Default = 'late'
+        When HDF5 allocates storage: 'default', 'early', 'incremental' or
+        'late'. Late allocation defers all disk allocation to the first write
+    fill_time : str, optional. Default = HDF5 default
+        When fill values are written to allocated storage: 'ifset', 'alloc'
+        or 'never'
+    verbose : bool, optional. Default = False
+        Whether or not to print logs to assist in debugging
+    Returns
+    -------
+    h5_new_dsets : list of pyNSID.NSIDataset
+        Newly created datasets in the order of `specs`
+    """
+    if not isinstance(source_dset, h5py.Dataset):
+        raise TypeError('source_dset should be a h5py.Dataset object')
+    if not check_if_main(source_dset):
+        raise ValueError('{} is not a NSID Main dataset'.format(source_dset.name))
+    if not isinstance(specs, (list, tuple)) or len(specs) == 0:
+        raise TypeError('specs should be a non-empty list of tuples')
+    if alloc_time not in _ALLOC_TIMES:
+        raise KeyError('alloc_time should be one of: {}'
+                       ''.format(list(_ALLOC_TIMES.keys())))
+    if fill_time is not None and fill_time not in _FILL_TIMES:
+        raise KeyError('fill_time should be one of: {}'
+                       ''.format(list(_FILL_TIMES.keys())))
+
+    clean_specs = []
+    for spec in specs:
+        if not isinstance(spec, (list, tuple)) or len(spec) not in [2, 3]:
+            raise TypeError('Each spec should be a (name, dtype) or '
+                            '(name, dtype, attrs) tuple. Got: {}'.format(spec))
+        dset_name = validate_single_string_arg(spec[0], 'dset_name')
+        if '-' in dset_name:
+            warn('dset_name should not contain the "-" character. Reformatted '
+                 'name from:{} to {}'.format(dset_name,
+                                             dset_name.replace('-', '_')))
+            dset_name = dset_name.replace('-', '_')
+        _ = validate_dtype(spec[1])
+        new_attrs = spec[2] if len(spec) == 3 and spec[2] is not None else dict()
+        if not isinstance(new_attrs, dict):
+            raise TypeError('attrs of {} should be a dictionary'.format(dset_name))
+        clean_specs.append((dset_name, spec[1], new_attrs))
+    names = [spec[0] for spec in clean_specs]
+    if len(set(names)) != len(names):
+        raise ValueError('Dataset names should be unique. Got: {}'.format(names))
+
+    if h5_group is None:
+        h5_group = source_dset.parent
+    elif not isinstance(h5_group, (h5py.Group, h5py.File)):
+        raise TypeError('h5_group should be a h5py.Group or h5py.File object')
+    same_file = source_dset.file == h5_group.file
+    if not same_file and not skip_refs:
+        warn('H5 object references will not be copied over since {} is in '
+             'a different HDF5 file as {}'.format(h5_group, source_dset))
+
+    # Everything that is common to all new datasets is resolved once
+    common_attrs = dict()
+    for att_name, att_val in read_attributes(
+            source_dset, exclude=_dim_scale_attrs(source_dset)).items():
+        if isinstance(att_val, h5py.RegionReference):
+            continue
+        if isinstance(att_val, h5py.Reference) and \
+                (skip_refs or not same_file or att_name == 'chunk_checksums'):
+            # Checksums describe the data of the source only
+            continue
+        common_attrs[att_name] = att_val
+    scales = [(dim.label, dim[0]) for dim in source_dset.dims]
+    if h5_group != source_dset.parent:
+        # Main datasets expect their scales in the same group. These are
+        # copied once and shared by all new datasets
+        h5_copies = copy_object_graph([h5_scale for _, h5_scale in scales],
+                                      h5_group, verbose=verbose)
+        scales = [(label, h5_copy) for (label, _), h5_copy
+                  in zip(scales, h5_copies)]
+        for label, h5_scale in scales:
+            if not h5_scale.is_scale:
+                h5_scale.make_scale(label)
+
+    kwargs = {'shape': source_dset.shape, 'chunks': source_dset.chunks,
+              'compression': source_dset.compression,
+              'compression_opts': source_dset.compression_opts}
+    if chunks is not None:
+        kwargs['chunks'] = chunks
+    if compression is not None:
+        kwargs.update({'compression': compression, 'compression_opts': None})
+    if fillvalue is not None:
+        kwargs['fillvalue'] = fillvalue
+    if h5_group.file.driver == 'mpio':
+        if kwargs.pop('compression', None) is not None:
+            warn('This HDF5 file has been opened with the "mpio" communicator. '
+                 'mpi4py does not allow creation of compressed datasets. '
+                 'Compression kwarg has been removed')
+        kwargs.pop('compression_opts', None)
+
+    from ..nsi_data import NSIDataset
+    h5_new_dsets = []
+    book_keeping = None
+    for dset_name, dtype, new_attrs in clean_specs:
+        if dset_name in h5_group:
+            h5_old = h5_group[dset_name]
+            if not isinstance(h5_old, h5py.Dataset):
+                raise KeyError('{} is already a {} in group: {}'
+                               ''.format(dset_name, type(h5_old), h5_group.name))
+            warn('A dataset named: {} already exists in group: {}. Deleting '
+                 'and creating a new one'.format(dset_name, h5_group.name))
+            del h5_old, h5_group[dset_name]
+        dcpl = h5py.h5p.create(h5py.h5p.DATASET_CREATE)
+        dcpl.set_alloc_time(_ALLOC_TIMES[alloc_time])
+        if fill_time is not None:
+            dcpl.set_fill_time(_FILL_TIMES[fill_time])
+        h5_new = h5_group.create_dataset(dset_name, dtype=dtype, dcpl=dcpl,
+                                         **kwargs)
+        if verbose:
+            print('Created {}'.format(h5_new))
+
+        for dim_ind, (label, h5_scale) in enumerate(scales):
+            h5_new.dims[dim_ind].attach_scale(h5_scale)
+            h5_new.dims[dim_ind].label = label
+
+        if book_keeping is None:
+            dset_attrs = dict(common_attrs)
+            dset_attrs.update(new_attrs)
+            write_attributes(h5_new, dset_attrs)
+            write_book_keeping_attrs(h5_new)
+            book_keeping = dict()
+            managed = _dim_scale_attrs(h5_new)
+            for att_name, att_val in read_attributes(h5_new).items():
+                if att_name not in common_attrs and att_name not in new_attrs \
+                        and att_name not in managed:
+                    book_keeping[att_name] = att_val
+        else:
+            dset_attrs = dict(common_attrs)
+            dset_attrs.update(book_keeping)
+            dset_attrs.update(new_attrs)
+            write_attributes(h5_new, dset_attrs)
+        h5_new_dsets.append(NSIDataset(h5_new))
+    return h5_new_dsets
+
+
 def check_for_matching_attrs(h5_obj, new_parms=None, verbose=False):
     """
     Compares attributes in the given H5 object against those in the provided dictionary and returns True if
@@ -957,6 +1169,7 @@ def check_for_matching_attrs(h5_obj, new_parms=None, verbose=False):
         if not isinstance(new_parms, dict):
             raise TypeError('new_parms should be a dictionary')
 
+    old_parms = read_attributes(h5_obj, attr_names=list(new_parms.keys()))
     tests = []
     for key in new_parms.keys():
 
@@ -968,7 +1181,7 @@ def check_for_matching_attrs(h5_obj, new_parms=None, verbose=False):
             continue
 
         try:
-            old_value = get_attr(h5_obj, key)
+            old_value = old_parms[key]
         except KeyError:
             # if parameter was not found assume that something has changed
             if verbose:
@@ -977,7 +1190,7 @@ def check_for_matching_attrs(h5_obj, new_parms=None, verbose=False):
             break
 
         if isinstance(old_value, np.ndarray):
-            if not isinstance(new_parms[key], collections.Iterable):
+            if not isinstance(new_parms[key], Iterable):
                 if verbose:
                     print('New parm: {} \t- new parm not iterable unlike old parm *****'.format(key))
                 tests.append(False)
@@ -1017,7 +1230,8 @@ def check_for_matching_attrs(h5_obj, new_parms=None, verbose=False):
 
 
 
-def copy_dataset(h5_orig_dset, h5_dest_grp, alias=None, verbose=False):
+def copy_dataset(h5_orig_dset, h5_dest_grp, alias=None, chunks=None,
+                 compression=None, verbose=False):
     """
     Copies the provided HDF5 dataset to the provided destination. This function
     is handy when needing to make copies of datasets to a different HDF5 file.
@@ -1025,6 +1239,12 @@ def copy_dataset(h5_orig_dset, h5_dest_grp, alias=None, verbose=False):
     -----
     This function does NOT copy all linked objects such as ancillary
     datasets. Call `copy_linked_objects` to accomplish that goal.
+
+    When the chunking and filters are kept, the dataset is copied with HDF5's
+    native object copy, which moves chunks without decompressing them. Should
+    that not be possible, the still-compressed chunks are transferred one by
+    one. Only a change of chunking or compression requires the data to be
+    decoded and re-encoded.
     Parameters
     ----------
     h5_orig_dset : h5py.Dataset
@@ -1032,10 +1252,16 @@ def copy_dataset(h5_orig_dset, h5_dest_grp, alias=None, verbose=False):
         Destination where the duplicate dataset will be created
     alias : str, optional. Default = name from `h5_orig_dset`:
         Name to be assigned to the copied dataset
+    chunks : tuple of int, optional. Default = chunking of `h5_orig_dset`
+        Chunk shape of the copy
+    compression : str, optional. Default = compression of `h5_orig_dset`
+        Compression filter of the copy. E.g. - 'gzip'
     verbose : bool, optional. Default = False
         Whether or not to print logs to assist in debugging
     Returns
     -------
+    h5_new_dset : h5py.Dataset
+        Copy of `h5_orig_dset`
     """
     if not isinstance(h5_orig_dset, h5py.Dataset):
         raise TypeError("'h5_orig_dset' should be a h5py.Dataset object")
@@ -1057,40 +1283,73 @@ def copy_dataset(h5_orig_dset, h5_dest_grp, alias=None, verbose=False):
                            ' name which is not a dataset'.format(h5_dest_grp,
                                                                  h5_new_dset))
 
-        da_source = lazy_load_array(h5_orig_dset)
-        da_dest = lazy_load_array(h5_new_dset)
-
-        if da_source.shape != da_dest.shape:
+        if h5_orig_dset.shape != h5_new_dset.shape:
             raise ValueError('Existing dataset: {} has a different shape '
                              'compared to the original dataset: {}'
                              ''.format(h5_new_dset, h5_orig_dset))
-        if not da.allclose(da_source, da_dest):
+        # Stored checksums may be stale, so the values are compared
+        if not datasets_equal(h5_orig_dset, h5_new_dset, use_checksums=False):
             raise ValueError('Existing dataset: {} has different contents'
                              'compared to the original dataset: {}'
                              ''.format(h5_new_dset, h5_orig_dset))
     else:
-
-        kwargs = {'shape': h5_orig_dset.shape,
-                  'dtype': h5_orig_dset.dtype,
-                  'compression': h5_orig_dset.compression,
-                  'chunks': h5_orig_dset.chunks}
-        if h5_orig_dset.file.driver == 'mpio':
-            if kwargs.pop('compression', None) is not None:
-                warn('This HDF5 file has been opened wth the '
-                     '"mpio" communicator. mpi4py does not allow '
-                     'creation of compressed datasets. Compression'
-                     ' kwarg has been removed')
-        if verbose:
-            print('Creating new HDF5 dataset named: {} at: {} with'
-                  ' kwargs: {}'.format(alias, h5_dest_grp,
-                                       kwargs))
-        h5_new_dset = h5_dest_grp.create_dataset(alias,
-                                                **kwargs)
-        if verbose:
-            print('dask.array will copy data from source dataset '
-                  'to new dataset')
-        da.to_hdf5(h5_new_dset.file.filename,
-                   {h5_new_dset.name: lazy_load_array(h5_orig_dset)})
+        keep_layout = chunks is None and compression is None
+        mpio = 'mpio' in [h5_orig_dset.file.driver, h5_dest_grp.file.driver]
+        h5_new_dset = None
+        if keep_layout and not mpio:
+            if verbose:
+                print('Copying {} natively to {} as: {}'
+                      ''.format(h5_orig_dset, h5_dest_grp, alias))
+            try:
+                h5_dest_grp.copy(h5_orig_dset, alias, without_attrs=True)
+                h5_new_dset = h5_dest_grp[alias]
+            except (ValueError, TypeError, KeyError, RuntimeError, OSError) as exep:
+                if verbose:
+                    print('Native copy failed: {}'.format(exep))
+                if alias in h5_dest_grp:
+                    del h5_dest_grp[alias]
+
+        if h5_new_dset is None:
+            kwargs = {'shape': h5_orig_dset.shape,
+                      'dtype': h5_orig_dset.dtype,
+                      'compression': h5_orig_dset.compression,
+                      'chunks': h5_orig_dset.chunks}
+            if keep_layout:
+                kwargs.update({'compression_opts': h5_orig_dset.compression_opts,
+                               'shuffle': h5_orig_dset.shuffle,
+                               'fletcher32': h5_orig_dset.fletcher32,
+                               'fillvalue': h5_orig_dset.fillvalue})
+            else:
+                if chunks is not None:
+                    kwargs['chunks'] = chunks
+                if compression is not None:
+                    kwargs['compression'] = compression
+                elif h5_orig_dset.compression is not None:
+                    kwargs.update({'compression_opts': h5_orig_dset.compression_opts,
+                                   'shuffle': h5_orig_dset.shuffle})
+            if mpio:
+                if kwargs.pop('compression', None) is not None:
+                    warn('This HDF5 file has been opened wth the '
+                         '"mpio" communicator. mpi4py does not allow '
+                         'creation of compressed datasets. Compression'
+                         ' kwarg has been removed')
+                kwargs.pop('compression_opts', None)
+            if verbose:
+                print('Creating new HDF5 dataset named: {} at: {} with'
+                      ' kwargs: {}'.format(alias, h5_dest_grp,
+                                           kwargs))
+            h5_new_dset = h5_dest_grp.create_dataset(alias,
+                                                    **kwargs)
+            if not mpio and have_same_layout(h5_orig_dset, h5_new_dset):
+                if verbose:
+                    print('Transferring raw chunks from source dataset '
+                          'to new dataset')
+                copy_raw_chunks(h5_orig_dset, h5_new_dset)
+            else:
+                if verbose:
+                    print('dask.array will copy data from source dataset '
+                          'to new dataset')
+                da.store(lazy_load_array(h5_orig_dset), h5_new_dset)
     if verbose:
         print('Copying simple attributes of original dataset: {} to '
               'destination dataset: {}'.format(h5_orig_dset, h5_new_dset))
@@ -1101,6 +1360,234 @@ def copy_dataset(h5_orig_dset, h5_dest_grp, alias=None, verbose=False):
     return h5_new_dset
 
 
+def _object_key(h5_obj):
+    # (file number, object address) identifies an object regardless of the
+    # path or handle through which it was reached
+    info = h5py.h5o.get_info(h5_obj.id)
+    return info.fileno, info.addr
+
+
+def _group_members(h5_group, path):
+    members = []
+    h5_group.visit(members.append)
+    return [(h5_group[rel_path], '/'.join(filter(None, [path, rel_path])), True)
+            for rel_path in members]
+
+
+def _unique_path(path, used_paths):
+    """
+    Appends the lowest free numeric suffix to `path` if it is already taken
+    """
+    new_path = path
+    index = 0
+    while new_path in used_paths:
+        index += 1
+        new_path = '{}_{}'.format(path, index)
+    used_paths.add(new_path)
+    return new_path
+
+
+def _resolve_object_graph(h5_sources, dest_fileno=None, include_members=True):
+    """
+    Walks the groups, object references and dimension scales reachable from
+    the sources and assigns each unique object a path relative to the
+    destination group. Members of copied groups keep their relative paths.
+    Other linked objects are placed next to the sources under the name of the
+    referencing attribute or, for dimension scales, their own name. Distinct
+    objects that would end up at the same path, such as same-named dimension
+    scales of different groups, get a numeric suffix. Linked objects that
+    already live in the file with file number `dest_fileno` are referenced
+    rather than copied.
+    """
+    pending = []
+    used_paths = set()
+    source_paths = dict()
+    for h5_obj in h5_sources:
+        key = _object_key(h5_obj)
+        if key not in source_paths:
+            source_paths[key] = _unique_path(h5_obj.name.split('/')[-1],
+                                             used_paths)
+        name = source_paths[key]
+        pending.append((h5_obj, name, True))
+        if include_members and isinstance(h5_obj, h5py.Group):
+            pending += _group_members(h5_obj, name)
+
+    nodes = collections.OrderedDict()
+    while len(pending) > 0:
+        h5_obj, path, in_subtree = pending.pop(0)
+        key = _object_key(h5_obj)
+        if key in nodes:
+            continue
+        if not in_subtree and key[0] != dest_fileno:
+            path = _unique_path(path, used_paths)
+        elif in_subtree:
+            used_paths.add(path)
+        node = {'obj': h5_obj, 'path': path, 'refs': [], 'scales': [],
+                'labels': [],
+                'copy': in_subtree or key[0] != dest_fileno}
+        nodes[key] = node
+        if not node['copy']:
+            continue
+        if isinstance(h5_obj, h5py.Group) and not in_subtree:
+            # Members of referenced groups take precedence over other links
+            pending = _group_members(h5_obj, path) + pending
+        elif isinstance(h5_obj, h5py.Dataset):
+            for dim_ind, dim in enumerate(h5_obj.dims):
+                node['labels'].append(dim.label)
+                for h5_scale in dim.values():
+                    node['scales'].append((dim_ind, _object_key(h5_scale)))
+                    pending.append((h5_scale, h5_scale.name.split('/')[-1],
+                                    False))
+        if isinstance(h5_obj, h5py.Datatype):
+            continue
+        obj_attrs = read_attributes(h5_obj, exclude=_dim_scale_attrs(h5_obj))
+        for att_name, att_val in obj_attrs.items():
+            if isinstance(att_val, h5py.Reference) and att_val and not \
+                    isinstance(att_val, h5py.RegionReference):
+                h5_target = h5_obj.file[att_val]
+                node['refs'].append((att_name, _object_key(h5_target)))
+                pending.append((h5_target, att_name, False))
+    return nodes
+
+
+def _copy_object_graph(nodes, h5_dest_grp, new_objs, layouts=None,
+                       verbose=False):
+    """
+    Copies each node of the graph once and then rewrites the object
+    references and dimension scales of the copies. `new_objs` maps keys of
+    nodes that should not be copied to their counterparts in the destination
+    """
+    if layouts is None:
+        layouts = dict()
+    for key, node in nodes.items():
+        if key in new_objs:
+            continue
+        h5_obj = node['obj']
+        if not node['copy']:
+            new_objs[key] = h5_obj
+            continue
+        if isinstance(h5_obj, h5py.Group):
+            if len(node['path']) == 0:
+                h5_new_obj = h5_dest_grp
+            else:
+                h5_new_obj = h5_dest_grp.require_group(node['path'])
+            copy_attributes(h5_obj, h5_new_obj, skip_refs=True)
+        elif isinstance(h5_obj, h5py.Dataset):
+            parent_path, _, name = node['path'].rpartition('/')
+            h5_parent = h5_dest_grp
+            if len(parent_path) > 0:
+                h5_parent = h5_dest_grp.require_group(parent_path)
+            layout = layouts.get(h5_obj.name, dict())
+            h5_new_obj = copy_dataset(h5_obj, h5_parent, alias=name,
+                                      chunks=layout.get('chunks'),
+                                      compression=layout.get('compression'),
+                                      verbose=verbose)
+        elif isinstance(h5_obj, h5py.Datatype):
+            parent_path, _, name = node['path'].rpartition('/')
+            h5_parent = h5_dest_grp
+            if len(parent_path) > 0:
+                h5_parent = h5_dest_grp.require_group(parent_path)
+            h5_parent.copy(h5_obj, name)
+            h5_new_obj = h5_parent[name]
+        else:
+            raise NotImplementedError('Unable to copy {} objects yet'
+                                      '. Contact developer if you need'
+                                      ' this'.format(type(h5_obj)))
+        if verbose:
+            print('Copied {} to {}'.format(h5_obj, h5_new_obj))
+        new_objs[key] = h5_new_obj
+
+    # Links can only be restored once all their targets exist
+    for key, node in nodes.items():
+        h5_new_obj = new_objs[key]
+        if h5_new_obj is node['obj']:
+            continue
+        if len(node['refs']) > 0:
+            write_attributes(h5_new_obj,
+                             dict((att_name, new_objs[target_key].ref)
+                                  for att_name, target_key in node['refs']))
+        if not any(node['labels']) and len(node['scales']) == 0:
+            continue
+        if h5_new_obj.shape != node['obj'].shape:
+            warn('Dimension scales cannot be attached to {} since its shape '
+                 'differs from that of {}'.format(h5_new_obj, node['obj']))
+            continue
+        for dim_ind, scale_key in node['scales']:
+            h5_scale = new_objs[scale_key]
+            if not h5py.h5ds.is_scale(h5_scale.id):
+                scale_name = h5py.h5ds.get_scale_name(nodes[scale_key]['obj'].id)
+                if isinstance(scale_name, bytes):
+                    scale_name = scale_name.decode('utf-8')
+                h5_scale.make_scale(scale_name or '')
+            if not h5py.h5ds.is_attached(h5_new_obj.id, h5_scale.id, dim_ind):
+                h5_new_obj.dims[dim_ind].attach_scale(h5_scale)
+        for dim_ind, label in enumerate(node['labels']):
+            if len(label) > 0:
+                h5_new_obj.dims[dim_ind].label = label
+    return new_objs
+
+
+def copy_object_graph(h5_sources, h5_dest_grp, layouts=None, verbose=False):
+    """
+    Copies datasets and groups along with every object reachable from them
+    through object references and dimension scales.
+
+    The whole graph is resolved before any data is moved, so that an object
+    shared by several sources, such as a dimension scale, is copied exactly
+    once. Object references and dimension scales of the copies are then
+    rewritten to point to the copies.
+
+    Notes
+    -----
+    Groups are copied together with all their members, preserving their
+    relative paths. Linked objects outside of the sources are placed directly
+    under `h5_dest_grp` and named after the attribute that references them or,
+    for dimension scales, after their own name. Distinct objects that would
+    share a name, such as dimension scales of the same name in different
+    groups, are told apart by a numeric suffix. Linked objects that already
+    reside in the destination file are referenced instead of being copied.
+    Existing datasets with the same name and identical contents are reused.
+    Parameters
+    ----------
+    h5_sources : h5py.Dataset, h5py.Group or list thereof
+        Objects to copy
+    h5_dest_grp : h5py.Group or h5py.File object
+        Destination group
+    layouts : dict, optional
+        New layouts of some of the copied datasets. Maps the absolute path of
+        a source dataset to a dictionary with the 'chunks' and / or
+        'compression' of its copy. See :func:`copy_dataset`
+    verbose : bool, optional. Default = False
+        Whether or not to print logs to assist in debugging
+    Returns
+    -------
+    h5_copies : list
+        Copies of each object in `h5_sources` in the same order
+    """
+    if isinstance(h5_sources, (h5py.Dataset, h5py.Group)):
+        h5_sources = [h5_sources]
+    if not isinstance(h5_sources, (list, tuple)):
+        raise TypeError("'h5_sources' should be a h5py.Dataset, h5py.Group "
+                        "or a list of such objects")
+    for h5_obj in h5_sources:
+        if not isinstance(h5_obj, (h5py.Dataset, h5py.Group)):
+            raise TypeError("'h5_sources' should only contain h5py.Dataset "
+                            "or h5py.Group objects. Got: {}"
+                            "".format(type(h5_obj)))
+    if not isinstance(h5_dest_grp, (h5py.File, h5py.Group)):
+        raise TypeError("'h5_dest_grp' should either be a h5py.File or "
+                        "h5py.Group object")
+
+    nodes = _resolve_object_graph(h5_sources,
+                                  dest_fileno=_object_key(h5_dest_grp)[0])
+    if verbose:
+        print('Resolved {} unique objects from {} sources'
+              ''.format(len(nodes), len(h5_sources)))
+    new_objs = _copy_object_graph(nodes, h5_dest_grp, dict(), layouts=layouts,
+                                  verbose=verbose)
+    return [new_objs[_object_key(h5_obj)] for h5_obj in h5_sources]
+
+
 def copy_linked_objects(h5_source, h5_dest, verbose=False):
     """
     Recursively copies datasets linked to the source h5 object to the
@@ -1111,7 +1598,11 @@ def copy_linked_objects(h5_source, h5_dest, verbose=False):
     but that is supported.
     Notes
     -----
-    We anticipate this function being used to copy over ancillary datasets
+    We anticipate this function being used to copy over ancillary datasets.
+    Objects referenced by the source, their own linked objects and the
+    dimension scales of the source are each copied once, see
+    :func:`copy_object_graph`. The object references and dimension scales of
+    the destination are then pointed to the copies.
     Parameters
     ----------
     h5_source : h5py.Dataset or h5py.Group object
@@ -1138,54 +1629,15 @@ def copy_linked_objects(h5_source, h5_dest, verbose=False):
     else:
         h5_dest_grp = h5_dest.parent
 
-    # Now we are working on other files
-    for link_obj_name in h5_source.attrs.keys():
-        h5_orig_obj = get_attr(h5_source, link_obj_name)
-        if isinstance(h5_orig_obj, h5py.Reference) and not \
-                isinstance(h5_orig_obj, h5py.RegionReference):
-            h5_orig_obj = h5_source.file[h5_orig_obj]
-            if verbose:
-                print('Attempting to copy object linked to source: {} as {}'
-                      ''.format(h5_orig_obj, link_obj_name))
-            # Check to see if such a dataset already exist
-            if link_obj_name in h5_dest_grp.keys():
-                h5_new_obj = h5_dest_grp[link_obj_name]
-                warn('An object with the same name: {} already exists in the '
-                     'destination group: {}'.format(h5_new_obj, h5_dest_grp.name))
-                if type(h5_dest_grp[link_obj_name]) != type(h5_orig_obj):
-                    mesg = 'Destination parent: {} already has a child named' \
-                           ' {} that is of type: {} which does not match ' \
-                           'with that of the object linked with the source ' \
-                           'dataset: {}'.format(h5_dest_grp, link_obj_name,
-                                                type(h5_orig_obj),
-                                                type(h5_new_obj))
-                    raise TypeError(mesg)
-
-                elif isinstance(h5_new_obj, h5py.Dataset):
-                    _ = copy_dataset(h5_orig_obj, h5_dest_grp,
-                                     alias=link_obj_name, verbose=verbose)
-                    h5_dest.attrs[link_obj_name] = h5_new_obj.ref
-                    continue
-                elif isinstance(h5_new_obj, h5py.Group):
-                    raise ValueError('Destination already contains another '
-                                     'HDF5 group: {} with the same name as '
-                                     'the source: {}'.format(h5_new_obj,
-                                                             h5_orig_obj))
-                else:
-                    raise NotImplementedError('Unable to copy {} objects yet'
-                                              '. Contact developer if you need'
-                                              ' this'
-                                              ''.format(type(h5_orig_obj)))
-            else:
-                if isinstance(h5_orig_obj, h5py.Dataset):
-                    h5_new_obj = copy_dataset(h5_orig_obj, h5_dest_grp,
-                                              alias=link_obj_name,
-                                              verbose=verbose)
-                    h5_dest.attrs[link_obj_name] = h5_new_obj.ref
-                else:
-                    raise NotImplementedError('Unable to copy {} objects yet'
-                                              '. Contact developer if you need'
-                                              ' this'.format(type(h5_orig_obj)))
+    # Only the links of the source are followed. Its members are not copied
+    nodes = _resolve_object_graph([h5_source],
+                                  dest_fileno=_object_key(h5_dest)[0],
+                                  include_members=False)
+    if verbose:
+        print('Resolved {} objects linked to {}'.format(len(nodes) - 1,
+                                                        h5_source))
+    _copy_object_graph(nodes, h5_dest_grp, {_object_key(h5_source): h5_dest},
+                       verbose=verbose)
 
 
 def copy_region_refs(h5_source, h5_target):
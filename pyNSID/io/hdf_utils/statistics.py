@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming statistics and histograms of datasets, cached for reuse
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import h5py
+import numpy as np
+
+from .base import get_block_shape, iter_block_slices
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['compute_statistics', 'get_statistics', 'get_contrast_limits']
+
+_STATISTICS_SUFFIX = '_statistics'
+_STAT_NAMES = ['min', 'max', 'mean', 'std', 'count']
+
+# Statistics that are not stored in the file of their dataset
+_MEMORY_CACHE = OrderedDict()
+_MEMORY_CACHE_SIZE = 64
+_MEMORY_CACHE_LOCK = threading.Lock()
+
+
+def _iter_blocks(h5_dset, max_mem_mb):
+    block_shape = get_block_shape(h5_dset.shape,
+                                  np.dtype(h5_dset.dtype).itemsize,
+                                  int(max_mem_mb * 1024 ** 2),
+                                  chunks=getattr(h5_dset, 'chunks', None))
+    for block in iter_block_slices(h5_dset.shape, block_shape):
+        data = np.asarray(h5_dset[block])
+        if np.iscomplexobj(data):
+            data = np.abs(data)
+        data = data[np.isfinite(data)]
+        yield data.astype(np.float64)
+
+
+def compute_statistics(h5_dset, bins=1024, max_mem_mb=64):
+    """
+    Computes the extrema, mean, standard deviation and histogram of a
+    dataset in two streaming passes, holding at most a block of about
+    `max_mem_mb` in memory. Blocks are aligned with the chunks of the
+    dataset. Non-finite values are ignored and the magnitude of complex
+    values is used.
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset or numpy.ndarray
+        Dataset of interest
+    bins : int, optional. Default = 1024
+        Number of bins of the histogram, spanning the minimum to the maximum
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+
+    Returns
+    -------
+    stats : dict
+        'min', 'max', 'mean', 'std' and 'count' of the finite values, the
+        'histogram' counts and the 'bin_edges'
+    """
+    count = 0
+    total = 0.
+    squares = 0.
+    low, high = np.inf, -np.inf
+    for data in _iter_blocks(h5_dset, max_mem_mb):
+        if data.size == 0:
+            continue
+        count += data.size
+        total += data.sum()
+        squares += np.square(data).sum()
+        low = min(low, data.min())
+        high = max(high, data.max())
+
+    histogram = np.zeros(int(bins), dtype=np.int64)
+    if count == 0:
+        low, high = np.nan, np.nan
+        bin_edges = np.full(int(bins) + 1, np.nan)
+        mean, std = np.nan, np.nan
+    else:
+        bin_edges = np.linspace(low, high if high > low else low + 1,
+                                int(bins) + 1)
+        for data in _iter_blocks(h5_dset, max_mem_mb):
+            histogram += np.histogram(data, bins=bin_edges)[0]
+        mean = total / count
+        std = np.sqrt(max(0., squares / count - mean ** 2))
+    return {'min': float(low), 'max': float(high), 'mean': float(mean),
+            'std': float(std), 'count': int(count), 'histogram': histogram,
+            'bin_edges': bin_edges}
+
+
+def get_statistics(h5_dset, bins=1024, persist=False, recompute=False,
+                   max_mem_mb=64):
+    """
+    Returns the statistics of a dataset, computing them with
+    :func:`compute_statistics` only if they were not computed before.
+
+    Statistics are kept in memory. With `persist`, they are instead stored in
+    a side dataset named '<dataset name>_statistics' next to `h5_dset`, which
+    holds the histogram and bin edges and carries the other statistics as
+    attributes, unless the file was opened as read-only. Statistics stored
+    earlier are always read back.
+
+    Notes
+    -----
+    Stored statistics are not updated when `h5_dset` is modified. Use
+    `recompute` to refresh them.
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset
+        Dataset of interest
+    bins : int, optional. Default = 1024
+        Number of bins of the histogram
+    persist : bool, optional. Default = False
+        Whether or not to write the statistics to the file of `h5_dset`
+    recompute : bool, optional. Default = False
+        Whether or not to ignore and replace stored statistics
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+
+    Returns
+    -------
+    stats : dict
+        See :func:`compute_statistics`
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    h5_parent = h5_dset.parent
+    name = h5_dset.name.split('/')[-1] + _STATISTICS_SUFFIX
+    key = (os.path.abspath(h5_dset.file.filename), h5_parent.name, name,
+           int(bins))
+
+    if not recompute:
+        h5_stats = h5_parent.get(name)
+        if isinstance(h5_stats, h5py.Dataset) and \
+                h5_stats.shape == (2, int(bins) + 1):
+            stats = dict((stat, h5_stats.attrs[stat]) for stat in _STAT_NAMES)
+            stats['histogram'] = h5_stats[0, :-1].astype(np.int64)
+            stats['bin_edges'] = h5_stats[1]
+            return stats
+        with _MEMORY_CACHE_LOCK:
+            if key in _MEMORY_CACHE:
+                _MEMORY_CACHE.move_to_end(key)
+                return _MEMORY_CACHE[key]
+
+    stats = compute_statistics(h5_dset, bins=bins, max_mem_mb=max_mem_mb)
+    if persist and h5_dset.file.mode == 'r+':
+        if name in h5_parent:
+            del h5_parent[name]
+        # Counts are padded to the length of the bin edges
+        table = np.vstack([np.append(stats['histogram'], 0),
+                           stats['bin_edges']])
+        h5_stats = h5_parent.create_dataset(name, data=table)
+        h5_stats.attrs['statistics_of'] = h5_dset.name.split('/')[-1]
+        for stat in _STAT_NAMES:
+            h5_stats.attrs[stat] = stats[stat]
+    else:
+        with _MEMORY_CACHE_LOCK:
+            _MEMORY_CACHE[key] = stats
+            _MEMORY_CACHE.move_to_end(key)
+            while len(_MEMORY_CACHE) > _MEMORY_CACHE_SIZE:
+                _MEMORY_CACHE.popitem(last=False)
+    return stats
+
+
+def get_contrast_limits(h5_dset, percentiles=(0.5, 99.5), **kwargs):
+    """
+    Returns display limits that clip the given percentiles of the values of
+    a dataset, using its stored or cached histogram. See
+    :func:`get_statistics`. The histogram of objects other than
+    h5py.Datasets, such as lazy views of datasets, is computed on each call
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset or array-like
+        Dataset of interest
+    percentiles : tuple of float, optional. Default = (0.5, 99.5)
+        Lower and upper percentiles of the values
+    kwargs : dict
+        Passed on to :func:`get_statistics` or :func:`compute_statistics`
+
+    Returns
+    -------
+    limits : tuple of float
+        Lower and upper limit, accurate to the width of a histogram bin
+    """
+    if isinstance(h5_dset, h5py.Dataset):
+        stats = get_statistics(h5_dset, **kwargs)
+    else:
+        stats = compute_statistics(h5_dset, bins=kwargs.get('bins', 1024),
+                                   max_mem_mb=kwargs.get('max_mem_mb', 64))
+    if stats['count'] == 0:
+        return np.nan, np.nan
+    cumulative = np.cumsum(stats['histogram']) / stats['count']
+    low, high = [min(int(np.searchsorted(cumulative, percentile / 100.)),
+                     len(cumulative) - 1) for percentile in percentiles]
+    # Whole bins are kept within the limits
+    return float(stats['bin_edges'][low]), float(stats['bin_edges'][high + 1])
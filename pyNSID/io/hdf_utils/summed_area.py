@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Summed-area tables of spectrum images for constant-time binned spectra
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+
+import h5py
+import numpy as np
+
+from sidpy.base.num_utils import contains_integers
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['write_summed_area_table', 'get_summed_area_table',
+           'get_binned_spectrum']
+
+_TABLE_SUFFIX = '_summed_area'
+# Upper bound on the size of the chunks of tables
+_CHUNK_BYTES = 1024 ** 2
+
+
+def _validate_dims(h5_dset, spatial_dims, spectral_dim):
+    if len(h5_dset.shape) != 3:
+        raise ValueError('Summed-area tables can only be built for three '
+                         'dimensional datasets')
+    all_dims = list(spatial_dims) + [spectral_dim]
+    if len(spatial_dims) != 2 or not contains_integers(all_dims, min_val=0) \
+            or max(all_dims) > 2 or len(set(all_dims)) != 3:
+        raise ValueError('spatial_dims and spectral_dim should be three '
+                         'distinct dimensions of h5_dset')
+    return sorted(int(dim) for dim in spatial_dims), int(spectral_dim)
+
+
+def write_summed_area_table(h5_dset, spatial_dims, spectral_dim,
+                            max_mem_mb=64):
+    """
+    Builds the summed-area table, or integral image, of a spectrum image
+    without loading it into memory and stores it in a side dataset named
+    '<dataset name>_summed_area' next to it. An object reference to the side
+    dataset is written to the 'summed_area_table' attribute of `h5_dset`.
+    Existing tables are overwritten.
+
+    Element (i, j) of the table holds the sum of the spectra of all pixels
+    before row i and column j, so that the sum over any rectangle follows
+    from four spectra of the table. See :func:`get_binned_spectrum`.
+
+    Notes
+    -----
+    The table has one more row and column than the spatial dimensions of
+    `h5_dset`, which are stored in ascending order followed by the spectral
+    dimension. Chunks hold whole spectra of square tiles of up to 16 x 16
+    pixels, capped at about 1 MB. The table is accumulated and stored in
+    float64 (complex128 for complex data), so that differences of large sums
+    keep their precision. It therefore takes about 8 bytes per value of
+    `h5_dset`, or twice as much as single precision data. Stored tables
+    describe the data at the time they were computed. Call this function
+    again after modifying `h5_dset`.
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Three dimensional spectrum image. Its file must be writable
+    spatial_dims : list of int
+        Indices of the two spatial dimensions
+    spectral_dim : int
+        Index of the spectral dimension
+    max_mem_mb : float, optional. Default = 64
+        Upper bound on the size of the blocks read in MB
+
+    Returns
+    -------
+    h5_table : :class:`h5py.Dataset`
+        Side dataset holding the table
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    spatial_dims, spectral_dim = _validate_dims(h5_dset, spatial_dims,
+                                                spectral_dim)
+    order = spatial_dims + [spectral_dim]
+    size_x, size_y, size_e = [h5_dset.shape[dim] for dim in order]
+    acc_dtype = np.complex128 if h5_dset.dtype.kind == 'c' else np.float64
+    itemsize = np.dtype(acc_dtype).itemsize
+
+    # Blocks span whole columns so that each row of the table is finished in
+    # one step. Rows are accumulated from the previous row of the table
+    max_bytes = int(max_mem_mb * 1024 ** 2)
+    spec_step = max(1, min(size_e, max_bytes // (size_y * itemsize)))
+    row_step = max(1, max_bytes // (size_y * spec_step * itemsize))
+
+    # A chunk per spectrum would make the chunk index as large as the image
+    tile = int(np.sqrt(_CHUNK_BYTES // (size_e * itemsize)))
+    tile = max(1, min(16, tile))
+    chunks = (min(tile, size_x + 1), min(tile, size_y + 1), size_e)
+
+    h5_parent = h5_dset.parent
+    name = h5_dset.name.split('/')[-1] + _TABLE_SUFFIX
+    if name in h5_parent:
+        del h5_parent[name]
+    h5_table = h5_parent.create_dataset(name, shape=(size_x + 1, size_y + 1,
+                                                     size_e),
+                                        dtype=acc_dtype, chunks=chunks,
+                                        fillvalue=0)
+    for spec_start in range(0, size_e, spec_step):
+        spec_stop = min(size_e, spec_start + spec_step)
+        carry = np.zeros((size_y, spec_stop - spec_start), dtype=acc_dtype)
+        for row_start in range(0, size_x, row_step):
+            row_stop = min(size_x, row_start + row_step)
+            selection = [None] * 3
+            selection[spatial_dims[0]] = slice(row_start, row_stop)
+            selection[spatial_dims[1]] = slice(None)
+            selection[spectral_dim] = slice(spec_start, spec_stop)
+            block = np.asarray(h5_dset[tuple(selection)])
+            block = np.transpose(block, order)
+            block = np.cumsum(np.cumsum(block, axis=1, dtype=acc_dtype),
+                              axis=0) + carry
+            h5_table[row_start + 1: row_stop + 1, 1:,
+                     spec_start: spec_stop] = block
+            carry = block[-1]
+
+    h5_table.attrs['summed_area_of'] = h5_dset.name.split('/')[-1]
+    h5_table.attrs['spatial_dims'] = np.array(spatial_dims, dtype=np.int64)
+    h5_table.attrs['spectral_dim'] = spectral_dim
+    h5_dset.attrs['summed_area_table'] = h5_table.ref
+    return h5_table
+
+
+def get_summed_area_table(h5_dset, spatial_dims=None, spectral_dim=None):
+    """
+    Returns the table previously stored with :func:`write_summed_area_table`
+
+    Parameters
+    ----------
+    h5_dset : :class:`h5py.Dataset`
+        Dataset of interest
+    spatial_dims : list of int, optional
+        Spatial dimensions the table should have been built for, in any order
+    spectral_dim : int, optional
+        Spectral dimension the table should have been built for
+
+    Returns
+    -------
+    h5_table : :class:`h5py.Dataset` or None
+        Stored table. None if no valid table was found
+    """
+    if not isinstance(h5_dset, h5py.Dataset):
+        raise TypeError('h5_dset should be a h5py.Dataset object')
+    h5_table = None
+    if 'summed_area_table' in h5_dset.attrs:
+        ref = h5_dset.attrs['summed_area_table']
+        if isinstance(ref, h5py.Reference) and ref:
+            h5_table = h5_dset.file[ref]
+    if h5_table is None:
+        h5_table = h5_dset.parent.get(h5_dset.name.split('/')[-1] +
+                                      _TABLE_SUFFIX)
+    if not isinstance(h5_table, h5py.Dataset) or \
+            'spatial_dims' not in h5_table.attrs:
+        return None
+    stored_dims = [int(dim) for dim in h5_table.attrs['spatial_dims']]
+    stored_spec = int(h5_table.attrs['spectral_dim'])
+    if spatial_dims is not None and sorted(spatial_dims) != stored_dims:
+        return None
+    if spectral_dim is not None and int(spectral_dim) != stored_spec:
+        return None
+    expected = tuple(h5_dset.shape[dim] + 1 for dim in stored_dims) + \
+        (h5_dset.shape[stored_spec],)
+    if h5_table.shape != expected:
+        return None
+    return h5_table
+
+
+def _read_rectangle(h5_table, start, stop):
+    ranges = []
+    for first, last, size in zip(start, stop, h5_table.shape[:2]):
+        first, last, _ = slice(int(first), int(last)).indices(size - 1)
+        if last <= first:
+            raise ValueError('The rectangle of pixels: {} to {} is empty'
+                             ''.format(list(start), list(stop)))
+        ranges.append((first, last))
+    (x_0, x_1), (y_0, y_1) = ranges
+    spectrum = h5_table[x_1, y_1] - h5_table[x_0, y_1] - \
+        h5_table[x_1, y_0] + h5_table[x_0, y_0]
+    return spectrum, (x_1 - x_0) * (y_1 - y_0)
+
+
+def get_binned_spectrum(h5_table, start, stop, reduction='mean'):
+    """
+    Sums or averages the spectra within rectangles of pixels by reading
+    four spectra of a summed-area table per rectangle, irrespective of the
+    size of the rectangles.
+
+    Parameters
+    ----------
+    h5_table : :class:`h5py.Dataset`
+        Table returned by :func:`get_summed_area_table`
+    start : array-like of int
+        First pixel of the rectangle along each spatial dimension, in
+        ascending order of the dimensions of the spectrum image. Provide an
+        array of shape (N, 2) to extract N spectra at once
+    stop : array-like of int
+        Pixel at which the rectangle stops along each spatial dimension.
+        Same shape as `start`
+    reduction : str, optional. Default = 'mean'
+        'sum' or 'mean'
+
+    Returns
+    -------
+    spectrum : numpy.ndarray
+        Summed or averaged spectrum, or array of shape (N, spectral size)
+        holding one spectrum per rectangle
+    """
+    if reduction not in ['sum', 'mean']:
+        raise ValueError("reduction should be 'sum' or 'mean'")
+    start = np.asarray(start)
+    stop = np.asarray(stop)
+    if start.shape != stop.shape or start.shape[-1:] != (2,) or \
+            start.ndim > 2:
+        raise ValueError('start and stop should be arrays of shape (2,) or '
+                         '(N, 2)')
+    spectra = []
+    for first, last in zip(np.atleast_2d(start), np.atleast_2d(stop)):
+        spectrum, num_pixels = _read_rectangle(h5_table, first, last)
+        if reduction == 'mean':
+            spectrum = spectrum / num_pixels
+        spectra.append(spectrum)
+    if start.ndim == 1:
+        return spectra[0]
+    return np.array(spectra)
@@ -6,7 +6,6 @@ from warnings import warn
 import h5py
 import numpy as np
 import dask.array as da
-import matplotlib.pyplot as plt
 
 
 from sidpy.hdf.hdf_utils import get_attr
@@ -18,11 +17,10 @@ from sidpy.hdf.dtype_utils import is_complex_dtype
 from sidpy.sid import Dimension
 ## taken out temporarily
 from sidpy.hdf.dtype_utils import flatten_to_real
-from sidpy.viz.jupyter_utils import simple_ndim_visualizer
-from sidpy.viz.plot_utils import plot_map, get_plot_grid_size
 
 from .hdf_utils import check_if_main, create_results_group, link_as_main, write_main_dataset, copy_attributes
-from ..viz.plot_nsid import plot_stack, plot_spectrum_image, plot_curve, plot_image
+from .hdf_utils.profile import get_line_profile
+from .derived import ComponentView
 
 if sys.version_info.major == 3:
     unicode = str
@@ -52,6 +50,10 @@ class NSIDataset(h5py.Dataset):
             returns the labels of the dimensions
         self.get_dimens_types()
             returns dictionary of dimension_types (keys) with the axis numbers as values
+        self.get_component(component, unwrap_axis):
+            returns a lazy real valued view of the real or imaginary part, magnitude or phase
+        self.get_line_profile(points, width):
+            returns the values along a line or polyline in physical coordinates
         self.visualize(slice):
             not tested
             basic visualization of dataset based on dimension_types and slice (optional)
@@ -73,7 +75,8 @@ class NSIDataset(h5py.Dataset):
         self.dimension_types: list of str
             The dimension_types (supported is 'spatial', 'spectral', 'reciprocal' and 'time') for the dimensional axes.
         self.axes_first_pixels: list of int
-            A list of the sizes of first pixel of each  dimension.
+            A list of the sizes of first pixel of each  dimension. None for dimensions whose
+            scale is not numeric.
 
     """
 
@@ -93,7 +96,11 @@ class NSIDataset(h5py.Dataset):
             units.append(get_attr(dim[0],'units'))
             quantities.append(get_attr(dim[0],'quantity'))
             dimension_types.append(get_attr(dim[0],'dimension_type'))
-            pixel_sizes.append(abs(dim[0][1]-dim[0][0]))
+            # Scales of labels or other non-numeric values have no pixel size
+            if np.issubdtype(dim[0].dtype, np.number) and dim[0].shape[0] > 1:
+                pixel_sizes.append(abs(dim[0][1]-dim[0][0]))
+            else:
+                pixel_sizes.append(None)
         self.axes_units = units
         self.axes_quantities = quantities
         self.dimension_types = dimension_types
@@ -101,6 +108,37 @@ class NSIDataset(h5py.Dataset):
 
         self.data_descriptor = '{} ({})'.format(get_attr(self, 'quantity'), get_attr(self, 'units'))
 
+    @staticmethod
+    def from_file(file_path, dset_path, mode='r', pool=None):
+        """
+        Returns a Main dataset from a file held open by a pool of file handles, so that
+        repeatedly opening datasets of the same file costs a dictionary lookup
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the HDF5 file
+        dset_path : str
+            Absolute path of the Main dataset within the file
+        mode : str, optional. Default = 'r'
+            'r', 'r+' or 'a'
+        pool : pyNSID.io.H5FilePool, optional
+            Pool holding the file handle. Default - the pool shared across pyNSID,
+            see :func:`pyNSID.io.file_pool.get_default_pool`
+
+        Returns
+        -------
+        h5_main : NSIDataset
+            Main dataset. Its file is owned by the pool and must not be closed directly
+        """
+        if pool is None:
+            from .file_pool import get_default_pool
+            pool = get_default_pool()
+        h5_main = pool.get_dataset(file_path, dset_path, mode=mode)
+        if not isinstance(h5_main, NSIDataset):
+            raise TypeError('{} in {} is not a Main dataset'.format(dset_path, file_path))
+        return h5_main
+
 
     def get_dimension_labels(self):
         """
@@ -132,6 +170,60 @@ class NSIDataset(h5py.Dataset):
             dim_type_dict[dim_type].append(dim)
         return dim_type_dict
 
+    def get_component(self, component='magnitude', unwrap_axis=None, max_mem_mb=64):
+        """
+        Returns a lazy view of a real valued component of this dataset. Only the region
+        being read is computed, block by block. See :class:`pyNSID.io.derived.ComponentView`
+
+        Parameters
+        ----------
+        component : str, optional. Default = 'magnitude'
+            'real', 'imag', 'magnitude' or 'phase' (in radians)
+        unwrap_axis : int, optional
+            Axis along which the phase is unwrapped. Default - not unwrapped
+        max_mem_mb : float, optional. Default = 64
+            Upper bound on the size of the blocks read in MB
+
+        Returns
+        -------
+        view : :class:`pyNSID.io.derived.ComponentView`
+            Behaves like a real valued array with the metadata of this dataset
+        """
+        return ComponentView(self, component=component, unwrap_axis=unwrap_axis,
+                             max_mem_mb=max_mem_mb)
+
+    def get_line_profile(self, points, width=1, num_samples=None, spatial_dims=None, indices=None):
+        """
+        Samples this dataset along a line or polyline given in the physical coordinates of the
+        dimension scales, reading only the chunks the line crosses.
+        See :func:`pyNSID.io.hdf_utils.get_line_profile`
+
+        Parameters
+        ----------
+        points : array-like
+            Vertices of the path as [[x0, y0], [x1, y1], ...]
+        width : int, optional. Default = 1
+            Width of the profile in pixels, across which values are averaged
+        num_samples : int, optional
+            Number of samples along the path. Default - about one per pixel
+        spatial_dims : list of int, optional
+            The two dimensions of the image. Default - the first two spatial dimensions
+        indices : dict, optional
+            Index at which each of the other dimensions is held, by dimension. Default - index 0
+
+        Returns
+        -------
+        profile : numpy.ndarray
+            1D array of values along the path
+        distance : sidpy.sid.Dimension
+            Distance of each sample from the first vertex along the path
+        """
+        if spatial_dims is None:
+            dim_types = dict((str(key).lower(), val) for key, val in self.get_dimens_types().items())
+            spatial_dims = dim_types.get('spatial', dim_types.get('reciprocal', []))[:2]
+        return get_line_profile(self, points, spatial_dims, width=width, num_samples=num_samples,
+                                indices=indices)
+
     def __repr__(self):
         h5_str = super(NSIDataset, self).__repr__()
 
@@ -189,7 +281,11 @@ class NSIDataset(h5py.Dataset):
             Axis within which the data was plotted. Note - the interactive visualizer does not return this object
         """
 
-        dim_type_dict = self.get_dimens_types()
+        # Plotting is imported on first use so that reading data does not load matplotlib
+        from ..viz.plot_nsid import plot_stack, plot_spectrum_image, plot_curve, plot_image, plot_volume
+
+        ## dimension types may be stored in upper case
+        dim_type_dict = dict((str(key).lower(), val) for key, val in self.get_dimens_types().items())
         output_reference = None
         data_slice = self
         if 'spatial' in dim_type_dict:
@@ -219,6 +315,9 @@ class NSIDataset(h5py.Dataset):
                         return self.view.fig, self.view.axes
                 else:
                     print('visualization not implemented, yet')
+            elif len(dim_type_dict['spatial'])== 3 and len(dim_type_dict) == 1:
+                ## volume, shown as orthogonal slices
+                self.view = plot_volume(self, dim_type_dict)
             else:
                 print('visualization not implemented, yet')
 
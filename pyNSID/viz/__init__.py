@@ -8,8 +8,30 @@ Submodules
     :toctree: _autosummary
 
     plot_nsid
+    frame_reader
+    tile_reader
+    curve_reader
+    slice_reader
+    render
+    movie
+    blitting
+    quantize
 
 """
-from . import plot_nsid
+from . import plot_nsid, frame_reader, tile_reader, curve_reader, slice_reader, render, movie, blitting, quantize
+from .frame_reader import FrameReader
+from .tile_reader import TileReader
+from .curve_reader import CurveReader
+from .slice_reader import SliceReader
+from .render import render_files
+from .movie import export_movie
+from .blitting import BlitManager, FrameTimer
+from .quantize import DisplayQuantizer
 
-__all__ = ['plot_nsid']
+__all__ = ['plot_nsid', 'frame_reader', 'FrameReader',
+           'tile_reader', 'TileReader', 'curve_reader', 'CurveReader',
+           'slice_reader', 'SliceReader',
+           'render', 'render_files',
+           'movie', 'export_movie',
+           'blitting', 'BlitManager', 'FrameTimer',
+           'quantize', 'DisplayQuantizer']
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Fast redrawing of the changing parts of interactive figures and timing of
+their updates
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+import time
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['FrameTimer', 'BlitManager']
+
+
+class FrameTimer(object):
+    """
+    Counts the updates of an interactive figure and the time spent reading
+    data for them and drawing them
+
+    Attributes
+    ----------
+    num_frames : int
+        Number of updates drawn
+    frame_time : float
+        Total time in seconds from requesting updates until they were drawn
+    last_frame_time : float
+        Time in seconds taken by the most recent update
+    num_fetches : int
+        Number of reads of data
+    fetch_time : float
+        Total time in seconds spent reading data
+    last_fetch_time : float
+        Time in seconds taken by the most recent read
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Sets all counters to zero
+        """
+        self.num_frames = 0
+        self.frame_time = 0.
+        self.last_frame_time = 0.
+        self.num_fetches = 0
+        self.fetch_time = 0.
+        self.last_fetch_time = 0.
+
+    def add_frame(self, seconds):
+        """
+        Records the time taken to draw an update
+        """
+        self.num_frames += 1
+        self.frame_time += seconds
+        self.last_frame_time = seconds
+
+    def add_fetch(self, seconds):
+        """
+        Records the time taken to read data for an update
+        """
+        self.num_fetches += 1
+        self.fetch_time += seconds
+        self.last_fetch_time = seconds
+
+    def summary(self):
+        """
+        Returns the mean times per update
+
+        Returns
+        -------
+        summary : dict
+            'num_frames', 'mean_frame_time', 'frames_per_second',
+            'num_fetches' and 'mean_fetch_time'. Times are in seconds
+        """
+        mean_frame = self.frame_time / self.num_frames if self.num_frames else 0.
+        mean_fetch = self.fetch_time / self.num_fetches if self.num_fetches else 0.
+        return {'num_frames': self.num_frames,
+                'mean_frame_time': mean_frame,
+                'frames_per_second': 1. / mean_frame if mean_frame > 0 else 0.,
+                'num_fetches': self.num_fetches,
+                'mean_fetch_time': mean_fetch}
+
+
+class BlitManager(object):
+    """
+    Redraws only a given set of artists of a figure on top of a cached
+    background, instead of the whole figure.
+
+    The background is captured every time the whole figure is drawn, for
+    example after resizing or zooming. Canvases that cannot blit, and
+    updates requested before the figure was first drawn, fall back to
+    :meth:`draw_idle` on the whole figure.
+
+    Notes
+    -----
+    Artists handed to the manager are made animated. They are therefore not
+    part of the background, except for images, which matplotlib always draws.
+    Axes may be given to redraw everything they contain, for example the
+    axes of a slider.
+
+    >>> manager = BlitManager(fig, [image, line], timer=FrameTimer())
+    >>> image.set_data(frame)
+    >>> manager.update()
+    """
+
+    def __init__(self, fig, artists=None, blit=True, timer=None):
+        """
+        Parameters
+        ----------
+        fig : matplotlib.figure.Figure
+            Figure holding the artists
+        artists : list of matplotlib.artist.Artist, optional
+            Artists that change between updates
+        blit : bool, optional. Default = True
+            Whether or not to blit on canvases that support it
+        timer : FrameTimer, optional
+            Records the time taken by each update
+        """
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.blit = bool(blit) and getattr(self.canvas, 'supports_blit', False)
+        self.timer = timer
+        self.artists = []
+        self._background = None
+        self._requested = None
+        for artist in artists or []:
+            self.add_artist(artist)
+        self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def add_artist(self, artist):
+        """
+        Adds an artist to redraw on every update
+        """
+        if self.blit:
+            artist.set_animated(True)
+        self.artists.append(artist)
+
+    def _draw_animated(self):
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+    def _on_draw(self, event):
+        if event is not None and event.canvas is not self.canvas:
+            return
+        if self.blit:
+            self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+            self._draw_animated()
+        if self._requested is not None:
+            if self.timer is not None:
+                self.timer.add_frame(time.perf_counter() - self._requested)
+            self._requested = None
+
+    def update(self):
+        """
+        Redraws the artists, or requests a draw of the whole figure
+        """
+        start = time.perf_counter()
+        if not self.blit or self._background is None:
+            # Timed until the figure is drawn
+            if self._requested is None:
+                self._requested = start
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+        if self.timer is not None:
+            self.timer.add_frame(time.perf_counter() - start)
+
+    def disconnect(self):
+        """
+        Stops capturing the background
+        """
+        self.canvas.mpl_disconnect(self._cid)
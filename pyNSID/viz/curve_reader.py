@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Resolution-aware reading of ranges of very long curves for display
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+
+import h5py
+import numpy as np
+
+from ..io.hdf_utils.decimation import compute_minmax, compute_minmax_levels, \
+    get_minmax_pyramid, write_minmax_pyramid
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['CurveReader']
+
+
+class CurveReader(object):
+    """
+    Reads ranges of a long one dimensional dataset as at most about two
+    points per display pixel. Each display pixel gets the minimum and the
+    maximum of the samples it covers, so that peaks are never lost. These
+    come from the finest level of a multi-resolution min / max summary (see
+    :func:`pyNSID.io.hdf_utils.write_minmax_pyramid`) that is still coarse
+    enough, or from the samples themselves for short ranges. The cost of a
+    read therefore depends on the width of the display rather than the
+    length of the dataset.
+
+    Notes
+    -----
+    Ranges are given in samples. The x values are taken from the dimension
+    scale of the dataset if it has one, at the first sample of each bucket.
+    Scales are assumed to be monotonic.
+
+    >>> reader = CurveReader(h5_main)
+    >>> x, y = reader.read_range(0, len(h5_main), 800)
+    """
+
+    def __init__(self, dset, pyramid=None):
+        """
+        Parameters
+        ----------
+        dset : h5py.Dataset, pyNSID.io.derived.ComponentView or numpy.ndarray
+            One dimensional dataset with real values
+        pyramid : bool, optional. Default = None
+            None to use the summary stored with `dset`, computing it in one
+            pass and keeping it in memory if needed. True to also store the
+            computed summary if the file of `dset` is writable. False to
+            always read from `dset`
+        """
+        if len(dset.shape) != 1:
+            raise ValueError('dset should be one dimensional')
+        self.dset = dset
+        self.length = dset.shape[0]
+
+        self.scale = None
+        dims = getattr(dset, 'dims', None)
+        if dims is not None and len(dims[0]) > 0 and \
+                dims[0][0].shape == (self.length,):
+            self.scale = dims[0][0]
+
+        self.levels = []
+        if pyramid is not False:
+            if isinstance(dset, h5py.Dataset):
+                self.levels = get_minmax_pyramid(dset)
+                if len(self.levels) == 0 and pyramid and \
+                        dset.file.mode == 'r+':
+                    write_minmax_pyramid(dset)
+                    self.levels = get_minmax_pyramid(dset)
+            if len(self.levels) == 0:
+                self.levels = compute_minmax_levels(dset)
+        self._coarse = None
+
+    def _x_values(self, start, stop, step=1):
+        if self.scale is None:
+            return np.arange(start, stop, step, dtype=np.float64)
+        return np.asarray(self.scale[start:stop:step], dtype=np.float64)
+
+    def read_range(self, start, stop, num_buckets):
+        """
+        Reads the samples in a range at the resolution needed to display them
+        in about `num_buckets` pixels
+
+        Parameters
+        ----------
+        start : int
+            First sample
+        stop : int
+            Sample at which to stop
+        num_buckets : int
+            Number of display pixels
+
+        Returns
+        -------
+        x : numpy.ndarray
+            x values of the points
+        y : numpy.ndarray
+            Samples, or alternating minima and maxima of buckets of samples
+        """
+        start = int(np.clip(np.floor(start), 0, self.length - 1))
+        stop = int(np.clip(np.ceil(stop), start + 1, self.length))
+        bucket = (stop - start) // max(1, int(num_buckets))
+        if bucket <= 1:
+            return self._x_values(start, stop), \
+                np.asarray(self.dset[start:stop], dtype=np.float64)
+
+        level = None
+        for level_bucket, level_data in self.levels:
+            if level_bucket <= bucket:
+                level = (level_bucket, level_data)
+        if level is None:
+            # Short ranges are summarized from the samples
+            minmax = compute_minmax(self.dset, bucket, start, stop)
+            x = self._x_values(start, stop, bucket)
+        else:
+            level_bucket, level_data = level
+            # Buckets of the level are combined into buckets of about the
+            # requested size
+            ratio = bucket // level_bucket
+            bucket = ratio * level_bucket
+            first, last = start // bucket, -(-stop // bucket)
+            minmax = np.asarray(level_data[first * ratio:last * ratio])
+            if ratio > 1:
+                starts = np.arange(0, len(minmax), ratio)
+                minmax = np.stack([np.fmin.reduceat(minmax[:, 0], starts),
+                                   np.fmax.reduceat(minmax[:, 1], starts)],
+                                  axis=1)
+            x = self._x_values(first * bucket, stop, bucket)
+        # Vertical segments from the minimum to the maximum of each bucket
+        return np.repeat(x, 2), minmax.ravel()
+
+    def index_of(self, value):
+        """
+        Returns the fractional sample index of an x value
+
+        Parameters
+        ----------
+        value : float
+            x value in the units of the dimension scale
+
+        Returns
+        -------
+        index : float
+        """
+        if self.scale is None:
+            return float(value)
+        if self._coarse is None:
+            step = max(1, self.length // 4096)
+            self._coarse = (step, self._x_values(0, self.length, step))
+        step, coarse = self._coarse
+        sign = -1. if coarse[-1] < coarse[0] else 1.
+        # Bracket the value with the coarse samples, then read only the bracket
+        position = int(np.searchsorted(sign * coarse, sign * value))
+        first = max(0, (position - 1) * step)
+        last = min(self.length, position * step + 1)
+        fine = self._x_values(first, last)
+        if len(fine) < 2:
+            return float(first)
+        return first + float(np.interp(sign * value, sign * fine,
+                                       np.arange(len(fine))))
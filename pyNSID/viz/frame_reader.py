@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+On-demand reading, caching and prefetching of frames from image stacks
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+import threading
+from collections import OrderedDict
+
+import h5py
+import numpy as np
+
+from sidpy.base.num_utils import contains_integers
+
+from ..io.hdf_utils.projection import compute_projection, get_projection
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['FrameReader']
+
+
+class FrameReader(object):
+    """
+    Reads two dimensional frames out of a stack one at a time, no matter how
+    the dimensions of the stack are ordered. Only the hyperslab of a single
+    frame is read from the file, so the stack is never loaded in its
+    entirety.
+
+    Frames that were read are kept in a least-recently-used cache. A
+    background thread reads frames ahead of the last requested frame in the
+    direction in which the stack is being traversed, so that scrolling or
+    playing through the stack rarely waits on the file.
+
+    Notes
+    -----
+    Frames are read in the order of the spatial dimensions given to the
+    constructor, i.e. the first spatial dimension is the first axis of each
+    frame. Dimensions that are neither the stack nor spatial dimensions are
+    held at index 0.
+
+    >>> reader = FrameReader(h5_main, stack_dim=2, image_dims=[0, 1])
+    >>> frame = reader.get_frame(10)
+    >>> reader.prefetch(10, direction=1)
+    >>> reader.close()
+    """
+
+    def __init__(self, dset, stack_dim, image_dims, max_mem_mb=256,
+                 prefetch_frames=8, quantizer=None):
+        """
+        Parameters
+        ----------
+        dset : h5py.Dataset, numpy.ndarray or dask.array.core.Array
+            Stack of images with at least three dimensions
+        stack_dim : int
+            Index of the dimension along which frames are stacked
+        image_dims : list of int
+            Indices of the two dimensions of each frame
+        max_mem_mb : float, optional. Default = 256
+            Upper bound on the size of the cached frames in MB. At least one
+            frame is always cached
+        prefetch_frames : int, optional. Default = 8
+            Number of frames to read ahead of the requested frame. Set to 0 to
+            disable prefetching
+        quantizer : pyNSID.viz.quantize.DisplayQuantizer, optional
+            Converts frames to compact display buffers before they are cached
+            and returned by :meth:`get_frame`, so that more frames fit in
+            `max_mem_mb`
+        """
+        if len(dset.shape) < 3:
+            raise ValueError('dset must have at least three dimensions')
+        image_dims = list(image_dims)
+        if len(image_dims) != 2:
+            raise ValueError('image_dims should contain two dimensions')
+        all_dims = [stack_dim] + image_dims
+        if not contains_integers(all_dims, min_val=0) or \
+                max(all_dims) >= len(dset.shape) or len(set(all_dims)) != 3:
+            raise ValueError('stack_dim and image_dims should be three distinct'
+                             ' dimensions of dset')
+        self.dset = dset
+        self.stack_dim = int(stack_dim)
+        self.image_dims = [int(dim) for dim in image_dims]
+        self.num_frames = dset.shape[self.stack_dim]
+        self.frame_shape = tuple(dset.shape[dim] for dim in self.image_dims)
+
+        self.quantizer = quantizer
+        itemsize = np.dtype(dset.dtype).itemsize
+        if quantizer is not None:
+            itemsize = quantizer.dtype.itemsize
+        frame_bytes = int(np.prod(self.frame_shape)) * itemsize
+        self.max_frames = max(1, int(max_mem_mb * 1024 ** 2) // max(1, frame_bytes))
+        self.prefetch_frames = max(0, int(prefetch_frames))
+
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+        self._request = None
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._thread = None
+
+    def _slices(self, index):
+        slices = [0] * len(self.dset.shape)
+        slices[self.stack_dim] = int(index)
+        for dim in self.image_dims:
+            slices[dim] = slice(None)
+        return tuple(slices)
+
+    def read_frame(self, index):
+        """
+        Reads a frame from the stack, bypassing the cache
+
+        Parameters
+        ----------
+        index : int
+            Position of the frame in the stack
+
+        Returns
+        -------
+        frame : numpy.ndarray
+            Two dimensional frame
+        """
+        index = int(index)
+        if not 0 <= index < self.num_frames:
+            raise IndexError('index {} is out of bounds for a stack of {} '
+                             'frames'.format(index, self.num_frames))
+        frame = np.asarray(self.dset[self._slices(index)])
+        if self.image_dims[0] > self.image_dims[1]:
+            frame = frame.T
+        return frame
+
+    def project(self, reduction='mean', start=0, stop=None, persist=False,
+                callback=None, cancel=None):
+        """
+        Sums or averages a range of frames, streaming through the stack in
+        blocks aligned with its chunks. See
+        :func:`pyNSID.io.hdf_utils.get_projection` for how projections of HDF5
+        datasets are stored and reused.
+
+        Parameters
+        ----------
+        reduction : str, optional. Default = 'mean'
+            'sum' or 'mean'
+        start : int, optional. Default = 0
+            First frame to include
+        stop : int, optional. Default = number of frames
+            Frame at which to stop
+        persist : bool, optional. Default = False
+            Whether or not to write the projection to the file of the stack
+            rather than keeping it in memory
+        callback : callable, optional
+            Called with the fraction of the frames processed after each block
+        cancel : threading.Event, optional
+            Stops the computation when set
+
+        Returns
+        -------
+        projection : numpy.ndarray or None
+            Two dimensional projection. None if the computation was cancelled
+        """
+        kwargs = {'start': start, 'stop': stop, 'reduction': reduction,
+                  'callback': callback, 'cancel': cancel}
+        if isinstance(self.dset, h5py.Dataset):
+            projection = get_projection(self.dset, self.stack_dim,
+                                        persist=persist, **kwargs)
+        else:
+            projection = compute_projection(self.dset, self.stack_dim, **kwargs)
+        if projection is None:
+            return None
+        # Dimensions other than those of the frame are held at index 0
+        selection = tuple(slice(None) if dim in self.image_dims else 0
+                          for dim in range(len(self.dset.shape))
+                          if dim != self.stack_dim)
+        projection = projection[selection]
+        if self.image_dims[0] > self.image_dims[1]:
+            projection = projection.T
+        return projection
+
+    def average(self, start=0, stop=None, **kwargs):
+        """
+        Averages a range of frames. See :meth:`project` for the parameters
+
+        Returns
+        -------
+        average : numpy.ndarray or None
+            Two dimensional average. None if the computation was cancelled
+        """
+        return self.project('mean', start=start, stop=stop, **kwargs)
+
+    def _read_cached(self, index):
+        frame = self.read_frame(index)
+        if self.quantizer is not None:
+            frame = self.quantizer.quantize(frame)
+        return frame
+
+    def _store(self, index, frame):
+        self._cache[index] = frame
+        self._cache.move_to_end(index)
+        while len(self._cache) > self.max_frames:
+            self._cache.popitem(last=False)
+
+    def get_frame(self, index):
+        """
+        Returns a frame from the cache, reading it from the stack if needed
+
+        Parameters
+        ----------
+        index : int
+            Position of the frame in the stack
+
+        Returns
+        -------
+        frame : numpy.ndarray
+            Two dimensional frame, quantized if the reader has a quantizer.
+            Treat it as read-only since it is shared with the cache
+        """
+        index = int(index)
+        with self._lock:
+            frame = self._cache.get(index)
+            if frame is not None:
+                self._cache.move_to_end(index)
+                self.hits += 1
+                return frame
+            self.misses += 1
+        frame = self._read_cached(index)
+        with self._lock:
+            self._store(index, frame)
+        return frame
+
+    def is_cached(self, index):
+        """
+        Returns whether or not a frame is cached
+
+        Parameters
+        ----------
+        index : int
+            Position of the frame in the stack
+
+        Returns
+        -------
+        bool
+        """
+        with self._lock:
+            return int(index) in self._cache
+
+    def prefetch(self, index, direction=1):
+        """
+        Asks the background thread to read the frames following `index` in
+        the given direction. Reading wraps around the ends of the stack. A new
+        request supersedes any request that is still being served.
+
+        Parameters
+        ----------
+        index : int
+            Position of the frame currently displayed
+        direction : int, optional. Default = 1
+            1 to read the following frames and -1 to read the preceding frames
+        """
+        if self.prefetch_frames == 0:
+            return
+        direction = 1 if direction >= 0 else -1
+        with self._lock:
+            if self._closed:
+                return
+            self._request = (int(index), direction)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._prefetch_loop,
+                                                name='FrameReader prefetch')
+                self._thread.daemon = True
+                self._thread.start()
+            self._wake.notify()
+
+    def _prefetch_loop(self):
+        while True:
+            with self._lock:
+                while self._request is None and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+                request = self._request
+                self._request = None
+            index, direction = request
+            # Never evict frames that were read ahead for this request
+            ahead = min(self.prefetch_frames, self.max_frames - 1,
+                        self.num_frames - 1)
+            for step in range(1, ahead + 1):
+                with self._lock:
+                    if self._closed or self._request is not None:
+                        break
+                    target = (index + direction * step) % self.num_frames
+                    if target in self._cache:
+                        continue
+                try:
+                    frame = self._read_cached(target)
+                except Exception:
+                    # The file may have been closed. Frames will then be
+                    # read, and the error raised, on request
+                    break
+                with self._lock:
+                    self._store(target, frame)
+
+    def clear(self):
+        """
+        Empties the cache of frames
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        """
+        Stops the prefetching thread and empties the cache
+        """
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.clear()
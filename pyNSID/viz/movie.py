@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming export of image stacks to animated GIFs and image sequences
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import time
+import threading
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+import numpy as np
+import matplotlib
+from PIL import Image, GifImagePlugin
+
+from sidpy.base.string_utils import validate_single_string_arg
+
+from ..io.hdf_utils.statistics import get_contrast_limits
+from .frame_reader import FrameReader
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['export_movie']
+
+_SEQUENCE_FORMATS = ['png', 'tiff']
+
+
+def _get_colormap(cmap):
+    if isinstance(cmap, matplotlib.colors.Colormap):
+        return cmap
+    try:
+        return matplotlib.colormaps[cmap]
+    except AttributeError:
+        # matplotlib < 3.5
+        return matplotlib.cm.get_cmap(cmap)
+
+
+def _bin_frame(frame, bin_factor):
+    if bin_factor == 1:
+        return frame
+    rows = frame.shape[0] // bin_factor * bin_factor
+    cols = frame.shape[1] // bin_factor * bin_factor
+    frame = frame[:rows, :cols]
+    return frame.reshape(rows // bin_factor, bin_factor,
+                         cols // bin_factor, bin_factor).mean(axis=(1, 3))
+
+
+def _read_ahead(reader, indices, bin_factor, queue, cancel):
+    for index in indices:
+        if cancel.is_set():
+            break
+        try:
+            frame = reader.read_frame(index)
+            if np.iscomplexobj(frame):
+                frame = np.abs(frame)
+            item = (index, _bin_frame(frame.astype(np.float32), bin_factor))
+        except Exception as error:
+            item = error
+        queue.put(item)
+        if isinstance(item, Exception):
+            return
+    queue.put(None)
+
+
+class _GifWriter(object):
+    # Writes frames as they arrive. All frames share the palette of the
+    # colormap, so frames are written as indices without any quantization
+    def __init__(self, path, palette, duration, loop):
+        self.file_handle = open(path, mode='wb')
+        self.palette = palette
+        self.duration = duration
+        self.loop = loop
+        self.started = False
+
+    def write(self, indices):
+        # Setting the palette turns the 8-bit grayscale image into indices
+        image = Image.fromarray(indices)
+        image.putpalette(self.palette)
+        params = {'duration': self.duration, 'optimize': False}
+        if not self.started:
+            header, _ = GifImagePlugin.getheader(image, None,
+                                                 {'loop': self.loop,
+                                                  'optimize': False})
+            for fragment in header:
+                self.file_handle.write(fragment)
+            self.started = True
+        for fragment in GifImagePlugin.getdata(image, (0, 0), **params):
+            self.file_handle.write(fragment)
+
+    def close(self):
+        if self.started:
+            self.file_handle.write(b';')
+        self.file_handle.close()
+
+
+def export_movie(h5_main, output_path, stack_dim=None, image_dims=None,
+                 start=0, stop=None, stride=1, bin_factor=1, clim=None,
+                 percentiles=(0.5, 99.5), cmap='viridis', fps=10, loop=0,
+                 sequence_format='png', read_ahead=8, verbose=False):
+    """
+    Writes the frames of an image stack to an animated GIF or to a sequence
+    of image files while holding only a few frames in memory. A background
+    thread reads frames ahead of the writer, one hyperslab at a time.
+
+    Frames are shown as in :class:`pyNSID.viz.plot_nsid.plot_stack`, with the
+    first spatial dimension running horizontally. Unless `clim` is given, the
+    same contrast limits are applied to every frame, taken from percentiles
+    of the values of the whole dataset. The histogram behind these limits is
+    computed once and kept in memory, see
+    :func:`pyNSID.io.hdf_utils.get_statistics`. The file of `h5_main` is not
+    written to.
+
+    Parameters
+    ----------
+    h5_main : pyNSID.NSIDataset, h5py.Dataset or array-like
+        Stack of images. The magnitude of complex values is shown. Pass a
+        view such as ``h5_main.get_component('phase')`` to show other
+        components
+    output_path : str
+        Path of the GIF file if it ends with '.gif'. Otherwise, directory in
+        which the frames are written as 'frame_<index>.<sequence_format>'
+    stack_dim : int, optional
+        Index of the dimension along which frames are stacked. Default - the
+        first time dimension of a NSIDataset
+    image_dims : list of int, optional
+        Indices of the two dimensions of each frame. Default - the spatial
+        dimensions of a NSIDataset
+    start : int, optional. Default = 0
+        First frame to export
+    stop : int, optional. Default = number of frames
+        Frame at which to stop
+    stride : int, optional. Default = 1
+        Step between exported frames
+    bin_factor : int, optional. Default = 1
+        Number of pixels along each side averaged into one pixel of the movie
+    clim : tuple of float, optional
+        Fixed lower and upper contrast limits
+    percentiles : tuple of float, optional. Default = (0.5, 99.5)
+        Percentiles of the values of the dataset used as contrast limits when
+        `clim` is not provided
+    cmap : str or matplotlib.colors.Colormap, optional. Default = 'viridis'
+        Colormap applied to the frames of GIFs and PNG sequences
+    fps : float, optional. Default = 10
+        Frames per second of GIFs
+    loop : int, optional. Default = 0
+        Number of times a GIF is repeated. 0 repeats forever
+    sequence_format : str, optional. Default = 'png'
+        'png' for colormapped images or 'tiff' for the binned values as
+        32-bit floating point images
+    read_ahead : int, optional. Default = 8
+        Maximum number of frames read ahead of the writer
+    verbose : bool, optional. Default = False
+        Whether or not to print a summary
+
+    Returns
+    -------
+    report : dict
+        Number of frames written ('num_frames'), the 'clim' used, the
+        'elapsed_time' in seconds and the frames written per second ('fps')
+    """
+    output_path = validate_single_string_arg(output_path, 'output_path')
+    if stack_dim is None or image_dims is None:
+        if not hasattr(h5_main, 'get_dimens_types'):
+            raise ValueError('stack_dim and image_dims are required for '
+                             'datasets other than NSIDatasets')
+        dim_types = dict((str(key).lower(), val) for key, val
+                         in h5_main.get_dimens_types().items())
+        if stack_dim is None:
+            stack_dims = dim_types.get('time', dim_types.get('temporal'))
+            if not stack_dims:
+                raise ValueError('No time dimension found. Provide stack_dim')
+            stack_dim = stack_dims[0]
+        if image_dims is None:
+            if len(dim_types.get('spatial', [])) < 2:
+                raise ValueError('Fewer than two spatial dimensions found. '
+                                 'Provide image_dims')
+            image_dims = dim_types['spatial'][:2]
+    if sequence_format not in _SEQUENCE_FORMATS:
+        raise ValueError('sequence_format should be one of {}'
+                         ''.format(_SEQUENCE_FORMATS))
+    if int(stride) < 1 or int(bin_factor) < 1:
+        raise ValueError('stride and bin_factor should be positive integers')
+
+    reader = FrameReader(h5_main, stack_dim, image_dims, prefetch_frames=0)
+    indices = list(range(*slice(start, stop, int(stride)).indices(
+        reader.num_frames)))
+    if len(indices) == 0:
+        raise ValueError('The range of frames is empty')
+
+    is_gif = output_path.lower().endswith('.gif')
+    raw = not is_gif and sequence_format == 'tiff'
+    if clim is None and not raw:
+        clim = get_contrast_limits(h5_main, percentiles=percentiles)
+    if clim is not None:
+        clim = (float(clim[0]), float(clim[1]))
+    colormap = _get_colormap(cmap)
+    lut = (colormap(np.linspace(0, 1, 256))[:, :3] * 255).astype(np.uint8)
+
+    if not is_gif and not os.path.isdir(output_path):
+        os.makedirs(output_path)
+    writer = None
+    if is_gif:
+        writer = _GifWriter(output_path, lut.tobytes(),
+                            int(round(1000. / fps)), loop)
+
+    queue = Queue(maxsize=max(1, int(read_ahead)))
+    cancel = threading.Event()
+    thread = threading.Thread(target=_read_ahead,
+                              args=(reader, indices, int(bin_factor), queue,
+                                    cancel),
+                              name='export_movie read-ahead')
+    thread.daemon = True
+    start_time = time.time()
+    thread.start()
+    num_frames = 0
+    try:
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            index, frame = item
+            # Rows of the image run along the second spatial dimension
+            frame = frame.T
+            if raw:
+                Image.fromarray(frame.astype(np.float32)).save(
+                    os.path.join(output_path, 'frame_{:06d}.tiff'.format(index)))
+            else:
+                scale = 255. / max(clim[1] - clim[0], np.finfo(np.float32).tiny)
+                levels = np.clip((frame - clim[0]) * scale, 0, 255)
+                levels = np.nan_to_num(levels).astype(np.uint8)
+                if is_gif:
+                    writer.write(levels)
+                else:
+                    Image.fromarray(lut[levels]).save(
+                        os.path.join(output_path,
+                                     'frame_{:06d}.png'.format(index)))
+            num_frames += 1
+    finally:
+        cancel.set()
+        # Unblock the reader if it is waiting on a full queue
+        while thread.is_alive():
+            while not queue.empty():
+                queue.get()
+            thread.join(0.05)
+        if writer is not None:
+            writer.close()
+    elapsed = time.time() - start_time
+
+    report = {'num_frames': num_frames, 'clim': clim,
+              'elapsed_time': elapsed,
+              'fps': num_frames / max(elapsed, 1E-9)}
+    if verbose:
+        print('Wrote {} frames to {} in {:.2f} s ({:.1f} frames/s)'
+              ''.format(num_frames, output_path, elapsed, report['fps']))
+    return report
@@ -13,6 +13,8 @@ from __future__ import division, print_function, absolute_import, unicode_litera
 import inspect
 import os
 import sys
+import threading
+import time
 from numbers import Number
 import numpy as np
 import h5py
@@ -20,7 +22,6 @@ import matplotlib as mpl
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider, Button
 import matplotlib.patches as patches
-import matplotlib.animation as animation
 import matplotlib.ticker as mtick
 from matplotlib.colors import LinearSegmentedColormap
 from mpl_toolkits.axes_grid1 import ImageGrid
@@ -30,14 +31,70 @@ from sidpy.hdf.dtype_utils import is_complex_dtype
 from sidpy.base.num_utils import contains_integers, get_exponent
 from sidpy.viz.plot_utils import plot_map
 
+from ..io.hdf_utils.summed_area import get_summed_area_table, write_summed_area_table, \
+    get_binned_spectrum
+from ..io.hdf_utils.profile import get_line_profile
+from .frame_reader import FrameReader
+from .tile_reader import TileReader
+from .curve_reader import CurveReader
+from .slice_reader import SliceReader
+from .quantize import DisplayQuantizer
+from ..io.derived import ComponentView
+from .blitting import BlitManager, FrameTimer
+
 if sys.version_info.major == 3:
     unicode = str
 
 default_cmap = plt.cm.viridis
 
+# curves longer than this are decimated by default
+DECIMATE_SAMPLES = 10 ** 6
+
+
+def _get_quantizer(dset, display_dtype, kwargs):
+    ## vmin and vmax given for display become the contrast limits of the display buffers,
+    ## which are then shown between the limits of the buffer type
+    if display_dtype is None:
+        return None
+    clim = [kwargs.pop('vmin', None), kwargs.pop('vmax', None)]
+    if None in clim:
+        clim = None
+    quantizer = DisplayQuantizer(display_dtype, clim=clim, dset=dset)
+    kwargs['vmin'], kwargs['vmax'] = quantizer.display_limits
+    return quantizer
+
+
+def _colorbar(fig, img, quantizer, **kwargs):
+    ## colorbars of display buffers are labelled in the units of the data
+    mappable = img
+    if quantizer is not None:
+        mappable = mpl.cm.ScalarMappable(norm=mpl.colors.Normalize(*quantizer.clim), cmap=img.get_cmap())
+    kwargs.setdefault('ax', img.axes)
+    return fig.colorbar(mappable, **kwargs)
+
 
 class plot_curve(object):
-    def __init__(self, dset, ref_dims, figure =None,**kwargs):
+    """
+    Interactive display of a curve
+
+    Important: keep a reference to this class to maintain interactive properties so usage is:
+
+    >>view = plot_curve(dataset, [0])
+
+    Input:
+    ------
+    - dset: NSI_dataset
+    - ref_dims: list of int
+        dimension of the curve
+    - decimate: bool, optional
+        show the minimum and maximum of the samples under each pixel and refine them from the
+        data after zooming, default for curves with more than one million samples
+    - pyramid: bool, optional
+        with decimate, None: use a min/max summary stored with the dataset or compute it in one
+        pass and keep it in memory, True: also store the computed summary if the file is writable,
+        False: summarize the visible samples after each zoom
+    """
+    def __init__(self, dset, ref_dims, figure =None, decimate=None, pyramid=None, **kwargs):
 
         fig_args = dict()
         temp = kwargs.pop('figsize', None)
@@ -60,41 +117,88 @@ class plot_curve(object):
 
         if len(ref_dims) != 1:
             print( 'data type not handled yet')
-        self.axis = self.fig.add_subplot(1, 1, 1, **fig_args)
+        self.ref_dims = ref_dims
+        if decimate is None:
+            decimate = len(self.dset.shape) == 1 and self.dset.shape[0] > DECIMATE_SAMPLES
+        self.decimate = decimate
+        self.pyramid = pyramid
+        if np.iscomplexobj(self.dset):
+            ## magnitude and phase are read through lazy views of the dataset
+            self.axes = self.fig.subplots(nrows=2)
+            self.axis = self.axes[0]
+            self.sources = [ComponentView(self.dset, 'magnitude'), ComponentView(self.dset, 'phase')]
+        else:
+            self.axis = self.fig.add_subplot(1, 1, 1, **fig_args)
+            self.axes = np.array([self.axis])
+            self.sources = [self.dset]
+
+        self.readers = []
+        if self.decimate:
+            self.readers = [CurveReader(source, pyramid=pyramid) for source in self.sources]
+            ## the visible range is refined from the data once zooming or panning pauses
+            self._refine_timer = self.fig.canvas.new_timer(interval=150)
+            self._refine_timer.single_shot = True
+            self._refine_timer.add_callback(self.refresh)
 
         self._update()
 
-    def _update(self):
+    def _read_curve(self, index, start=0, stop=None):
+        if not self.decimate:
+            return self.dset.dims[self.ref_dims[0]][0][()], np.squeeze(self.sources[index][()])
+        reader = self.readers[index]
+        if stop is None:
+            stop = reader.length
+        width = max(1, int(self.axes[index].get_window_extent().width))
+        return reader.read_range(start, stop, width)
+
+    def _on_limits(self, axis):
+        self._refine_timer.stop()
+        self._refine_timer.start()
+
+    def refresh(self):
+        """Reads the visible range of decimated curves at the resolution of the display"""
+        for index, (axis, reader) in enumerate(zip(self.axes.flat, self.readers)):
+            x_lim = axis.get_xlim()
+            indices = sorted([reader.index_of(x_lim[0]), reader.index_of(x_lim[1])])
+            x, y = self._read_curve(index, int(np.floor(indices[0])), int(np.ceil(indices[1])) + 1)
+            axis.lines[0].set_data(x, y)
+        self.fig.canvas.draw_idle()
 
-        if False:#is_complex_dtype(np.array(dset)):
-            # Plot real and image
-            fig, axes = plt.subplots(nrows=2, **fig_args)
+    def _update(self):
 
-            for axis, ufunc, comp_name in zip(axes.flat, [np.abs, np.angle], ['Magnitude', 'Phase']):
-                axis.plot(self.dset.dims[ref_dims][0], ufunc(np.squeeze(curve)), **kwargs)
+        if np.iscomplexobj(self.dset):
+            # Plot magnitude and phase
+            ref_dim = self.ref_dims[0]
+            for index, (axis, comp_name) in enumerate(zip(self.axes.flat, ['Magnitude', 'Phase'])):
+                axis.clear()
+                axis.plot(*self._read_curve(index), **self.kwargs)
                 if comp_name == 'Magnitude':
                     axis.set_title(self.dset.file.filename.split('/')[-1] + '\n(' + comp_name + ')', pad=15)
-                    axis.set_xlabel(self.dset.get_dimension_labels()[ref_dims[0]])# + x_suffix)
                     axis.set_ylabel(self.dset.data_descriptor)
-                    axis.ticklabel_format(style='sci', scilimits=(-2, 3))
                 else:
                     axis.set_title(comp_name, pad=15)
                     axis.set_ylabel('Phase (rad)')
-                    axis.set_xlabel(self.get_dimension_labels()[ref_dims[0]])# + x_suffix)
-                    axis.ticklabel_format(style='sci', scilimits=(-2, 3))
+                axis.set_xlabel(self.dset.get_dimension_labels()[ref_dim])# + x_suffix)
+                axis.ticklabel_format(style='sci', scilimits=(-2, 3))
 
-            fig.tight_layout()
-            return fig, axes
+            self.fig.tight_layout()
 
         else:
 
             self.axis.clear()
-            self.axis.plot(self.dset.dims[0][0], self.dset, **self.kwargs)
+            if self.decimate:
+                self.axis.plot(*self._read_curve(0), **self.kwargs)
+            else:
+                self.axis.plot(self.dset.dims[0][0], self.dset, **self.kwargs)
             self.axis.set_title(self.dset.file.filename.split('/')[-1], pad=15)
             self.axis.set_xlabel(self.dset.get_dimension_labels()[0])# + x_suffix)
             self.axis.set_ylabel(self.dset.data_descriptor)
             self.axis.ticklabel_format(style='sci', scilimits=(-2, 3))
-            self.fig.canvas.draw_idle()
+
+        if self.decimate:
+            for axis in self.axes.flat:
+                axis.callbacks.connect('xlim_changed', self._on_limits)
+        self.fig.canvas.draw_idle()
 
 class plot_image(object):
     """
@@ -113,8 +217,26 @@ class plot_image(object):
     - dset: NSI_dataset
     - dim_dict: dictionary
         with key: "spatial" list of int: dimension of image
+    - tiled: bool, optional
+        display an overview and read only the visible region at the displayed resolution
+        after each pan or zoom, in a background thread
+    - pyramid: bool, optional
+        with tiled, None: read from a pyramid stored with the dataset if there is one,
+        True: build and store the pyramid if needed, False: always read the full resolution data
+
+    Complex images are shown as magnitude and phase, read chunk by chunk through lazy views.
+    For a tiled display of complex data, pass one component, e.g. dset.get_component('phase')
+
+    Line profiles: after view.start_profile(width), left clicks add vertices of a line or polyline
+    and a double or right click shows the profile in a separate figure. view.set_profile(points)
+    does the same for known vertices in the units of the axes.
+
+    - display_dtype: str, optional
+        'uint8' or 'float16' to hold the displayed image as a buffer quantized within contrast
+        limits from the cached statistics of the dataset, or within vmin and vmax if both are given.
+        Default None keeps the values
     """
-    def __init__(self, dset, dim_dict, figure =None,**kwargs):
+    def __init__(self, dset, dim_dict, figure =None, tiled=False, pyramid=None, display_dtype=None, **kwargs):
 
         fig_args = dict()
         temp = kwargs.pop('figsize', None)
@@ -127,37 +249,422 @@ class plot_image(object):
             self.fig = figure
 
         self.dset = dset
+        self.spatial_dims = list(dim_dict['spatial'][:2])
         extent = self.dset.make_extent(dim_dict['spatial'])
-
-        if is_complex_dtype(self.dset):
-            # Plot real and image
-            fig, axes = plt.subplots(nrows=2, **fig_args)
-            for axis, ufunc, comp_name in zip(axes.flat, [np.abs, np.angle], ['Magnitude', 'Phase']):
-                cbar_label = self.data_descriptor
+        self.profile_points = []
+        self.profile_width = 1
+        self.profile_line = None
+        self.profile_fig = None
+        self._profile_cid = None
+
+        if np.iscomplexobj(self.dset):
+            if tiled:
+                raise ValueError('tiled display needs real data, pass a component of the dataset '
+                                 'such as dset.get_component("magnitude")')
+            # Plot magnitude and phase
+            self.axes = self.fig.subplots(ncols=2)
+            self.images = []
+            self.quantizers = []
+            for axis, comp_name in zip(self.axes.flat, ['Magnitude', 'Phase']):
+                view = ComponentView(self.dset, comp_name.lower())
+                cbar_label = self.dset.data_descriptor
                 if comp_name == 'Phase':
                     cbar_label = 'Phase (rad)'
-                plot_map(axis, ufunc(np.squeeze(img)), show_xy_ticks=True, show_cbar=True,
-                         cbar_label=cbar_label, x_vec=ref_dims[1].values, y_vec=ref_dims[0].values,
-                         **kwargs)
-                axis.set_title(self.name + '\n(' + comp_name + ')', pad=15)
-                axis.set_xlabel(ref_dims[1].name + ' (' + ref_dims[1].units + ')' + suffix[1])
-                axis.set_ylabel(ref_dims[0].name + ' (' + ref_dims[0].units + ')' + suffix[0])
-            fig.tight_layout()
-            return fig, axes
+                ## each component has its own contrast limits
+                img_kwargs = dict(kwargs)
+                quantizer = _get_quantizer(view, display_dtype, img_kwargs)
+                data = np.squeeze(view[()])
+                if quantizer is not None:
+                    data = quantizer.quantize(data)
+                self.quantizers.append(quantizer)
+                self.images.append(axis.imshow(data.T, extent=extent, **img_kwargs))
+                axis.set_title(self.dset.file.filename.split('/')[-1] + '\n(' + comp_name + ')', pad=15)
+                axis.set_xlabel(self.dset.get_dimension_labels()[dim_dict['spatial'][0]])
+                axis.set_ylabel(self.dset.get_dimension_labels()[dim_dict['spatial'][1]])
+                cbar = _colorbar(self.fig, self.images[-1], quantizer, ax=axis)
+                cbar.set_label(cbar_label)
+            self.axis, self.img = self.axes[0], self.images[0]
+            self.quantizer = self.quantizers[0]
+            self.fig.tight_layout()
+            self.fig.canvas.draw_idle()
 
         else:
 
             self.axis = self.fig.add_subplot(1,1,1)
-            self.img = self.axis.imshow(np.squeeze(self.dset).T, extent=extent, **kwargs)
+            self.tiles = None
+            self.quantizer = _get_quantizer(self.dset, display_dtype, kwargs)
+            if tiled:
+                self.tiles = TileReader(self.dset, dim_dict['spatial'][:2], pyramid=pyramid)
+                self.extent = extent
+                ## overview of the whole image at about the resolution of the axes
+                data, self.region = self.tiles.read_region([0, self.tiles.shape[0]], [0, self.tiles.shape[1]],
+                                                           self._display_shape())
+                self.img = self.axis.imshow(self._display(data).T, extent=self._region_extent(self.region),
+                                            **kwargs)
+                self._ignore_limits = False
+                self.axis.callbacks.connect('xlim_changed', self._on_limits)
+                self.axis.callbacks.connect('ylim_changed', self._on_limits)
+                ## reads are debounced until panning or zooming pauses and collected by a second timer
+                self._debounce_timer = self.fig.canvas.new_timer(interval=150)
+                self._debounce_timer.single_shot = True
+                self._debounce_timer.add_callback(self._request_tiles)
+                self._poll_timer = self.fig.canvas.new_timer(interval=40)
+                self._poll_timer.add_callback(self._apply_tiles)
+                self.fig.canvas.mpl_connect('close_event', self._onclose)
+            else:
+                self.img = self.axis.imshow(self._display(np.squeeze(self.dset)).T, extent=extent, **kwargs)
             self.axis.set_title(self.dset.file.filename.split('/')[-1], pad=15)
             self.axis.set_xlabel(self.dset.get_dimension_labels()[dim_dict['spatial'][0]])# + x_suffix)
             self.axis.set_ylabel(self.dset.get_dimension_labels()[dim_dict['spatial'][1]])
             self.axis.ticklabel_format(style='sci', scilimits=(-2, 3))
-            cbar = self.fig.colorbar(self.img)
+            cbar = _colorbar(self.fig, self.img, self.quantizer)
             cbar.set_label(self.dset.data_descriptor)
             self.fig.tight_layout()
             self.img.axes.figure.canvas.draw_idle()
 
+    def _display(self, data):
+        if self.quantizer is None:
+            return data
+        return self.quantizer.quantize(data)
+
+
+    def _display_shape(self):
+        bbox = self.axis.get_window_extent()
+        return max(1, int(bbox.width)), max(1, int(bbox.height))
+
+    def _pixel_sizes(self):
+        return [(self.extent[1] - self.extent[0]) / self.tiles.shape[0],
+                (self.extent[2] - self.extent[3]) / self.tiles.shape[1]]
+
+    def _region_extent(self, region):
+        size_x, size_y = self._pixel_sizes()
+        return [self.extent[0] + region[0] * size_x, self.extent[0] + region[1] * size_x,
+                self.extent[3] + region[3] * size_y, self.extent[3] + region[2] * size_y]
+
+    def _visible_region(self):
+        size_x, size_y = self._pixel_sizes()
+        x_lim = sorted(self.axis.get_xlim())
+        y_lim = sorted(self.axis.get_ylim())
+        return ([(x_lim[0] - self.extent[0]) / size_x, (x_lim[1] - self.extent[0]) / size_x],
+                [(y_lim[0] - self.extent[3]) / size_y, (y_lim[1] - self.extent[3]) / size_y])
+
+    def _on_limits(self, axis):
+        if self._ignore_limits:
+            return
+        self._debounce_timer.stop()
+        self._debounce_timer.start()
+
+    def _request_tiles(self):
+        x_range, y_range = self._visible_region()
+        self.tiles.request(x_range, y_range, self._display_shape())
+        self._poll_timer.start()
+
+    def _apply_tiles(self):
+        result = self.tiles.poll()
+        if result is None:
+            if not self.tiles.busy():
+                self._poll_timer.stop()
+            return
+        self._show_region(*result)
+
+    def _show_region(self, data, region):
+        self.region = region
+        ## setting the extent must not move the view nor trigger another read
+        x_lim, y_lim = self.axis.get_xlim(), self.axis.get_ylim()
+        self._ignore_limits = True
+        self.img.set_data(self._display(data).T)
+        self.img.set_extent(self._region_extent(region))
+        self.axis.set_xlim(x_lim)
+        self.axis.set_ylim(y_lim)
+        self._ignore_limits = False
+        self.fig.canvas.draw_idle()
+
+    def refresh(self):
+        """Reads the visible region of a tiled image right away"""
+        x_range, y_range = self._visible_region()
+        self._show_region(*self.tiles.read_region(x_range, y_range, self._display_shape()))
+
+    def _onclose(self, event):
+        self._debounce_timer.stop()
+        self._poll_timer.stop()
+        self.tiles.close()
+
+    def start_profile(self, width=1):
+        """Starts picking the vertices of a line profile with the mouse"""
+        self.profile_width = int(width)
+        self.profile_points = []
+        if self._profile_cid is None:
+            self._profile_cid = self.fig.canvas.mpl_connect('button_press_event', self._on_profile_click)
+
+    def stop_profile(self):
+        """Stops picking vertices with the mouse"""
+        if self._profile_cid is not None:
+            self.fig.canvas.mpl_disconnect(self._profile_cid)
+            self._profile_cid = None
+
+    def _on_profile_click(self, event):
+        if event.inaxes is not self.axis or event.xdata is None:
+            return
+        ## clicks that zoom or pan do not add vertices
+        toolbar = self.fig.canvas.toolbar
+        if toolbar is not None and getattr(toolbar, 'mode', ''):
+            return
+        if event.button == 1 and not event.dblclick:
+            self.profile_points.append([event.xdata, event.ydata])
+            self._draw_path(self.profile_points)
+        elif len(self.profile_points) >= 2:
+            self.set_profile(self.profile_points, self.profile_width)
+            self.profile_points = []
+
+    def _draw_path(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if self.profile_line is None:
+            self.profile_line, = self.axis.plot(points[:, 0], points[:, 1], 'r.-', scalex=False, scaley=False)
+        else:
+            self.profile_line.set_data(points[:, 0], points[:, 1])
+        self.fig.canvas.draw_idle()
+
+    def set_profile(self, points, width=None):
+        """
+        Shows the profile along a line or polyline, given as [[x0, y0], [x1, y1], ...] in the
+        units of the axes. Only the chunks the line crosses are read.
+        Returns the profile and its distance dimension
+        """
+        if width is not None:
+            self.profile_width = int(width)
+        source = self.dset
+        if np.iscomplexobj(source):
+            source = ComponentView(self.dset, 'magnitude')
+        self.profile, self.profile_distance = get_line_profile(source, points, self.spatial_dims,
+                                                               width=self.profile_width)
+        self._draw_path(points)
+
+        if self.profile_fig is None or not plt.fignum_exists(self.profile_fig.number):
+            self.profile_fig = plt.figure()
+            self.profile_axis = self.profile_fig.add_subplot(1, 1, 1)
+        self.profile_axis.clear()
+        self.profile_axis.plot(self.profile_distance, self.profile)
+        self.profile_axis.set_title('line profile, width {} pixels'.format(self.profile_width))
+        self.profile_axis.set_xlabel('distance [{}]'.format(self.profile_distance.units))
+        self.profile_axis.set_ylabel(source.data_descriptor)
+        self.profile_fig.canvas.draw_idle()
+        return self.profile, self.profile_distance
+
+
+class plot_volume(object):
+    """
+    Interactive orthogonal slices through a volume with three spatial dimensions
+
+    Shows the planes normal to each spatial dimension through a common point, marked by
+    linked cursors. Clicking or dragging in a plane moves the point within that plane,
+    scrolling in a plane steps through the planes along its normal.
+    Works on every backend because it only depends on matplotlib.
+
+    Important: keep a reference to this class to maintain interactive properties so usage is:
+
+    >>view = plot_volume(dataset, {'spatial':[0,1,2]})
+
+    Input:
+    ------
+    - dset: NSI_dataset
+    - dim_dict: dictionary
+        with key: "spatial" list of int: the three dimensions of the volume
+    - cache_mb: float, optional
+        upper bound in MB on the planes kept in memory
+    - pyramid: bool, optional
+        None: show previews from a pyramid stored with the dataset while dragging if there is one,
+        True: build and store the pyramid if needed, False: always read the full resolution data
+    - blit: bool, optional
+        redraw only the planes, cursors and position when moving, default True
+    - display_dtype: str, optional
+        'uint8' or 'float16' to cache and show planes as buffers quantized within contrast limits
+        from the cached statistics of the dataset, or within vmin and vmax if both are given.
+        Default None keeps the values
+
+    Each plane is read with a single hyperslab read and cached. While dragging, planes are read
+    from a coarse level of the pyramid and are replaced by full resolution planes on release.
+    For complex data, pass one component, e.g. dset.get_component('magnitude')
+    The time spent reading and drawing is counted in the frame_timer attribute:
+
+    >>view.frame_timer.summary()
+    """
+    def __init__(self, dset, dim_dict, figure =None, cache_mb=256, pyramid=None, blit=True, display_dtype=None,
+                 **kwargs):
+
+        fig_args = dict()
+        temp = kwargs.pop('figsize', None)
+        if temp is not None:
+            fig_args['figsize'] = temp
+
+        if figure == None:
+            self.fig = plt.figure(**fig_args)
+        else:
+            self.fig = figure
+
+        if 'spatial' not in dim_dict or len(dim_dict['spatial']) < 3:
+            raise KeyError('spatial key in dimension_dictionary must be list of length 3')
+        if np.iscomplexobj(dset):
+            raise ValueError('orthogonal slices need real data, pass a component of the dataset '
+                             'such as dset.get_component("magnitude")')
+
+        self.dset = dset
+        self.spatial_dims = list(dim_dict['spatial'][:3])
+        self.quantizer = _get_quantizer(dset, display_dtype, kwargs)
+        self.slices = SliceReader(dset, self.spatial_dims, max_mem_mb=cache_mb, pyramid=pyramid,
+                                  quantizer=self.quantizer)
+        self.shape = self.slices.shape
+        self.position = [size // 2 for size in self.shape]
+
+        ## first edge and signed pixel size along each axis, from the dimension scales
+        labels = dset.get_dimension_labels()
+        self.labels = [labels[dim] for dim in self.spatial_dims]
+        self._origins = []
+        self._sizes = []
+        for dim, size in zip(self.spatial_dims, self.shape):
+            scale = np.arange(size, dtype=np.float64)
+            if len(dset.dims[dim]) > 0 and dset.dims[dim][0].shape == (size,):
+                scale = np.asarray(dset.dims[dim][0][()], dtype=np.float64)
+            step = (scale[-1] - scale[0]) / (size - 1) if size > 1 else 1.
+            self._origins.append(scale[0] - step / 2)
+            self._sizes.append(step)
+
+        ## normal, horizontal and vertical axis of each plane
+        self.planes = [(2, 0, 1), (1, 0, 2), (0, 2, 1)]
+        axes = self.fig.subplots(2, 2)
+        self.axes = [axes[0, 0], axes[1, 0], axes[0, 1]]
+        data = [self._display_plane(panel, self.slices.get_plane(normal, self.position[normal])[0])
+                for panel, (normal, _, _) in enumerate(self.planes)]
+        if 'vmin' not in kwargs and 'vmax' not in kwargs:
+            kwargs['vmin'] = min(np.nanmin(plane) for plane in data)
+            kwargs['vmax'] = max(np.nanmax(plane) for plane in data)
+
+        self.images = []
+        self.cursors = []
+        self._shown = []
+        for panel, (axis, (normal, horizontal, vertical)) in enumerate(zip(self.axes, self.planes)):
+            self.images.append(axis.imshow(data[panel], extent=self._extent(panel, 1), **kwargs))
+            ## new extents of previews must not move the view
+            axis.set_autoscale_on(False)
+            self.cursors.append((axis.axvline(self._coordinate(horizontal), color='w', lw=0.8),
+                                 axis.axhline(self._coordinate(vertical), color='w', lw=0.8)))
+            self._shown.append((self.position[normal], 1))
+            axis.set_xlabel(self.labels[horizontal])
+            axis.set_ylabel(self.labels[vertical])
+            axis.set_title(self.labels[normal] + ' plane', fontsize='medium')
+        axes[1, 1].axis('off')
+        self.text = axes[1, 1].text(0.05, 0.9, '', va='top', transform=axes[1, 1].transAxes)
+        cbar = _colorbar(self.fig, self.images[0], self.quantizer, ax=axes[1, 1])
+        cbar.set_label(dset.data_descriptor)
+        self.fig.suptitle(dset.file.filename.split('/')[-1] +
+                          '\n click or drag to move the cursors, scroll to step through planes')
+        self.fig.tight_layout()
+
+        self._dragging = None
+        self.fig.canvas.mpl_connect('button_press_event', self._onpress)
+        self.fig.canvas.mpl_connect('motion_notify_event', self._onmotion)
+        self.fig.canvas.mpl_connect('button_release_event', self._onrelease)
+        self.fig.canvas.mpl_connect('scroll_event', self._onscroll)
+        self.fig.canvas.mpl_connect('close_event', self._onclose)
+
+        self.frame_timer = FrameTimer()
+        artists = list(self.images) + [line for pair in self.cursors for line in pair] + [self.text]
+        self._blit = BlitManager(self.fig, artists, blit=blit, timer=self.frame_timer)
+        self._update()
+
+    def _coordinate(self, axis, index=None):
+        if index is None:
+            index = self.position[axis]
+        return self._origins[axis] + (index + 0.5) * self._sizes[axis]
+
+    def _index(self, axis, coordinate):
+        index = int(np.floor((coordinate - self._origins[axis]) / self._sizes[axis]))
+        return int(np.clip(index, 0, self.shape[axis] - 1))
+
+    def _extent(self, panel, factor):
+        ## previews leave out trailing voxels that do not fill a pixel of the level
+        _, horizontal, vertical = self.planes[panel]
+        edges = []
+        for axis in [horizontal, vertical]:
+            covered = self.shape[axis] // factor * factor
+            edges.append([self._origins[axis], self._origins[axis] + covered * self._sizes[axis]])
+        return [edges[0][0], edges[0][1], edges[1][1], edges[1][0]]
+
+    def _display_plane(self, panel, plane):
+        ## planes come with their axes in ascending order, rows are displayed vertically
+        _, horizontal, vertical = self.planes[panel]
+        if horizontal < vertical:
+            return plane.T
+        return plane
+
+    def _panel(self, event):
+        toolbar = getattr(self.fig.canvas, 'toolbar', None)
+        if toolbar is not None and getattr(toolbar, 'mode', ''):
+            return None
+        if event.inaxes in self.axes and event.xdata is not None:
+            return self.axes.index(event.inaxes)
+        return None
+
+    def _move(self, panel, event):
+        _, horizontal, vertical = self.planes[panel]
+        self.position[horizontal] = self._index(horizontal, event.xdata)
+        self.position[vertical] = self._index(vertical, event.ydata)
+
+    def _onpress(self, event):
+        panel = self._panel(event)
+        if panel is None or event.button != 1:
+            return
+        self._dragging = panel
+        self._move(panel, event)
+        self._update(preview=True)
+
+    def _onmotion(self, event):
+        if self._dragging is None or self._panel(event) != self._dragging:
+            return
+        self._move(self._dragging, event)
+        self._update(preview=True)
+
+    def _onrelease(self, event):
+        if self._dragging is None:
+            return
+        self._dragging = None
+        self._update()
+
+    def _onscroll(self, event):
+        panel = self._panel(event)
+        if panel is None:
+            return
+        normal = self.planes[panel][0]
+        step = 1 if event.button == 'up' else -1
+        self.position[normal] = int(np.clip(self.position[normal] + step, 0, self.shape[normal] - 1))
+        self._update()
+
+    def _onclose(self, event):
+        self._blit.disconnect()
+        self.slices.clear()
+
+    def set_position(self, position):
+        """Moves the cursors to a voxel, given as a list of indices along the three spatial dimensions"""
+        if len(position) != 3:
+            raise ValueError('position should contain an index along each spatial dimension')
+        self.position = [int(np.clip(index, 0, size - 1)) for index, size in zip(position, self.shape)]
+        self._update()
+
+    def _update(self, preview=False):
+        start = time.perf_counter()
+        for panel, (normal, horizontal, vertical) in enumerate(self.planes):
+            plane, factor = self.slices.get_plane(normal, self.position[normal], preview=preview)
+            shown = (self.position[normal] // factor, factor)
+            if shown != self._shown[panel]:
+                self.images[panel].set_data(self._display_plane(panel, plane))
+                self.images[panel].set_extent(self._extent(panel, factor))
+                self._shown[panel] = shown
+            vline, hline = self.cursors[panel]
+            vline.set_xdata([self._coordinate(horizontal)] * 2)
+            hline.set_ydata([self._coordinate(vertical)] * 2)
+        self.frame_timer.add_fetch(time.perf_counter() - start)
+        self.text.set_text('\n'.join('{}: {:.4g} (voxel {})'.format(label, self._coordinate(axis), index)
+                                     for axis, (label, index) in enumerate(zip(self.labels, self.position))))
+        self._blit.update()
 
 class  plot_stack(object):
     """
@@ -177,9 +684,27 @@ class  plot_stack(object):
     - dim_dict: dictionary
         with key: "spatial" list of int: dimension of image
         with key: "time" or "stack": list of int: dimension of image stack
+    - cache_mb: float, optional
+        upper bound in MB on the frames kept in memory
+    - prefetch: int, optional
+        number of frames read ahead in the direction of browsing, 0 to disable
+    - average_range: list of int, optional
+        first and stop frame averaged by the Average button, default all frames
+    - blit: bool, optional
+        redraw only the image and the slider when browsing, default True
+    - display_dtype: str, optional
+        'uint8' or 'float16' to cache and show frames as buffers quantized within contrast limits
+        from the cached statistics of the dataset, or within vmin and vmax if both are given.
+        More frames then fit in cache_mb. Default None keeps the values
+
+    Frames are read from the file one at a time, whatever the order of the dimensions.
+    The time spent reading and drawing frames is counted in the frame_timer attribute:
+
+    >>view.frame_timer.summary()
 
     """
-    def __init__(self, dset, dim_dict, figure =None,**kwargs):
+    def __init__(self, dset, dim_dict, figure =None, cache_mb=256, prefetch=8, average_range=None, blit=True,
+                 display_dtype=None, **kwargs):
 
         fig_args = dict()
         temp = kwargs.pop('figsize', None)
@@ -218,31 +743,30 @@ class  plot_stack(object):
             raise KeyError('stack key in dimension_dictionary must be list of length 1')
             return
 
-        if stack_dim[0] != 0 or image_dims != [1,2]:
-            ## axes not in expected order, displaying a copy of data with right dimensional oreder:
-            self.cube =  np.transpose(dset, (stack_dim[0], image_dims[0],image_dims[1]))
-        else:
-            self.cube  = dset
+        ## frames are read one at a time in any dimensional order, cached and read ahead
+        self.quantizer = _get_quantizer(dset, display_dtype, kwargs)
+        self.frames = FrameReader(dset, stack_dim[0], image_dims[:2],
+                                  max_mem_mb=cache_mb, prefetch_frames=prefetch, quantizer=self.quantizer)
+        self.direction = 1
 
         extent = dset.make_extent([image_dims[0],image_dims[1]])
 
         self.axis = self.fig.add_axes([0.0, 0.2, .9, .7])
         self.ind = 0
-        self.img = self.axis.imshow(self.cube[self.ind].T, extent = extent, **kwargs )
-        interval = 100 # ms, time between animation frames
+        self.img = self.axis.imshow(self.frames.get_frame(self.ind).T, extent = extent, **kwargs )
 
-        self.number_of_slices= self.cube.shape[0]
+        self.number_of_slices= self.frames.num_frames
 
         self.axis.set_title('image stack: '+dset.file.filename.split('/')[-1]+'\n use scroll wheel to navigate images')
         self.img.axes.figure.canvas.mpl_connect('scroll_event', self._onscroll)
         self.axis.set_xlabel(dset.get_dimension_labels()[image_dims[0]]);
         self.axis.set_ylabel(dset.get_dimension_labels()[image_dims[1]]);
-        cbar = self.fig.colorbar(self.img)
+        cbar = _colorbar(self.fig, self.img, self.quantizer)
         cbar.set_label(dset.data_descriptor)
 
 
         axidx = self.fig.add_axes([0.1, 0.05, 0.55, 0.03])
-        self.slider = Slider(axidx, 'image', 0, self.cube.shape[0]-1, valinit=self.ind, valfmt='%d')
+        self.slider = Slider(axidx, 'image', 0, self.number_of_slices-1, valinit=self.ind, valfmt='%d')
         self.slider.on_changed(self._onSlider)
         playax = self.fig.add_axes([0.7, 0.05, 0.09, 0.03])
         self.play_button = Button(playax, 'Play')#, hovercolor='0.975')
@@ -251,25 +775,94 @@ class  plot_stack(object):
 
 
         self.play_button.on_clicked(self._play_slice)
+        self.play_timer = self.fig.canvas.new_timer(interval=200) # ms, time between animation frames
+        self.play_timer.add_callback(self._updatefig)
 
         sumax = self.fig.add_axes([0.8, 0.05, 0.09, 0.03])
         self.sum_button = Button(sumax, 'Average')#, hovercolor='0.975')
         self.sum_button.on_clicked(self._sum_slice)
         self.sum = False
-
-        self.anim = animation.FuncAnimation(self.fig, self._updatefig, interval=200, blit=False, repeat = True)
+        self.set_average_range(average_range)
+        self._average_thread = None
+        self._average_timer = None
+
+        ## browsing redraws only the image and the slider on top of the cached figure
+        self.frame_timer = FrameTimer()
+        self.slider.drawon = False
+        self._blit = BlitManager(self.fig, [self.img, self.slider.ax], blit=blit, timer=self.frame_timer)
+        self.fig.canvas.mpl_connect('close_event', self._onclose)
         self._update()
 
+    def set_average_range(self, average_range=None):
+        """Sets the first and stop frame averaged by the Average button, None for all frames"""
+        if average_range is None:
+            average_range = [0, self.number_of_slices]
+        if len(average_range) != 2:
+            raise ValueError('average_range should contain the first and stop frame')
+        self.average_range = [int(average_range[0]), int(average_range[1])]
+
     def _sum_slice(self,event):
-        self.img.set_data(np.average(self.cube, axis = 0).T)
-        self.img.axes.figure.canvas.draw_idle()
+        ## a second click cancels an average in progress
+        if self._average_thread is not None and self._average_thread.is_alive():
+            self._average_cancel.set()
+            return
+        self.play = False
+        self.play_timer.stop()
+        self._average_cancel = threading.Event()
+        self._average_progress = 0.
+        self._average_result = None
+        self._average_error = None
+        ## averaging streams through the file in a background thread,
+        ## the figure is only updated from the timer in the main thread
+        self._average_thread = threading.Thread(target=self._compute_average,
+                                                args=(self._average_cancel,))
+        self._average_thread.daemon = True
+        self._average_thread.start()
+        self._average_timer = self.fig.canvas.new_timer(interval=100)
+        self._average_timer.add_callback(self._poll_average)
+        self._average_timer.start()
+
+    def _compute_average(self, cancel):
+        def progress(fraction):
+            self._average_progress = fraction
+        try:
+            self._average_result = self.frames.average(self.average_range[0], self.average_range[1],
+                                                       callback=progress, cancel=cancel)
+        except Exception as error:
+            self._average_error = error
+
+    def _poll_average(self):
+        if self._average_thread.is_alive():
+            self.sum_button.label.set_text('{:d} %'.format(int(100 * self._average_progress)))
+            self.fig.canvas.draw_idle()
+            return
+        self._average_timer.stop()
+        self.sum_button.label.set_text('Average')
+        if self._average_error is not None:
+            print('Could not average the stack: {}'.format(self._average_error))
+        elif self._average_result is not None:
+            average = self._average_result
+            if self.quantizer is not None:
+                average = self.quantizer.quantize(average)
+            self.img.set_data(average.T)
+        ## the button label is not blitted
+        self.fig.canvas.draw_idle()
+
+    def _onclose(self, event):
+        if self._average_thread is not None:
+            self._average_cancel.set()
+        if self._average_timer is not None:
+            self._average_timer.stop()
+        self.play_timer.stop()
+        self._blit.disconnect()
+        self.frames.close()
 
     def _play_slice(self,event):
         self.play = not self.play
         if self.play:
-            self.anim.event_source.start()
+            self.play_timer.start()
         else:
-            self.anim.event_source.stop()
+            self.play_timer.stop()
 
     def _onSlider(self, val):
         self.ind = int(self.slider.val+0.5)
@@ -279,21 +872,27 @@ class  plot_stack(object):
     def _onscroll(self, event):
         #print("%s %s" % (event.button, event.step))
         if event.button == 'up':
-            self.ind = (self.ind + 1) % self.number_of_slices
+            self.direction = 1
         else:
-            self.ind = (self.ind - 1) % self.number_of_slices
+            self.direction = -1
+        self.ind = (self.ind + self.direction) % self.number_of_slices
         self.ind = int(self.ind)
         self.play = False
-        self.anim.event_source.stop()
+        self.play_timer.stop()
         self.slider.set_val(self.ind)
 
     def _update(self):
-        self.img.set_data(self.cube[int(self.ind)].T)
-        self.img.axes.figure.canvas.draw_idle()
+        start = time.perf_counter()
+        frame = self.frames.get_frame(int(self.ind))
+        self.frame_timer.add_fetch(time.perf_counter() - start)
+        self.img.set_data(frame.T)
+        self.frames.prefetch(int(self.ind), self.direction)
+        self._blit.update()
         if not self.play:
-            self.anim.event_source.stop()
+            self.play_timer.stop()
 
     def _updatefig(self,*args):
+        self.direction = 1
         self.ind = (self.ind+1) % self.number_of_slices
         self.slider.set_val(self.ind)
 
@@ -304,9 +903,27 @@ class plot_spectrum_image(object):
     """
     ### Interactive spectrum imaging plot
 
+    - summed_area: bool, optional
+        None: use a summed-area table stored with the dataset if there is one,
+        True: build and store the table if needed, False: never use it.
+        With the table, binned spectra cost four spectrum reads whatever the bin size.
+    - blit: bool, optional
+        redraw only the selection, the spectrum and its title on clicks, default True
+    - display_dtype: str, optional
+        'uint8' or 'float16' to hold the survey image as a buffer quantized within contrast limits
+        from its statistics, or within vmin and vmax if both are given. Default None keeps the values
+    - persist: bool, optional
+        True: store the survey image next to the dataset so that later openings read it back,
+        default False: keep it in memory only. The file is never written to unless asked for
+
+    The time spent reading and drawing spectra is counted in the frame_timer attribute:
+
+    >>view.frame_timer.summary()
+
     """
 
-    def __init__(self, dset,  dim_dict,  figure =None, horizontal = True, **kwargs):
+    def __init__(self, dset,  dim_dict,  figure =None, horizontal = True, summed_area=None, blit=True,
+                 display_dtype=None, persist=False, **kwargs):
 
         fig_args = dict()
         temp = kwargs.pop('figsize', None)
@@ -339,11 +956,10 @@ class plot_spectrum_image(object):
             raise KeyError('spectral key in dimension_dictionary must be list of length 1')
             return
 
-        if spec_dim[0] != 2 or image_dims != [0,1]:
-            ## axes not in expected order, displaying a copy of data with right dimensional oreder:
-            self.cube =  np.transpose(dset, (image_dims[0],image_dims[1], spec_dim[0]))
-        else:
-            self.cube  = dset
+        ## spectra are read from the file on demand, whatever the order of the dimensions
+        self.dset = dset
+        self.image_dims = [image_dims[0], image_dims[1]]
+        self.spec_dim = spec_dim[0]
 
         extent = dset.make_extent([image_dims[0],image_dims[1]])
 
@@ -353,10 +969,18 @@ class plot_spectrum_image(object):
         self.bin_x = 1
         self.bin_y = 1
 
-        sizeX = self.cube.shape[0]
-        sizeY = self.cube.shape[1]
+        self.summed_area = None
+        if summed_area is not False and isinstance(dset, h5py.Dataset) and len(dset.shape) == 3:
+            self.summed_area = get_summed_area_table(dset, self.image_dims, self.spec_dim)
+            if self.summed_area is None and summed_area:
+                self.summed_area = write_summed_area_table(dset, self.image_dims, self.spec_dim)
+
+        sizeX = dset.shape[image_dims[0]]
+        sizeY = dset.shape[image_dims[1]]
+        self.size_x = sizeX
+        self.size_y = sizeY
 
-        self.energy_scale = dset.dims[spec_dim[0]][0]
+        self.energy_scale = dset.dims[spec_dim[0]][0][()]
 
         self.extent = [0,sizeX,sizeY,0]
         self.rectangle = [0,sizeX,0,sizeY]
@@ -371,8 +995,14 @@ class plot_spectrum_image(object):
         else:
             self.axes = self.fig.subplots(nrows=2, **fig_args)
 
-        self.fig.canvas.set_window_title(dset.file.filename.split('/')[-1])
-        self.image = np.sum(self.cube, axis=2)
+        if self.fig.canvas.manager is not None:
+            self.fig.canvas.manager.set_window_title(dset.file.filename.split('/')[-1])
+        ## survey image: spectral sum computed in one chunked pass and cached for reuse
+        self.image = FrameReader(dset, self.spec_dim, self.image_dims,
+                                 prefetch_frames=0).project('sum', persist=persist)
+        self.quantizer = _get_quantizer(self.image, display_dtype, kwargs)
+        if self.quantizer is not None:
+            self.image = self.quantizer.quantize(self.image)
 
         self.axes[0].imshow(self.image.T, extent = self.extent, **kwargs)
         if horizontal:
@@ -386,9 +1016,12 @@ class plot_spectrum_image(object):
 
         self.axes[0].add_patch(self.rect)
         self.intensity_scale = 1.
+        self.frame_timer = FrameTimer()
+        start = time.perf_counter()
         self.spectrum = self.get_spectrum()
+        self.frame_timer.add_fetch(time.perf_counter() - start)
 
-        self.axes[1].plot(self.energy_scale,self.spectrum)
+        self.line, = self.axes[1].plot(self.energy_scale,self.spectrum, label = 'experiment')
         self.axes[1].set_title(' spectrum {},{} '.format(self.x, self.y))
         self.xlabel = dset.get_dimension_labels()[spec_dim[0]]
         self.axes[1].set_xlabel(self.xlabel)# + x_suffix)
@@ -398,6 +1031,9 @@ class plot_spectrum_image(object):
         self.fig.tight_layout()
         self.cid = self.axes[1].figure.canvas.mpl_connect('button_press_event', self._onclick)
 
+        ## clicks redraw only these artists on top of the cached figure, the axis limits are kept
+        self._blit = BlitManager(self.fig, [self.rect, self.line, self.axes[1].title], blit=blit,
+                                 timer=self.frame_timer)
         self.fig.canvas.draw_idle()
 
     def set_bin(self,bin):
@@ -415,22 +1051,38 @@ class plot_spectrum_image(object):
 
         self.rect.set_width(self.rect.get_width()*self.bin_x/old_bin_x)
         self.rect.set_height((self.rect.get_height()*self.bin_y/old_bin_y))
-        if self.x+self.bin_x >  self.cube.shape[0]:
-            self.x = self.cube.shape[0]-self.bin_x
-        if self.y+self.bin_y >  self.cube.shape[1]:
-            self.y = self.cube.shape[1]-self.bin_y
+        if self.x+self.bin_x >  self.size_x:
+            self.x = self.size_x-self.bin_x
+        if self.y+self.bin_y >  self.size_y:
+            self.y = self.size_y-self.bin_y
 
         self.rect.set_xy([self.x*self.rect.get_width()/self.bin_x +  self.rectangle[0],
                             self.y*self.rect.get_height()/self.bin_y +  self.rectangle[2]])
         self._update()
 
     def get_spectrum(self):
-        if self.x > self.cube.shape[0]-self.bin_x:
-            self.x = self.cube.shape[0]-self.bin_x
-        if self.y > self.cube.shape[1]-self.bin_y:
-            self.y = self.cube.shape[1]-self.bin_y
-
-        self.spectrum = np.average(self.cube[self.x:self.x+self.bin_x,self.y:self.y+self.bin_y,:], axis=(0,1))
+        if self.x > self.size_x-self.bin_x:
+            self.x = self.size_x-self.bin_x
+        if self.y > self.size_y-self.bin_y:
+            self.y = self.size_y-self.bin_y
+
+        if self.summed_area is not None:
+            ## corners of the bin in ascending order of the spatial dimensions
+            corners = sorted([(self.image_dims[0], self.x, self.x+self.bin_x),
+                              (self.image_dims[1], self.y, self.y+self.bin_y)])
+            self.spectrum = get_binned_spectrum(self.summed_area, [corner[1] for corner in corners],
+                                                [corner[2] for corner in corners])
+            return self.spectrum
+
+        ## only the chunks holding the selected window are read; other dimensions are held at index 0
+        selection = [0] * len(self.dset.shape)
+        selection[self.image_dims[0]] = slice(self.x, self.x+self.bin_x)
+        selection[self.image_dims[1]] = slice(self.y, self.y+self.bin_y)
+        selection[self.spec_dim] = slice(None)
+        window = np.asarray(self.dset[tuple(selection)])
+        spatial_axes = tuple(axis for axis, dim in enumerate(sorted(self.image_dims + [self.spec_dim]))
+                             if dim != self.spec_dim)
+        self.spectrum = np.average(window, axis=spatial_axes)
         #* self.intensity_scale[self.x,self.y]
         return   self.spectrum
 
@@ -448,10 +1100,10 @@ class plot_spectrum_image(object):
                     self.x = int(x/(self.rect.get_width()/self.bin_x))
                     self.y = int(y/(self.rect.get_height()/self.bin_y))
 
-                    if self.x+self.bin_x >  self.cube.shape[0]:
-                        self.x = self.cube.shape[0]-self.bin_x
-                    if self.y+self.bin_y >  self.cube.shape[1]:
-                        self.y = self.cube.shape[1]-self.bin_y
+                    if self.x+self.bin_x >  self.size_x:
+                        self.x = self.size_x-self.bin_x
+                    if self.y+self.bin_y >  self.size_y:
+                        self.y = self.size_y-self.bin_y
 
                     self.rect.set_xy([self.x*self.rect.get_width()/self.bin_x +  self.rectangle[0],
                                       self.y*self.rect.get_height()/self.bin_y +  self.rectangle[2]])
@@ -460,23 +1112,14 @@ class plot_spectrum_image(object):
 
     def _update(self, ev=None):
 
-        xlim = self.axes[1].get_xlim()
-        ylim = self.axes[1].get_ylim()
-        self.axes[1].clear()
+        start = time.perf_counter()
         self.get_spectrum()
+        self.frame_timer.add_fetch(time.perf_counter() - start)
 
-
-        self.axes[1].plot(self.energy_scale,self.spectrum, label = 'experiment')
-
+        self.line.set_ydata(self.spectrum)
         self.axes[1].set_title(' spectrum {},{} '.format(self.x, self.y))
 
-
-        self.axes[1].set_xlim(xlim)
-        self.axes[1].set_ylim(ylim)
-        self.axes[1].set_xlabel(self.xlabel)
-        self.axes[1].set_ylabel(self.ylabel)
-
-        self.fig.canvas.draw_idle()
+        self._blit.update()
 
 
     def set_legend(self, setLegend):
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Compact display buffers for images, quantized within contrast limits
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+
+import numpy as np
+
+from ..io.hdf_utils.statistics import get_contrast_limits
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['DisplayQuantizer', 'DISPLAY_DTYPES']
+
+DISPLAY_DTYPES = ['uint8', 'float16']
+
+
+class DisplayQuantizer(object):
+    """
+    Converts images to compact buffers for display. 'uint8' buffers hold 256
+    levels between the lower and upper contrast limit, which is all an 8-bit
+    display can show, in an eighth of the memory of float64 values. 'float16'
+    buffers hold the values scaled so that the contrast limits map to 0 and
+    1, keeping values outside the limits and NaNs, in a quarter of the
+    memory.
+
+    Unless given, contrast limits are taken from the stored or cached
+    histogram of the dataset, see
+    :func:`pyNSID.io.hdf_utils.get_contrast_limits`, so that every frame or
+    plane of a dataset is quantized the same way.
+
+    Notes
+    -----
+    Show quantized buffers with the `display_limits` as color limits, and use
+    `clim` for colorbars in the units of the data. The magnitude of complex
+    values is quantized. NaNs become 0 in 'uint8' buffers.
+
+    >>> quantizer = DisplayQuantizer('uint8', dset=h5_main)
+    >>> buffer = quantizer.quantize(frame)
+    >>> axis.imshow(buffer, vmin=quantizer.display_limits[0],
+    ...             vmax=quantizer.display_limits[1])
+    """
+
+    def __init__(self, dtype='uint8', clim=None, dset=None,
+                 percentiles=(0.5, 99.5)):
+        """
+        Parameters
+        ----------
+        dtype : str, optional. Default = 'uint8'
+            'uint8' or 'float16'
+        clim : tuple of float, optional
+            Lower and upper contrast limits. Default - limits of `dset`
+        dset : h5py.Dataset or array-like, optional
+            Dataset whose histogram provides the contrast limits if `clim` is
+            not given
+        percentiles : tuple of float, optional. Default = (0.5, 99.5)
+            Percentiles of the values of `dset` used as contrast limits
+        """
+        if str(np.dtype(dtype)) not in DISPLAY_DTYPES:
+            raise ValueError('dtype should be one of {}'.format(DISPLAY_DTYPES))
+        self.dtype = np.dtype(dtype)
+        if clim is None:
+            if dset is None:
+                raise ValueError('Provide either clim or dset')
+            clim = get_contrast_limits(dset, percentiles=percentiles)
+        low, high = float(clim[0]), float(clim[1])
+        if not np.isfinite(low) or not np.isfinite(high):
+            # Datasets without finite values
+            low, high = 0., 1.
+        self.clim = (low, high)
+
+    @property
+    def display_limits(self):
+        """
+        Color limits at which quantized buffers show the contrast limits
+        """
+        if self.dtype == np.uint8:
+            return 0, 255
+        return 0., 1.
+
+    def _scale(self):
+        return max(self.clim[1] - self.clim[0], np.finfo(np.float32).tiny)
+
+    def quantize(self, data):
+        """
+        Converts an image to a display buffer
+
+        Parameters
+        ----------
+        data : array-like
+            Values to convert
+
+        Returns
+        -------
+        buffer : numpy.ndarray
+            Quantized values of the dtype of the quantizer
+        """
+        data = np.asarray(data)
+        if np.iscomplexobj(data):
+            data = np.abs(data)
+        # Single precision keeps the temporary copy small
+        data = (data.astype(np.float32) - np.float32(self.clim[0])) / \
+            np.float32(self._scale())
+        if self.dtype == np.uint8:
+            data = np.rint(np.clip(data * 255, 0, 255))
+            return np.nan_to_num(data).astype(np.uint8)
+        return data.astype(np.float16)
+
+    def dequantize(self, buffer):
+        """
+        Converts a display buffer back to approximate values of the data
+
+        Parameters
+        ----------
+        buffer : array-like
+            Quantized values
+
+        Returns
+        -------
+        data : numpy.ndarray
+            Values in the units of the data. Values of 'uint8' buffers are
+            clipped to the contrast limits
+        """
+        buffer = np.asarray(buffer, dtype=np.float64)
+        if self.dtype == np.uint8:
+            buffer = buffer / 255.
+        return self.clim[0] + buffer * self._scale()
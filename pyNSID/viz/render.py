@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+Headless rendering of the Main datasets of many files to image files
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import json
+import time
+import hashlib
+from html import escape
+
+import h5py
+import numpy as np
+from joblib import Parallel, delayed
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from sidpy.base.string_utils import validate_single_string_arg, \
+    validate_list_of_strings
+
+from ..io.hdf_utils import get_all_main
+from .frame_reader import FrameReader
+from .tile_reader import TileReader
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['choose_plot_type', 'render_dataset', 'render_files']
+
+_FORMATS = ['png', 'svg', 'pdf', 'jpg']
+
+# Figures reused by all datasets rendered in a process, keyed by size and dpi
+_FIGURES = dict()
+
+
+def _lower_keys(dim_type_dict):
+    # sidpy writes the names of dimension types in upper case and calls time
+    # dimensions temporal
+    normalized = dict()
+    for key, val in dim_type_dict.items():
+        key = str(key).lower()
+        normalized['time' if key == 'temporal' else key] = val
+    return normalized
+
+
+def choose_plot_type(dim_type_dict):
+    """
+    Picks the kind of plot for a dataset from the types of its dimensions,
+    following :meth:`pyNSID.io.nsi_data.NSIDataset.visualize`
+
+    Parameters
+    ----------
+    dim_type_dict : dict
+        Indices of the dimensions keyed by dimension type, as returned by
+        :meth:`pyNSID.io.nsi_data.NSIDataset.get_dimens_types`
+
+    Returns
+    -------
+    plot_type : str or None
+        'curve', 'image', 'stack' or 'spectrum_image'. None if the
+        dimensions cannot be visualized yet
+    """
+    dim_type_dict = _lower_keys(dim_type_dict)
+    if 'spatial' in dim_type_dict:
+        if len(dim_type_dict['spatial']) == 1:
+            if len(dim_type_dict) == 1:
+                return 'curve'
+        elif len(dim_type_dict['spatial']) == 2:
+            if len(dim_type_dict) == 1:
+                return 'image'
+            if 'time' in dim_type_dict:
+                return 'stack'
+            if 'spectral' in dim_type_dict and \
+                    len(dim_type_dict['spectral']) == 1:
+                return 'spectrum_image'
+        return None
+    if 'reciprocal' in dim_type_dict:
+        if len(dim_type_dict['reciprocal']) == 2 and len(dim_type_dict) == 1:
+            return 'image'
+        return None
+    if 'spectral' in dim_type_dict and len(dim_type_dict['spectral']) == 1:
+        return 'curve'
+    return None
+
+
+def _get_figure(figsize, dpi):
+    key = (tuple(figsize), dpi)
+    fig = _FIGURES.get(key)
+    if fig is None:
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        _FIGURES[key] = fig
+    fig.clf()
+    return fig
+
+
+def _read_curve(h5_main, dim, max_points):
+    # Dimensions other than the curve's are held at index 0
+    stride = max(1, int(np.ceil(h5_main.shape[dim] / max_points)))
+    selection = [0] * h5_main.ndim
+    selection[dim] = slice(None, None, stride)
+    x_vec = h5_main.dims[dim][0][::stride]
+    return x_vec, np.asarray(h5_main[tuple(selection)])
+
+
+def _show_image(fig, axis, h5_main, image_dims, data, region, title, **kwargs):
+    extent = h5_main.make_extent(image_dims)
+    sizes = [h5_main.shape[dim] for dim in image_dims]
+    size_x = (extent[1] - extent[0]) / sizes[0]
+    size_y = (extent[2] - extent[3]) / sizes[1]
+    extent = [extent[0] + region[0] * size_x, extent[0] + region[1] * size_x,
+              extent[3] + region[3] * size_y, extent[3] + region[2] * size_y]
+    img = axis.imshow(np.abs(data).T if np.iscomplexobj(data) else data.T,
+                      extent=extent, **kwargs)
+    labels = h5_main.get_dimension_labels()
+    axis.set_xlabel(labels[image_dims[0]])
+    axis.set_ylabel(labels[image_dims[1]])
+    axis.set_title(title)
+    cbar = fig.colorbar(img, ax=axis)
+    cbar.set_label(h5_main.data_descriptor)
+
+
+def render_dataset(h5_main, fig, max_pixels=1024, max_points=4096, **kwargs):
+    """
+    Draws a static overview of a Main dataset without reading all of it when
+    possible.
+
+    Images are read at the resolution of `max_pixels`, from an image pyramid
+    when one is stored with the dataset. Stacks are represented by their
+    middle frame. Spectrum images show their spectral sum, computed in one
+    streaming pass or read back from a stored projection, next to the
+    spectrum of the central pixel. Curves are subsampled to `max_points`.
+
+    Parameters
+    ----------
+    h5_main : pyNSID.NSIDataset
+        Main dataset to draw
+    fig : matplotlib.figure.Figure
+        Empty figure to draw in
+    max_pixels : int, optional. Default = 1024
+        Maximum number of pixels along each side of images
+    max_points : int, optional. Default = 4096
+        Maximum number of points of curves
+    kwargs : dict
+        Passed on to :meth:`matplotlib.axes.Axes.imshow` for images
+
+    Returns
+    -------
+    plot_type : str or None
+        Kind of plot drawn. None if the dataset cannot be visualized yet
+    """
+    dim_types = _lower_keys(h5_main.get_dimens_types())
+    plot_type = choose_plot_type(dim_types)
+    name = h5_main.name
+    if plot_type is None:
+        return None
+
+    if plot_type == 'curve':
+        dim = (dim_types.get('spatial') or dim_types['spectral'])[0]
+        x_vec, y_vec = _read_curve(h5_main, dim, max_points)
+        axis = fig.add_subplot(1, 1, 1)
+        if np.iscomplexobj(y_vec):
+            axis.plot(x_vec, np.abs(y_vec), label='magnitude')
+            axis.legend()
+        else:
+            axis.plot(x_vec, y_vec)
+        axis.set_xlabel(h5_main.get_dimension_labels()[dim])
+        axis.set_ylabel(h5_main.data_descriptor)
+        axis.set_title(name)
+    elif plot_type == 'image':
+        image_dims = (dim_types.get('spatial') or dim_types['reciprocal'])[:2]
+        reader = TileReader(h5_main, image_dims)
+        data, region = reader.read_region([0, reader.shape[0]],
+                                          [0, reader.shape[1]],
+                                          (max_pixels, max_pixels))
+        axis = fig.add_subplot(1, 1, 1)
+        _show_image(fig, axis, h5_main, image_dims, data, region, name,
+                    **kwargs)
+    elif plot_type == 'stack':
+        image_dims = dim_types['spatial'][:2]
+        reader = FrameReader(h5_main, dim_types['time'][0], image_dims,
+                             prefetch_frames=0)
+        index = reader.num_frames // 2
+        frame = reader.read_frame(index)
+        stride = max(1, int(np.ceil(max(frame.shape) / max_pixels)))
+        axis = fig.add_subplot(1, 1, 1)
+        _show_image(fig, axis, h5_main, image_dims, frame[::stride, ::stride],
+                    [0, frame.shape[0], 0, frame.shape[1]],
+                    '{}\nframe {} of {}'.format(name, index, reader.num_frames),
+                    **kwargs)
+    else:
+        image_dims = dim_types['spatial'][:2]
+        spec_dim = dim_types['spectral'][0]
+        survey = FrameReader(h5_main, spec_dim, image_dims,
+                             prefetch_frames=0).project('sum')
+        stride = max(1, int(np.ceil(max(survey.shape) / max_pixels)))
+        axes = fig.subplots(ncols=2)
+        _show_image(fig, axes[0], h5_main, image_dims,
+                    survey[::stride, ::stride],
+                    [0, survey.shape[0], 0, survey.shape[1]], 'spectral sum',
+                    **kwargs)
+        fig.suptitle(name)
+        selection = [0] * h5_main.ndim
+        for dim in image_dims:
+            selection[dim] = h5_main.shape[dim] // 2
+        selection[spec_dim] = slice(None)
+        spectrum = np.asarray(h5_main[tuple(selection)])
+        axes[1].plot(h5_main.dims[spec_dim][0][()],
+                     np.abs(spectrum) if np.iscomplexobj(spectrum) else spectrum)
+        axes[1].set_xlabel(h5_main.get_dimension_labels()[spec_dim])
+        axes[1].set_ylabel(h5_main.data_descriptor)
+        axes[1].set_title('central spectrum')
+    fig.tight_layout()
+    return plot_type
+
+
+def _output_name(file_path, dset_path):
+    # Same-named files in different directories are told apart by a digest of
+    # the full paths, which every worker process computes alike
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    digest = hashlib.md5('{}:{}'.format(file_path, dset_path).encode('utf-8'))
+    return '__'.join([stem] + [part for part in dset_path.split('/') if part] +
+                     [digest.hexdigest()[:8]])
+
+
+def _render_file(file_path, output_dir, formats, figsize, dpi, max_pixels,
+                 kwargs):
+    records = []
+    try:
+        h5_file = h5py.File(file_path, mode='r')
+    except Exception as exep:
+        return [{'file_path': file_path, 'dset_path': None, 'plot_type': None,
+                 'outputs': [], 'elapsed_time': 0.,
+                 'error': '{}: {}'.format(type(exep).__name__, exep)}]
+    with h5_file:
+        for h5_main in get_all_main(h5_file):
+            record = {'file_path': file_path, 'dset_path': h5_main.name,
+                      'plot_type': None, 'outputs': [], 'error': None}
+            start = time.time()
+            try:
+                fig = _get_figure(figsize, dpi)
+                record['plot_type'] = render_dataset(h5_main, fig,
+                                                     max_pixels=max_pixels,
+                                                     **kwargs)
+                if record['plot_type'] is not None:
+                    name = _output_name(file_path, h5_main.name)
+                    for fmt in formats:
+                        out_path = os.path.join(output_dir,
+                                                '{}.{}'.format(name, fmt))
+                        fig.savefig(out_path, format=fmt)
+                        record['outputs'].append(os.path.basename(out_path))
+            except Exception as exep:
+                record['error'] = '{}: {}'.format(type(exep).__name__, exep)
+            record['elapsed_time'] = time.time() - start
+            records.append(record)
+    return records
+
+
+def _write_html_index(records, html_path):
+    rows = []
+    for rec in records:
+        if len(rec['outputs']) > 0:
+            cell = '<img src="{}" width="480">'.format(escape(rec['outputs'][0]))
+        else:
+            cell = escape(rec['error'] or 'not rendered')
+        rows.append('<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>'
+                    ''.format(escape(rec['file_path']),
+                              escape(rec['dset_path'] or ''),
+                              escape(rec['plot_type'] or ''), cell))
+    with open(html_path, mode='w') as file_handle:
+        file_handle.write('<html><body><table border="1">\n'
+                          '<tr><th>File</th><th>Dataset</th><th>Plot</th>'
+                          '<th>Rendering</th></tr>\n' + '\n'.join(rows) +
+                          '\n</table></body></html>\n')
+
+
+def render_files(file_paths, output_dir, formats=('png',), n_jobs=-1,
+                 figsize=(6, 4.5), dpi=100, max_pixels=1024, verbose=False,
+                 **kwargs):
+    """
+    Renders every Main dataset in many HDF5 files to image files without a
+    display. Files are processed in parallel worker processes, each of which
+    reuses a single figure for all the datasets it renders. See
+    :func:`render_dataset` for what is drawn.
+
+    The outcome of each dataset is listed in 'index.json' in `output_dir`.
+    'index.html' shows the renderings in a table for quick inspection.
+
+    Parameters
+    ----------
+    file_paths : str or list of str
+        Paths to HDF5 files
+    output_dir : str
+        Directory in which the renderings and the index are written. It is
+        created if needed
+    formats : list of str, optional. Default = ('png',)
+        Formats of the renderings. Any of 'png', 'svg', 'pdf' and 'jpg'
+    n_jobs : int, optional. Default = -1 (all cores)
+        Number of worker processes
+    figsize : tuple of float, optional. Default = (6, 4.5)
+        Size of the figures in inches
+    dpi : int, optional. Default = 100
+        Resolution of raster renderings
+    max_pixels : int, optional. Default = 1024
+        Maximum number of pixels along each side of images
+    verbose : bool, optional. Default = False
+        Whether or not to print a summary
+    kwargs : dict
+        Passed on to :meth:`matplotlib.axes.Axes.imshow` for images
+
+    Returns
+    -------
+    records : list of dict
+        One dictionary per Main dataset with the 'file_path', 'dset_path',
+        'plot_type', the names of the rendered files ('outputs'), the
+        'elapsed_time' in seconds and the 'error' if any
+    """
+    if isinstance(file_paths, (str, unicode)):
+        file_paths = [file_paths]
+    file_paths = [os.path.abspath(path) for path in
+                  validate_list_of_strings(file_paths, 'file_paths')]
+    output_dir = validate_single_string_arg(output_dir, 'output_dir')
+    formats = validate_list_of_strings(list(formats), 'formats')
+    for fmt in formats:
+        if fmt not in _FORMATS:
+            raise ValueError('formats should be among {}'.format(_FORMATS))
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    args = (output_dir, formats, tuple(figsize), dpi, max_pixels, kwargs)
+    if len(file_paths) == 1 or n_jobs == 1:
+        results = [_render_file(path, *args) for path in file_paths]
+    else:
+        results = Parallel(n_jobs=n_jobs)(delayed(_render_file)(path, *args)
+                                          for path in file_paths)
+    records = [record for result in results for record in result]
+
+    with open(os.path.join(output_dir, 'index.json'), mode='w') as file_handle:
+        json.dump(records, file_handle, indent=1)
+    _write_html_index(records, os.path.join(output_dir, 'index.html'))
+    if verbose:
+        failed = len([rec for rec in records if rec['error'] is not None])
+        print('Rendered {} Main datasets from {} files. {} failed'
+              ''.format(len(records) - failed, len(file_paths), failed))
+    return records
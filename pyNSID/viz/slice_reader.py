@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Reading and caching of orthogonal planes through large volumes
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+import threading
+from collections import OrderedDict
+
+import h5py
+import numpy as np
+
+from sidpy.base.num_utils import contains_integers
+
+from ..io.hdf_utils.pyramid import get_volume_pyramid, write_volume_pyramid
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['SliceReader']
+
+
+class SliceReader(object):
+    """
+    Reads planes normal to each of the three spatial dimensions of a volume.
+    Each plane is read with a single hyperslab read, so the volume is never
+    loaded in its entirety. Planes that were read are kept in a
+    least-recently-used cache.
+
+    Coarse previews of planes can be read from a multi-resolution pyramid of
+    the volume (see :func:`pyNSID.io.hdf_utils.write_volume_pyramid`). They
+    are meant to be shown while a cursor is moving, when reading planes at
+    full resolution would lag behind.
+
+    Notes
+    -----
+    Axes are numbered 0, 1 and 2 in the order of the spatial dimensions given
+    to the constructor. Planes are returned with their two axes in that
+    order, i.e. the plane normal to axis 1 has axes 0 and 2. Dimensions other
+    than the spatial dimensions are held at index 0.
+
+    >>> reader = SliceReader(h5_main, spatial_dims=[0, 1, 2], pyramid=True)
+    >>> plane, factor = reader.get_plane(2, 100)
+    >>> preview, factor = reader.get_plane(2, 120, preview=True)
+    """
+
+    def __init__(self, dset, spatial_dims, max_mem_mb=256, pyramid=None,
+                 preview_size=256, quantizer=None):
+        """
+        Parameters
+        ----------
+        dset : h5py.Dataset or numpy.ndarray
+            Volume with at least three dimensions
+        spatial_dims : list of int
+            Indices of the three spatial dimensions
+        max_mem_mb : float, optional. Default = 256
+            Upper bound on the size of the cached planes in MB. At least one
+            plane is always cached
+        pyramid : bool, optional. Default = None
+            None to use a pyramid stored with `dset` if there is one, True to
+            also build and store the pyramid if needed and False to always
+            read from `dset`
+        preview_size : int, optional. Default = 256
+            Largest side of the planes of previews
+        quantizer : pyNSID.viz.quantize.DisplayQuantizer, optional
+            Converts planes to compact display buffers before they are cached
+            and returned by :meth:`get_plane`
+        """
+        spatial_dims = list(spatial_dims)
+        if len(spatial_dims) != 3 or \
+                not contains_integers(spatial_dims, min_val=0) or \
+                max(spatial_dims) >= len(dset.shape) or \
+                len(set(spatial_dims)) != 3:
+            raise ValueError('spatial_dims should be three distinct dimensions'
+                             ' of dset')
+        self.dset = dset
+        self.spatial_dims = [int(dim) for dim in spatial_dims]
+        self.shape = tuple(dset.shape[dim] for dim in self.spatial_dims)
+        self.max_bytes = int(max_mem_mb * 1024 ** 2)
+        self.preview_size = int(preview_size)
+        self.quantizer = quantizer
+
+        # Levels are stored with the spatial dimensions in ascending order
+        self.levels = []
+        if pyramid is not False and isinstance(dset, h5py.Dataset):
+            self.levels = get_volume_pyramid(dset, self.spatial_dims)
+            if len(self.levels) == 0 and pyramid:
+                write_volume_pyramid(dset, self.spatial_dims)
+                self.levels = get_volume_pyramid(dset, self.spatial_dims)
+
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def preview_factor(self, axis):
+        """
+        Returns the downsampling factor of previews of planes normal to an axis
+
+        Parameters
+        ----------
+        axis : int
+            Axis normal to the plane
+
+        Returns
+        -------
+        factor : int
+            Factor of the finest level of the pyramid whose planes fit in
+            `preview_size`, of the coarsest level if none does, or 1 without
+            a pyramid
+        """
+        plane_shape = [size for index, size in enumerate(self.shape)
+                       if index != axis]
+        factor = 1
+        for level_factor, _ in self.levels:
+            factor = level_factor
+            if max(plane_shape) // level_factor <= self.preview_size:
+                break
+        return factor
+
+    def read_plane(self, axis, index, factor=1):
+        """
+        Reads a plane with a single hyperslab read, bypassing the cache
+
+        Parameters
+        ----------
+        axis : int
+            Axis normal to the plane
+        index : int
+            Position of the plane along `axis` in voxels of the volume
+        factor : int, optional. Default = 1
+            Downsampling factor of the level of the pyramid to read from
+
+        Returns
+        -------
+        plane : numpy.ndarray
+            Two dimensional plane
+        """
+        axis, index = int(axis), int(index)
+        if axis not in (0, 1, 2):
+            raise ValueError('axis should be 0, 1 or 2')
+        if not 0 <= index < self.shape[axis]:
+            raise IndexError('index {} is out of bounds for an axis of {} '
+                             'voxels'.format(index, self.shape[axis]))
+        if factor == 1:
+            selection = [0] * len(self.dset.shape)
+            for dim in self.spatial_dims:
+                selection[dim] = slice(None)
+            selection[self.spatial_dims[axis]] = index
+            plane = np.asarray(self.dset[tuple(selection)])
+        else:
+            h5_level = dict(self.levels)[factor]
+            selection = [slice(None)] * 3
+            position = int(np.argsort(np.argsort(self.spatial_dims))[axis])
+            selection[position] = min(index // factor,
+                                       h5_level.shape[position] - 1)
+            plane = np.asarray(h5_level[tuple(selection)])
+        # Either source returns the remaining dimensions in ascending order
+        remaining = [dim for number, dim in enumerate(self.spatial_dims)
+                     if number != axis]
+        if remaining[0] > remaining[1]:
+            plane = plane.T
+        return plane
+
+    def _store(self, key, plane):
+        self._cache[key] = plane
+        self._cache_bytes += plane.nbytes
+        while len(self._cache) > 1 and self._cache_bytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.nbytes
+
+    def get_plane(self, axis, index, preview=False):
+        """
+        Returns a plane from the cache, reading it if needed
+
+        Parameters
+        ----------
+        axis : int
+            Axis normal to the plane
+        index : int
+            Position of the plane along `axis` in voxels of the volume
+        preview : bool, optional. Default = False
+            Whether or not to return a coarse preview of the plane
+
+        Returns
+        -------
+        plane : numpy.ndarray
+            Two dimensional plane, quantized if the reader has a quantizer.
+            Treat it as read-only since it is shared with the cache
+        factor : int
+            Number of voxels of the volume along each side of a pixel of
+            `plane`
+        """
+        factor = self.preview_factor(axis) if preview else 1
+        key = (int(axis), int(index) // factor, factor)
+        with self._lock:
+            plane = self._cache.get(key)
+            if plane is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return plane, factor
+            self.misses += 1
+        plane = self.read_plane(axis, index, factor)
+        if self.quantizer is not None:
+            plane = self.quantizer.quantize(plane)
+        with self._lock:
+            if key not in self._cache:
+                self._store(key, plane)
+        return plane, factor
+
+    def clear(self):
+        """
+        Empties the cache of planes
+        """
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Resolution-aware reading of regions of large images for display
+
+Created on Mon Oct 19 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+import threading
+
+import h5py
+import numpy as np
+
+from sidpy.base.num_utils import contains_integers
+
+from ..io.hdf_utils.pyramid import get_image_pyramid, write_image_pyramid
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['TileReader']
+
+
+class TileReader(object):
+    """
+    Reads regions of a large image at no more than the resolution at which
+    they are displayed. Regions are read with a stride from the coarsest
+    level of a multi-resolution pyramid (see
+    :func:`pyNSID.io.hdf_utils.write_image_pyramid`) that still provides the
+    requested resolution, or from the image itself. The cost of a read
+    therefore depends on the size of the display rather than the size of
+    the image.
+
+    Reads can also be requested asynchronously. A background thread serves
+    the most recent request only, so that requests made while panning or
+    zooming quickly never queue up.
+
+    Notes
+    -----
+    Regions are given and returned in pixels of the image, along the
+    spatial dimensions in the order given to the constructor. Dimensions
+    other than the spatial dimensions are held at index 0.
+
+    >>> reader = TileReader(h5_main, image_dims=[0, 1], pyramid=True)
+    >>> data, region = reader.read_region([0, 20000], [0, 20000], (800, 800))
+    """
+
+    def __init__(self, dset, image_dims, pyramid=None):
+        """
+        Parameters
+        ----------
+        dset : h5py.Dataset or numpy.ndarray
+            Image or stack of images
+        image_dims : list of int
+            Indices of the two spatial dimensions
+        pyramid : bool, optional. Default = None
+            None to use a pyramid stored with `dset` if there is one, True to
+            also build and store the pyramid if needed and False to always
+            read from `dset`
+        """
+        image_dims = list(image_dims)
+        if len(image_dims) != 2 or not contains_integers(image_dims, min_val=0) \
+                or max(image_dims) >= len(dset.shape) or \
+                image_dims[0] == image_dims[1]:
+            raise ValueError('image_dims should be two distinct dimensions of '
+                             'dset')
+        self.dset = dset
+        self.image_dims = [int(dim) for dim in image_dims]
+        self.shape = tuple(dset.shape[dim] for dim in self.image_dims)
+
+        # Levels are stored with the spatial dimensions in ascending order
+        self.levels = []
+        if pyramid is not False and isinstance(dset, h5py.Dataset):
+            self.levels = get_image_pyramid(dset, self.image_dims)
+            if len(self.levels) == 0 and pyramid:
+                write_image_pyramid(dset, self.image_dims)
+                self.levels = get_image_pyramid(dset, self.image_dims)
+
+        self._lock = threading.Condition()
+        self._request = None
+        self._result = None
+        self._serving = False
+        self._closed = False
+        self._thread = None
+
+    def _select(self, factor, ranges, stride):
+        if factor == 1:
+            source = self.dset
+            selection = [0] * len(self.dset.shape)
+            for dim, (start, stop) in zip(self.image_dims, ranges):
+                selection[dim] = slice(start, stop, stride)
+        else:
+            source = dict(self.levels)[factor]
+            selection = [None, None]
+            for axis, (start, stop) in zip(np.argsort(np.argsort(self.image_dims)),
+                                           ranges):
+                selection[axis] = slice(start, stop, stride)
+        # Either source returns the spatial dimensions in ascending order
+        data = np.asarray(source[tuple(selection)])
+        if self.image_dims[0] > self.image_dims[1]:
+            data = data.T
+        return data
+
+    def read_region(self, x_range, y_range, max_shape):
+        """
+        Reads a region of the image at the resolution needed to display it in
+        about `max_shape` pixels
+
+        Parameters
+        ----------
+        x_range : list of int
+            First pixel and stop pixel along the first spatial dimension
+        y_range : list of int
+            First pixel and stop pixel along the second spatial dimension
+        max_shape : tuple of int
+            Number of display pixels along each spatial dimension
+
+        Returns
+        -------
+        data : numpy.ndarray
+            Pixels of the region, possibly subsampled or averaged
+        region : list of int
+            First and stop pixels of the image along each spatial dimension
+            covered by `data` - [x_start, x_stop, y_start, y_stop]
+        """
+        ranges = []
+        for (start, stop), size in zip([x_range, y_range], self.shape):
+            start = int(np.clip(np.floor(start), 0, size - 1))
+            stop = int(np.clip(np.ceil(stop), start + 1, size))
+            ranges.append((start, stop))
+        step = max(1, int(max([np.ceil((stop - start) / max(1, int(pixels)))
+                               for (start, stop), pixels
+                               in zip(ranges, max_shape)])))
+
+        factor = 1
+        for level_factor, _ in self.levels:
+            if level_factor <= step:
+                factor = level_factor
+        stride = max(1, step // factor)
+
+        level_ranges = []
+        for (start, stop), size in zip(ranges, self.shape):
+            level_size = size // factor
+            level_start = min(start // factor, level_size - 1)
+            level_stop = max(level_start + 1,
+                             min(level_size, -(-stop // factor)))
+            level_ranges.append((level_start, level_stop))
+        data = self._select(factor, level_ranges, stride)
+
+        region = []
+        for (level_start, _), num, size in zip(level_ranges, data.shape,
+                                               self.shape):
+            region += [level_start * factor,
+                       min(size, (level_start + num * stride) * factor)]
+        return data, region
+
+    def request(self, x_range, y_range, max_shape):
+        """
+        Asks the background thread to read a region. See :meth:`read_region`
+        for the parameters. A new request supersedes any request that has
+        not been served yet. Collect the result with :meth:`poll`
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._request = (x_range, y_range, max_shape)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._read_loop,
+                                                name='TileReader')
+                self._thread.daemon = True
+                self._thread.start()
+            self._lock.notify()
+
+    def _read_loop(self):
+        while True:
+            with self._lock:
+                while self._request is None and not self._closed:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                request = self._request
+                self._request = None
+                self._serving = True
+            try:
+                result = self.read_region(*request)
+            except Exception as error:
+                result = error
+            with self._lock:
+                self._serving = False
+                # Results of superseded requests are dropped
+                if self._request is None:
+                    self._result = result
+
+    def busy(self):
+        """
+        Returns whether or not a requested region has not been collected yet
+
+        Returns
+        -------
+        bool
+        """
+        with self._lock:
+            return self._request is not None or self._serving or \
+                self._result is not None
+
+    def poll(self):
+        """
+        Returns the region read for the most recent request, once
+
+        Returns
+        -------
+        result : tuple or None
+            (data, region) as returned by :meth:`read_region`. None if no new
+            region is available
+        """
+        with self._lock:
+            result = self._result
+            self._result = None
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        """
+        Stops the background thread
+        """
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers that write small NSID files for the tests
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+import h5py
+import numpy as np
+
+from sidpy.sid import Dimension
+
+from pyNSID.io.hdf_utils import write_main_dataset
+
+
+def write_nsid_file(file_path, shape=(8, 10, 12),
+                    dim_types=('spatial', 'spatial', 'spectral'),
+                    dset_name='Raw_Data', data_type='spectrum_image',
+                    dtype=np.float32, group_name='Measurement_000', mode='w',
+                    **kwargs):
+    """
+    Writes a Main dataset with random values and returns the open file, the
+    Main dataset and the numpy array that was written
+    """
+    h5_file = h5py.File(file_path, mode=mode)
+    h5_group = h5_file.require_group(group_name)
+    data = np.random.rand(*shape).astype(dtype)
+    dim_dict = dict()
+    for index, (size, dim_type) in enumerate(zip(shape, dim_types)):
+        dim_dict[index] = Dimension(values=np.arange(size) * 0.5,
+                                    name='{}_dim_{}'.format(dset_name, index),
+                                    quantity='Length', units='nm',
+                                    dimension_type=dim_type)
+    h5_main = write_main_dataset(h5_group, data, dset_name, 'Intensity',
+                                 'counts', data_type, 'EELS', 'simulation',
+                                 dim_dict, **kwargs)
+    return h5_file, h5_main, data
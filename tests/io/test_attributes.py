@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import read_attributes, write_attributes, \
+    copy_attributes
+
+
+class TestBulkAttributes(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file = h5py.File(os.path.join(self.tmp_dir, 'attrs.h5'),
+                                 mode='w')
+        self.h5_dset = self.h5_file.create_dataset('Data', data=np.arange(4))
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        write_attributes(self.h5_dset, {'units': 'nm', 'skipped': None,
+                                        'labels': ['X', 'Y'],
+                                        'values': np.arange(3),
+                                        'source': self.h5_file.ref})
+        attrs = read_attributes(self.h5_dset, skip_refs=True)
+        self.assertEqual(sorted(attrs.keys()), ['labels', 'units', 'values'])
+        self.assertEqual(attrs['units'], 'nm')
+        self.assertEqual(list(attrs['labels']), ['X', 'Y'])
+        self.assertTrue(np.array_equal(attrs['values'], np.arange(3)))
+        self.assertEqual(read_attributes(self.h5_dset, attr_names=['units',
+                                                                   'missing']),
+                         {'units': 'nm'})
+
+    def test_reads_follow_writes(self):
+        write_attributes(self.h5_dset, {'units': 'nm'})
+        self.assertEqual(read_attributes(self.h5_dset)['units'], 'nm')
+        write_attributes(self.h5_dset, {'units': 'um'})
+        self.assertEqual(read_attributes(self.h5_dset)['units'], 'um')
+        # Writes through other handles or h5py itself are seen as well
+        self.h5_dset.attrs['units'] = 'pm'
+        self.assertEqual(read_attributes(self.h5_dset)['units'], 'pm')
+        self.h5_file['Data'].attrs['units'] = 'fm'
+        self.assertEqual(read_attributes(self.h5_dset)['units'], 'fm')
+
+    def test_copy_skips_dimension_scale_attributes(self):
+        h5_scale = self.h5_file.create_dataset('X', data=np.arange(4))
+        write_attributes(h5_scale, {'units': 'nm'})
+        self.h5_dset.dims[0].attach_scale(h5_scale)
+        h5_new = self.h5_file.create_dataset('Copy', data=np.arange(4))
+        copy_attributes(h5_scale, h5_new, skip_refs=False)
+        self.assertEqual(sorted(h5_new.attrs.keys()), ['units'])
+
+    def test_copy_keeps_user_attributes_of_other_objects(self):
+        h5_group = self.h5_file.create_group('Group')
+        write_attributes(h5_group, {'NAME': 'sample', 'CLASS': 'crystal'})
+        write_attributes(self.h5_dset, {'NAME': 'trace'})
+        h5_new_group = self.h5_file.create_group('Copy_Group')
+        copy_attributes(h5_group, h5_new_group)
+        self.assertEqual(read_attributes(h5_new_group),
+                         {'NAME': 'sample', 'CLASS': 'crystal'})
+        h5_new = self.h5_file.create_dataset('Copy', data=np.arange(4))
+        copy_attributes(self.h5_dset, h5_new)
+        self.assertEqual(read_attributes(h5_new), {'NAME': 'trace'})
+
+
+if __name__ == '__main__':
+    unittest.main()
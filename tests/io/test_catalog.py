@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import warnings
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+import numpy as np
+
+from pyNSID.io.catalog import NSIDCatalog, scan_file
+from pyNSID.io.hdf_utils import copy_attributes, write_attributes
+
+from .data_utils import write_nsid_file
+
+
+class TestNSIDCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'sub'))
+        for index, shape in enumerate([(4, 5, 6), (8, 10, 12)]):
+            h5_file, _, _ = write_nsid_file(os.path.join(self.root, 'sub',
+                                                         'f{}.h5'.format(index)),
+                                            shape=shape)
+            h5_file.close()
+        self.catalog = NSIDCatalog(':memory:')
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.root)
+
+    def test_scan_file(self):
+        records = scan_file(os.path.join(self.root, 'sub', 'f0.h5'))
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['shape'], (4, 5, 6))
+        self.assertEqual(records[0]['data_type'], 'spectrum_image')
+
+    def test_incremental_scan(self):
+        stats = self.catalog.scan(self.root, n_jobs=1)
+        self.assertEqual(stats['added'], 2)
+        stats = self.catalog.scan(self.root, n_jobs=1)
+        self.assertEqual(stats['unchanged'], 2)
+        os.remove(os.path.join(self.root, 'sub', 'f0.h5'))
+        stats = self.catalog.scan(self.root, n_jobs=1)
+        self.assertEqual(stats['removed'], 1)
+        self.assertEqual(len(self.catalog), 1)
+
+    def test_query(self):
+        self.catalog.scan(self.root, n_jobs=1)
+        entries = self.catalog.query(min_nbytes=4 * 8 * 10 * 12,
+                                     dimension_type='spectral')
+        self.assertEqual(len(entries), 1)
+        entry = pickle.loads(pickle.dumps(entries[0]))
+        h5_main = entry.open()
+        self.assertEqual(h5_main.shape, (8, 10, 12))
+        h5_main.file.close()
+        self.assertEqual(self.catalog.query(modality='AFM'), [])
+
+    def test_non_numeric_scale(self):
+        file_path = os.path.join(self.root, 'sub', 'f0.h5')
+        h5_file, h5_main, _ = write_nsid_file(file_path, shape=(4, 5, 6),
+                                              mode='a', dset_name='Labels')
+        h5_scale = h5_main.dims[2][0]
+        labels = h5_scale.parent.create_dataset(
+            'labels', data=np.array(['a', 'b', 'c', 'd', 'e', 'f'], dtype='S1'))
+        copy_attributes(h5_scale, labels)
+        write_attributes(labels, {'name': 'labels'})
+        h5_main.dims[2].detach_scale(h5_scale)
+        labels.make_scale('labels')
+        h5_main.dims[2].attach_scale(labels)
+        h5_main.dims[2].label = 'labels'
+        h5_file.close()
+        records = scan_file(file_path)
+        self.assertEqual(len(records), 2)
+        dims = dict((rec['dset_path'].split('/')[-1], rec['dimensions'])
+                    for rec in records)
+        self.assertIsNone(dims['Labels'][2]['first'])
+        self.assertEqual(dims['Raw_Data'][2]['last'], 2.5)
+
+    def test_failed_rescan_drops_entries(self):
+        self.catalog.scan(self.root, n_jobs=1)
+        file_path = os.path.join(self.root, 'sub', 'f0.h5')
+        with open(file_path, mode='ab') as file_handle:
+            file_handle.write(b'0')
+        with mock.patch('pyNSID.io.catalog.scan_file',
+                        side_effect=ValueError('corrupted')):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                stats = self.catalog.scan(self.root, n_jobs=1)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(len(self.catalog), 1)
+        # The file is scanned again once it can be read
+        stats = self.catalog.scan(self.root, n_jobs=1)
+        self.assertEqual(stats['added'], 1)
+        self.assertEqual(len(self.catalog), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+
+from pyNSID.io.hdf_utils import write_chunk_checksums, get_chunk_checksums, \
+    diff_chunks, verify_chunk_checksums, verify_files, datasets_equal, \
+    copy_dataset
+
+from .data_utils import write_nsid_file
+
+
+class TestChunkChecksums(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'source.h5')
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            self.file_path, shape=(20, 30, 12), chunks=(10, 10, 12),
+            chunk_checksums=True)
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_written_with_main_dataset(self):
+        checksums, block_shape = get_chunk_checksums(self.h5_main)
+        self.assertEqual(block_shape, (10, 10, 12))
+        self.assertEqual(checksums.shape, (2, 3, 1, 16))
+
+    def test_diff_across_chunking(self):
+        h5_copy = copy_dataset(self.h5_main, self.h5_file, alias='copy',
+                               chunks=(20, 30, 1))
+        self.assertEqual(diff_chunks(self.h5_main, h5_copy), [])
+        h5_copy[12, 25, 3] = -1
+        self.assertEqual(diff_chunks(self.h5_main, h5_copy),
+                         [(slice(10, 20), slice(20, 30), slice(0, 12))])
+        self.assertFalse(datasets_equal(self.h5_main, h5_copy))
+
+    def test_stored_checksums_short_circuit(self):
+        h5_copy = copy_dataset(self.h5_main, self.h5_file, alias='copy')
+        write_chunk_checksums(h5_copy)
+        self.assertTrue(datasets_equal(self.h5_main, h5_copy,
+                                       use_checksums=True))
+        h5_copy[0, 0, 0] = -1
+        # Stored checksums are not trusted unless asked to
+        self.assertFalse(datasets_equal(self.h5_main, h5_copy))
+        self.assertTrue(datasets_equal(self.h5_main, h5_copy,
+                                       use_checksums=True))
+        with self.assertRaises(ValueError):
+            copy_dataset(self.h5_main, self.h5_file, alias='copy')
+
+    def test_checksums_respect_tolerance(self):
+        h5_copy = copy_dataset(self.h5_main, self.h5_file, alias='copy')
+        h5_copy[0, 0, 0] = 1 + 1E-6
+        self.h5_main[0, 0, 0] = 1
+        write_chunk_checksums(self.h5_main)
+        write_chunk_checksums(h5_copy)
+        # Differing checksums fall back to comparing the values
+        self.assertTrue(datasets_equal(self.h5_main, h5_copy,
+                                       use_checksums=True))
+        self.assertFalse(datasets_equal(self.h5_main, h5_copy, atol=0,
+                                        rtol=0, use_checksums=True))
+
+    def test_verify(self):
+        self.assertEqual(verify_chunk_checksums(self.h5_main), [])
+        self.h5_main[15, 5, 0] = -1
+        self.assertEqual(len(verify_chunk_checksums(self.h5_main)), 1)
+        self.h5_file.close()
+        report = verify_files([self.file_path], n_jobs=1)
+        self.assertEqual(len(report[self.file_path]['/Measurement_000/Raw_Data']), 1)
+        self.h5_file = h5py.File(self.file_path, mode='r')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import copy_object_graph, copy_linked_objects, \
+    check_if_main, copy_dataset, copy_raw_chunks, have_same_layout, \
+    datasets_equal
+
+from .data_utils import write_nsid_file
+
+
+class TestCopyObjectGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'source.h5'))
+        h5_group = self.h5_main.parent
+        # Second dataset sharing the dimension scales of the first
+        self.h5_other = h5_group.create_dataset('Other',
+                                                data=np.ones(self.data.shape))
+        for dim_ind, dim in enumerate(self.h5_main.dims):
+            self.h5_other.dims[dim_ind].attach_scale(dim[0])
+        self.h5_main.attrs['ancillary'] = self.h5_other.ref
+        self.h5_dest = h5py.File(os.path.join(self.tmp_dir, 'dest.h5'),
+                                 mode='w')
+
+    def tearDown(self):
+        self.h5_file.close()
+        self.h5_dest.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_shared_objects_copied_once(self):
+        h5_main, h5_other = copy_object_graph([self.h5_main, self.h5_other],
+                                              self.h5_dest)
+        self.assertEqual(sorted(self.h5_dest.keys()),
+                         ['Other', 'Raw_Data', 'Raw_Data_dim_0',
+                          'Raw_Data_dim_1', 'Raw_Data_dim_2'])
+        self.assertTrue(check_if_main(h5_main))
+        self.assertEqual(self.h5_dest[h5_main.attrs['ancillary']], h5_other)
+        for dim_ind in range(3):
+            self.assertEqual(h5_main.dims[dim_ind][0], h5_other.dims[dim_ind][0])
+        self.assertTrue(np.allclose(h5_main[()], self.data))
+
+    def test_group_subtree(self):
+        h5_group = copy_object_graph(self.h5_main.parent, self.h5_dest)[0]
+        self.assertEqual(h5_group.name, '/Measurement_000')
+        h5_main = h5_group['Raw_Data']
+        self.assertTrue(check_if_main(h5_main))
+        self.assertEqual(h5_main.dims[0][0].name,
+                         '/Measurement_000/Raw_Data_dim_0')
+
+    def test_copy_linked_objects(self):
+        h5_new = self.h5_dest.create_dataset('Copy', data=self.data)
+        copy_linked_objects(self.h5_main, h5_new)
+        self.assertEqual(self.h5_dest[h5_new.attrs['ancillary']].name,
+                         '/ancillary')
+        self.assertEqual(h5_new.dims[2].label, self.h5_main.dims[2].label)
+        self.assertEqual(h5_new.dims[2][0].name, '/Raw_Data_dim_2')
+
+    def test_same_named_scales(self):
+        h5_sources = []
+        for grp_name, step in [('A', 1.), ('B', 2.)]:
+            h5_group = self.h5_file.create_group(grp_name)
+            h5_scale = h5_group.create_dataset('x', data=np.arange(5) * step)
+            h5_scale.make_scale('x')
+            h5_dset = h5_group.create_dataset('data', data=np.ones(5) * step)
+            h5_dset.dims[0].attach_scale(h5_scale)
+            h5_sources.append(h5_dset)
+        h5_copies = copy_object_graph(h5_sources, self.h5_dest)
+        self.assertEqual(sorted(self.h5_dest.keys()),
+                         ['data', 'data_1', 'x', 'x_1'])
+        for h5_copy, step in zip(h5_copies, [1., 2.]):
+            self.assertTrue(np.allclose(h5_copy[()], step))
+            self.assertTrue(np.allclose(h5_copy.dims[0][0][()],
+                                        np.arange(5) * step))
+
+
+class TestCopyDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file = h5py.File(os.path.join(self.tmp_dir, 'source.h5'),
+                                 mode='w')
+        self.data = np.random.rand(40, 30)
+        self.h5_dset = self.h5_file.create_dataset(
+            'data', data=self.data, chunks=(10, 15), compression='gzip',
+            compression_opts=4, shuffle=True)
+        self.h5_dset.attrs['units'] = 'nm'
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_keep_layout(self):
+        h5_new = copy_dataset(self.h5_dset, self.h5_file, alias='copy')
+        self.assertTrue(have_same_layout(self.h5_dset, h5_new))
+        self.assertEqual(h5_new.chunks, (10, 15))
+        self.assertEqual(h5_new.compression_opts, 4)
+        self.assertEqual(h5_new.id.get_storage_size(),
+                         self.h5_dset.id.get_storage_size())
+        np.testing.assert_array_equal(h5_new[()], self.data)
+        self.assertEqual(h5_new.attrs['units'], 'nm')
+
+    def test_new_layout(self):
+        h5_new = copy_dataset(self.h5_dset, self.h5_file, alias='rechunked',
+                              chunks=(20, 30), compression='lzf')
+        self.assertEqual(h5_new.chunks, (20, 30))
+        self.assertEqual(h5_new.compression, 'lzf')
+        self.assertFalse(have_same_layout(self.h5_dset, h5_new))
+        np.testing.assert_array_equal(h5_new[()], self.data)
+
+    def test_other_file(self):
+        with h5py.File(os.path.join(self.tmp_dir, 'dest.h5'),
+                       mode='w') as h5_dest:
+            h5_group = h5_dest.create_group('Group')
+            h5_new = copy_dataset(self.h5_dset, h5_group)
+            self.assertEqual(h5_new.name, '/Group/data')
+            self.assertTrue(have_same_layout(self.h5_dset, h5_new))
+            np.testing.assert_array_equal(h5_new[()], self.data)
+            # Copying again into the same destination reuses the copy
+            self.assertEqual(copy_dataset(self.h5_dset, h5_group), h5_new)
+
+    def test_raw_chunks(self):
+        h5_new = self.h5_file.create_dataset(
+            'raw', shape=self.data.shape, dtype=self.data.dtype,
+            chunks=(10, 15), compression='gzip', compression_opts=4,
+            shuffle=True)
+        copy_raw_chunks(self.h5_dset, h5_new)
+        np.testing.assert_array_equal(h5_new[()], self.data)
+        self.assertEqual(h5_new.id.get_storage_size(),
+                         self.h5_dset.id.get_storage_size())
+
+    def test_sparse_fill_values(self):
+        h5_dsets = []
+        for name, fillvalue in [('fill_0', 0.), ('fill_1', 1.)]:
+            h5_dset = self.h5_file.create_dataset(
+                name, shape=(40, 30), dtype=np.float64, chunks=(10, 15),
+                fillvalue=fillvalue)
+            # Only the first chunk is allocated
+            h5_dset[:10, :15] = self.data[:10, :15]
+            h5_dsets.append(h5_dset)
+        self.assertFalse(have_same_layout(*h5_dsets))
+        self.assertFalse(datasets_equal(*h5_dsets))
+        with self.assertRaises(ValueError):
+            copy_raw_chunks(*h5_dsets)
+
+
+if __name__ == '__main__':
+    unittest.main()
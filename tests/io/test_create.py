@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import create_empty_datasets, check_if_main
+
+from .data_utils import write_nsid_file
+
+
+class TestCreateEmptyDatasets(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'source.h5'), chunks=(4, 5, 12),
+            chunk_checksums=True)
+        self.specs = [('Guess', np.float32, {'stage': 'guess'}),
+                      ('Fit', np.float32, {'stage': 'fit'}),
+                      ('Error', np.float64)]
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_shared_scales(self):
+        h5_dsets = create_empty_datasets(self.h5_main, self.specs,
+                                         fillvalue=-1)
+        self.assertEqual([h5_dset.name.split('/')[-1] for h5_dset in h5_dsets],
+                         ['Guess', 'Fit', 'Error'])
+        for h5_dset in h5_dsets:
+            self.assertTrue(check_if_main(h5_dset))
+            self.assertEqual(h5_dset.chunks, (4, 5, 12))
+            self.assertEqual(h5_dset.id.get_storage_size(), 0)
+            self.assertEqual(h5_dset.dims[2][0], self.h5_main.dims[2][0])
+            self.assertNotIn('chunk_checksums', h5_dset.attrs)
+        self.assertEqual(h5_dsets[1].attrs['stage'], 'fit')
+        self.assertEqual(h5_dsets[2].dtype, np.float64)
+        self.assertEqual(h5_dsets[0][0, 0, 0], -1)
+        self.assertEqual(h5_dsets[0].attrs['timestamp'],
+                         h5_dsets[2].attrs['timestamp'])
+
+    def test_other_file(self):
+        with h5py.File(os.path.join(self.tmp_dir, 'results.h5'),
+                       mode='w') as h5_dest:
+            h5_dsets = create_empty_datasets(self.h5_main, self.specs,
+                                             h5_group=h5_dest, skip_refs=True,
+                                             alloc_time='early')
+            self.assertTrue(all([check_if_main(h5_dset)
+                                 for h5_dset in h5_dsets]))
+            self.assertEqual(len(h5_dest.keys()), 6)
+            self.assertGreater(h5_dsets[0].id.get_storage_size(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
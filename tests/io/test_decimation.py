@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyNSID.io.hdf_utils import compute_minmax, compute_minmax_levels, \
+    get_minmax_pyramid, write_minmax_pyramid
+
+from .data_utils import write_nsid_file
+
+
+class TestMinMax(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'trace.h5'), shape=(10000,),
+            dim_types=('time',), data_type='spectrum', dtype=np.float64,
+            chunks=(512,))
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_compute(self):
+        # Blocks much smaller than the dataset and a partial last bucket
+        minmax = compute_minmax(self.h5_main, 30, start=7, stop=9000,
+                                max_mem_mb=1E-3)
+        self.assertEqual(minmax.shape, (300, 2))
+        np.testing.assert_array_equal(minmax[-1], [self.data[8977:9000].min(),
+                                                   self.data[8977:9000].max()])
+        np.testing.assert_array_equal(minmax[5], [self.data[157:187].min(),
+                                                  self.data[157:187].max()])
+
+    def test_levels(self):
+        levels = compute_minmax_levels(self.h5_main, base=16, factor=4,
+                                       min_buckets=20)
+        self.assertEqual([bucket for bucket, _ in levels], [16, 64, 256, 1024])
+        for bucket, level in levels:
+            np.testing.assert_array_equal(level,
+                                          compute_minmax(self.data, bucket))
+
+    def test_stored(self):
+        self.assertEqual(get_minmax_pyramid(self.h5_main), [])
+        write_minmax_pyramid(self.h5_main, base=16, factor=4, min_buckets=20)
+        levels = get_minmax_pyramid(self.h5_main)
+        self.assertEqual(len(levels), 4)
+        np.testing.assert_array_equal(levels[1][1][()],
+                                      compute_minmax(self.data, 64))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyNSID.io.derived import ComponentView
+
+from .data_utils import write_nsid_file
+
+
+class TestComponentView(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, _ = write_nsid_file(
+            os.path.join(self.tmp_dir, 'complex.h5'), shape=(10, 12, 16),
+            dtype=np.complex64, chunks=(3, 4, 16))
+        phase = np.cumsum(np.random.rand(10, 12, 16) * 2, axis=2)
+        self.data = (np.random.rand(10, 12, 16) *
+                     np.exp(1j * phase)).astype(np.complex64)
+        self.h5_main[()] = self.data
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_components(self):
+        for component, func in zip(['real', 'imag', 'magnitude', 'phase'],
+                                   [np.real, np.imag, np.abs, np.angle]):
+            # Blocks much smaller than the selections
+            view = self.h5_main.get_component(component, max_mem_mb=1E-3)
+            self.assertEqual(view.dtype, np.float32)
+            self.assertEqual(view.shape, self.data.shape)
+            expected = func(self.data)
+            for key in [(), 3, (slice(1, 9, 3), Ellipsis, -2),
+                        (Ellipsis, slice(2, None, 5))]:
+                np.testing.assert_allclose(view[key], expected[key],
+                                           rtol=1E-6)
+
+    def test_unwrapped_phase(self):
+        view = ComponentView(self.h5_main, 'phase', unwrap_axis=2,
+                             max_mem_mb=1E-3)
+        expected = np.unwrap(np.angle(self.data), axis=2)
+        for key in [(), (2, slice(None, None, 4), slice(5, 14, 3))]:
+            np.testing.assert_allclose(view[key], expected[key], rtol=1E-5,
+                                       atol=1E-5)
+        with self.assertRaises(ValueError):
+            ComponentView(self.h5_main, 'real', unwrap_axis=2)
+
+    def test_metadata_and_dask(self):
+        view = self.h5_main.get_component('magnitude')
+        self.assertEqual(view.make_extent([0, 1]),
+                         self.h5_main.make_extent([0, 1]))
+        self.assertTrue(view.data_descriptor.startswith('magnitude of'))
+        self.assertFalse(np.iscomplexobj(view))
+        self.assertAlmostEqual(float(view.to_dask().mean().compute()),
+                               float(np.abs(self.data).mean()), places=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
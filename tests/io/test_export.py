@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io import export_subset
+from pyNSID.io.hdf_utils import check_if_main, copy_attributes, link_as_main
+
+from .data_utils import write_nsid_file
+
+
+class TestExportSubset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'source.h5'), shape=(20, 30, 12),
+            chunks=(5, 5, 12), compression='gzip')
+        h5_meta = self.h5_main.parent.create_group('original_metadata')
+        h5_meta.attrs['microscope'] = 'Nion'
+        self.labels = [dim.label for dim in self.h5_main.dims]
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_slices_and_scales(self):
+        slice_dict = {self.labels[0]: slice(2, 12, 3),
+                      self.labels[1]: [1, 4, 5, 20],
+                      self.labels[2]: 7}
+        h5_new = export_subset(self.h5_main,
+                               os.path.join(self.tmp_dir, 'subset.h5'),
+                               slice_dicts=slice_dict, max_mem_mb=0.001)[0]
+        try:
+            self.assertTrue(check_if_main(h5_new))
+            self.assertEqual(h5_new.shape, (4, 4))
+            self.assertEqual(h5_new.compression, 'gzip')
+            expected = self.data[2:12:3][:, [1, 4, 5, 20]][:, :, 7]
+            self.assertTrue(np.array_equal(h5_new[()], expected))
+            self.assertTrue(np.allclose(h5_new.dims[1][0][()],
+                                        self.h5_main.dims[1][0][[1, 4, 5, 20]]))
+            self.assertEqual(h5_new.attrs['data_type'], 'spectrum_image')
+            h5_meta = h5_new.parent['original_metadata']
+            self.assertEqual(h5_meta.attrs['microscope'], 'Nion')
+        finally:
+            h5_new.file.close()
+
+    def test_rechunk_into_group(self):
+        with h5py.File(os.path.join(self.tmp_dir, 'dest.h5'), mode='w') as h5_dest:
+            h5_new = export_subset(self.h5_main, h5_dest.create_group('ROI'),
+                                   slice_dicts={self.labels[2]: [0, 3, 9]},
+                                   chunks=(20, 30, 1))[0]
+            self.assertEqual(h5_new.name, '/ROI/Measurement_000/Raw_Data')
+            self.assertEqual(h5_new.chunks, (20, 30, 1))
+            self.assertTrue(np.array_equal(h5_new[()],
+                                           self.data[:, :, [0, 3, 9]]))
+
+    def test_index_lists_on_two_dimensions(self):
+        slice_dict = {self.labels[0]: [0, 2, 5], self.labels[1]: [1, 3, 6]}
+        with h5py.File(os.path.join(self.tmp_dir, 'dest.h5'), mode='w') as h5_dest:
+            h5_new = export_subset(self.h5_main, h5_dest,
+                                   slice_dicts=slice_dict)[0]
+            self.assertTrue(check_if_main(h5_new))
+            expected = self.data[[0, 2, 5]][:, [1, 3, 6]]
+            self.assertTrue(np.array_equal(h5_new[()], expected))
+
+    def test_shared_scales_sliced_differently(self):
+        h5_other = self.h5_main.parent.create_dataset(
+            'Other', data=np.ones(self.data.shape, dtype=np.float32))
+        copy_attributes(self.h5_main, h5_other, skip_refs=True)
+        link_as_main(h5_other, dict((dim_ind, dim[0]) for dim_ind, dim
+                                    in enumerate(self.h5_main.dims)))
+        slice_dicts = [{self.labels[0]: slice(0, 10)},
+                       {self.labels[0]: slice(5, 9)}]
+        with h5py.File(os.path.join(self.tmp_dir, 'dest.h5'), mode='w') as h5_dest:
+            h5_new = export_subset([self.h5_main, h5_other], h5_dest,
+                                   slice_dicts=slice_dicts)
+            for h5_exported, sel in zip(h5_new, [slice(0, 10), slice(5, 9)]):
+                self.assertTrue(check_if_main(h5_exported))
+                h5_scale = h5_exported.dims[0][0]
+                # Labels lead to the attached scales
+                self.assertEqual(h5_exported.parent[h5_exported.dims[0].label],
+                                 h5_scale)
+                self.assertTrue(np.allclose(h5_scale[()],
+                                            self.h5_main.dims[0][0][sel]))
+            # Only the first dimension was sliced differently
+            self.assertEqual(h5_new[0].dims[1][0], h5_new[1].dims[1][0])
+            self.assertNotEqual(h5_new[0].dims[0][0], h5_new[1].dims[0][0])
+
+    def test_closes_file_on_failure(self):
+        file_path = os.path.join(self.tmp_dir, 'failed.h5')
+        with self.assertRaises(KeyError):
+            export_subset(self.h5_main, file_path,
+                          slice_dicts={'not_a_dimension': 0})
+        # Reopening for writing fails while the file is still open
+        with h5py.File(file_path, mode='w'):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import dask.array as da
+import h5py
+import numpy as np
+
+from sidpy.sid import Dimension
+
+from pyNSID.io import H5FilePool, NSIDataset
+from pyNSID.io.hdf_utils import write_main_dataset
+
+from .data_utils import write_nsid_file
+
+
+class TestH5FilePool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for index in range(4):
+            path = os.path.join(self.tmp_dir, 'f{}.h5'.format(index))
+            h5_file, _, _ = write_nsid_file(path, shape=(4, 5, 6))
+            h5_file.close()
+            self.paths.append(path)
+        self.dset_path = '/Measurement_000/Raw_Data'
+        self.pool = H5FilePool(max_open=2)
+
+    def tearDown(self):
+        self.pool.close_all()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_lookup_and_eviction(self):
+        first = self.pool.get_file(self.paths[0])
+        self.assertIs(self.pool.get_file(self.paths[0]), first)
+        self.assertEqual((self.pool.hits, self.pool.misses), (1, 1))
+        self.pool.get_file(self.paths[1])
+        self.pool.get_file(self.paths[0])
+        # f1 is now the least recently used handle
+        self.pool.get_file(self.paths[2])
+        self.assertEqual(len(self.pool), 2)
+        self.assertIn(self.paths[0], self.pool)
+        self.assertNotIn(self.paths[1], self.pool)
+        self.assertTrue(first.id.valid)
+
+    def test_lease(self):
+        with self.pool.lease(self.paths[0]) as h5_file:
+            for path in self.paths[1:]:
+                self.pool.get_file(path)
+            # Leased handles are neither evicted nor released
+            self.assertTrue(h5_file.id.valid)
+            with self.assertRaises(ValueError):
+                self.pool.release(self.paths[0])
+            with self.assertRaises(ValueError):
+                self.pool.get_file(self.paths[0], mode='r+')
+        self.assertEqual(len(self.pool), 2)
+
+    def test_cache_settings_deferred_while_leased(self):
+        with self.pool.lease(self.paths[0]) as h5_file:
+            self.pool.set_cache_settings(self.paths[0],
+                                         rdcc_nbytes=4 * 1024 ** 2)
+            self.assertTrue(h5_file.id.valid)
+            self.assertEqual(h5_file[self.dset_path].shape, (4, 5, 6))
+        self.assertFalse(h5_file.id.valid)
+        h5_file = self.pool.get_file(self.paths[0])
+        self.assertEqual(h5_file.id.get_access_plist().get_cache()[2],
+                         4 * 1024 ** 2)
+
+    def test_concurrent_leases(self):
+        errors = []
+
+        def work(offset):
+            try:
+                for step in range(20):
+                    path = self.paths[(offset + step) % len(self.paths)]
+                    with self.pool.lease(path) as h5_file:
+                        self.assertEqual(h5_file[self.dset_path][()].shape,
+                                         (4, 5, 6))
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(offset,))
+                   for offset in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.pool), 2)
+
+    def test_nsidataset_from_file(self):
+        h5_main = NSIDataset.from_file(self.paths[3], self.dset_path,
+                                       pool=self.pool)
+        self.assertIsInstance(h5_main, NSIDataset)
+        again = NSIDataset.from_file(self.paths[3], self.dset_path,
+                                     pool=self.pool)
+        self.assertEqual(again.file.id, h5_main.file.id)
+        with self.assertRaises(TypeError):
+            NSIDataset.from_file(self.paths[3],
+                                 '/Measurement_000/Raw_Data_dim_0',
+                                 pool=self.pool)
+
+
+class TestDaskWrite(unittest.TestCase):
+
+    def test_write_through_open_handle(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            h5_file, h5_main, _ = write_nsid_file(
+                os.path.join(tmp_dir, 'dask.h5'), shape=(6, 4),
+                dim_types=('spatial', 'spatial'), data_type='image')
+            data = np.random.rand(6, 4)
+            h5_new = write_main_dataset(h5_main.parent,
+                                        da.from_array(data, chunks=(3, 2)),
+                                        'Dask_Data', 'Intensity', 'counts',
+                                        'image', 'EELS', 'simulation',
+                                        {0: Dimension(np.arange(6), 'x', 'Length',
+                                                      'nm', 'spatial'),
+                                         1: Dimension(np.arange(4), 'y', 'Length',
+                                                      'nm', 'spatial')})
+            np.testing.assert_allclose(h5_new[()], data)
+            h5_file.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
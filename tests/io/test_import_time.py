@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+# sidpy 0.0.5 imports matplotlib, ipywidgets and joblib itself, so it is
+# imported before the heavy modules are dropped from sys.modules and blocked.
+# Any import of them while pyNSID is imported then raises instead of being
+# served from the modules sidpy already loaded
+BENCHMARK = """
+import json, sys, time
+HEAVY_MODULES = {heavy}
+def is_heavy(name):
+    return any(name == heavy or name.startswith(heavy + '.')
+               for heavy in HEAVY_MODULES)
+class Blocker(object):
+    def find_spec(self, name, path=None, target=None):
+        if is_heavy(name):
+            raise ImportError('pyNSID imported ' + name)
+import sidpy
+for name in [name for name in sys.modules if is_heavy(name)]:
+    del sys.modules[name]
+sys.meta_path.insert(0, Blocker())
+before = set(sys.modules)
+start = time.perf_counter()
+import pyNSID
+from pyNSID.io import NSIDataset
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed,
+                  'modules': sorted(set(sys.modules) - before)}}))
+"""
+
+HEAVY_MODULES = ['pyNSID.viz', 'sidpy.viz', 'matplotlib', 'mpl_toolkits',
+                 'PIL', 'joblib', 'ipywidgets']
+
+
+class TestImportTime(unittest.TestCase):
+
+    def run_benchmark(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([root, env.get('PYTHONPATH', '')])
+        script = BENCHMARK.format(heavy=repr(HEAVY_MODULES))
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         cwd=root, env=env)
+        return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+    def test_io_does_not_load_viz(self):
+        result = self.run_benchmark()
+        loaded = [name for name in result['modules']
+                  if any(name == heavy or name.startswith(heavy + '.')
+                         for heavy in HEAVY_MODULES)]
+        self.assertEqual(loaded, [])
+        # Typically a few tens of milliseconds
+        self.assertLess(result['elapsed'], 1.0)
+
+    def test_viz_on_first_use(self):
+        import pyNSID
+        from pyNSID.viz import FrameReader
+        self.assertIs(pyNSID.viz.FrameReader, FrameReader)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyNSID.io import ComponentView
+from pyNSID.io.hdf_utils import get_line_profile
+
+from .data_utils import write_nsid_file
+
+
+def bilinear(image, rows, cols):
+    row0 = np.clip(np.floor(rows).astype(int), 0, image.shape[0] - 2)
+    col0 = np.clip(np.floor(cols).astype(int), 0, image.shape[1] - 2)
+    row_frac, col_frac = rows - row0, cols - col0
+    return image[row0, col0] * (1 - row_frac) * (1 - col_frac) + \
+        image[row0 + 1, col0] * row_frac * (1 - col_frac) + \
+        image[row0, col0 + 1] * (1 - row_frac) * col_frac + \
+        image[row0 + 1, col0 + 1] * row_frac * col_frac
+
+
+class TestLineProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # Dimension scales run in steps of 0.5 nm
+        self.h5_file, self.h5_main, data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'image.h5'), shape=(96, 64, 3),
+            chunks=(16, 16, 3), dtype=np.float64)
+        self.data = data
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_interpolation(self):
+        profile, distance, chunks = get_line_profile(
+            self.h5_main, [[1.2, 2.0], [30.0, 25.3]], [0, 1],
+            indices={2: 1}, return_chunks=True)
+        self.assertEqual(distance.units, 'nm')
+        self.assertAlmostEqual(distance[-1], np.hypot(28.8, 23.3))
+        rows = np.linspace(1.2, 30.0, len(profile)) / 0.5
+        cols = np.linspace(2.0, 25.3, len(profile)) / 0.5
+        np.testing.assert_allclose(profile,
+                                   bilinear(self.data[:, :, 1], rows, cols))
+        # Only the chunks along the diagonal are read
+        self.assertLess(len(chunks), 6 * 4)
+
+    def test_width_and_order(self):
+        profile, _ = self.h5_main.get_line_profile([[5, 10], [20, 10]],
+                                                   width=3, num_samples=31)
+        np.testing.assert_allclose(profile,
+                                   self.data[10:41, 19:22, 0].mean(axis=1))
+        swapped, _ = get_line_profile(self.h5_main, [[10, 5], [10, 20]],
+                                      [1, 0], width=3, num_samples=31)
+        np.testing.assert_allclose(swapped, profile)
+
+    def test_outside(self):
+        profile, _ = get_line_profile(self.h5_main, [[-10, 10], [10, 10]],
+                                      [0, 1])
+        self.assertTrue(np.all(np.isnan(profile[:10])))
+        self.assertFalse(np.any(np.isnan(profile[-10:])))
+
+    def test_view_uses_scales(self):
+        h5_file, h5_main, data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'complex.h5'), shape=(20, 16),
+            dim_types=('spatial', 'spatial'), data_type='image',
+            dtype=np.complex64)
+        h5_main.dims[0][0][...] = np.arange(20) * 10.
+        view = ComponentView(h5_main, 'magnitude')
+        profile, distance = get_line_profile(view, [[0, 0], [100, 0]], [0, 1])
+        self.assertEqual(len(profile), 11)
+        self.assertEqual(distance.units, 'nm')
+        np.testing.assert_allclose(profile, np.abs(data[:11, 0]), rtol=1E-6)
+        h5_file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
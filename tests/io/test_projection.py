@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import compute_projection, get_projection, \
+    clear_projection_cache
+
+
+class TestProjection(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'stack.h5')
+        self.data = np.random.rand(6, 10, 8).astype(np.float32)
+        with h5py.File(self.file_path, mode='w') as h5_file:
+            h5_file.create_dataset('stack', data=self.data, chunks=(2, 3, 8))
+
+    def tearDown(self):
+        clear_projection_cache()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_streaming_range(self):
+        fractions = []
+        with h5py.File(self.file_path, mode='r') as h5_file:
+            mean = compute_projection(h5_file['stack'], 1, start=3, stop=8,
+                                      max_mem_mb=0.0005,
+                                      callback=fractions.append)
+        self.assertTrue(np.allclose(mean, self.data[:, 3:8].mean(axis=1)))
+        self.assertGreater(len(fractions), 1)
+        self.assertEqual(fractions[-1], 1)
+
+    def test_stored_next_to_dataset(self):
+        with h5py.File(self.file_path, mode='r+') as h5_file:
+            total = get_projection(h5_file['stack'], 2, reduction='sum',
+                                   persist=True)
+            self.assertTrue(np.allclose(total, self.data.sum(axis=2)))
+            self.assertIn('stack_projection_sum_dim_2_0_8', h5_file)
+        with h5py.File(self.file_path, mode='r') as h5_file:
+            h5_stored = h5_file['stack_projection_sum_dim_2_0_8']
+            self.assertEqual(h5_stored.attrs['projection_of'], 'stack')
+            self.assertTrue(np.array_equal(get_projection(h5_file['stack'], 2,
+                                                          reduction='sum'),
+                                           total))
+
+    def test_kept_in_memory_by_default(self):
+        with h5py.File(self.file_path, mode='r+') as h5_file:
+            mean = get_projection(h5_file['stack'], 0)
+            self.assertEqual(list(h5_file.keys()), ['stack'])
+            self.assertIs(get_projection(h5_file['stack'], 0), mean)
+        self.assertTrue(np.allclose(mean, self.data.mean(axis=0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
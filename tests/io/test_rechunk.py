@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import plan_rechunk, rechunk_dataset, check_if_main, \
+    verify_chunk_checksums
+
+from .data_utils import write_nsid_file
+
+
+class TestPlanRechunk(unittest.TestCase):
+
+    def test_single_pass_when_blocks_fit(self):
+        stages = plan_rechunk((40, 64, 64), 4, (1, 64, 64), (40, 8, 8),
+                              max_mem_mb=100)
+        self.assertEqual(len(stages), 1)
+        self.assertEqual(stages[0]['block_shape'], (40, 64, 64))
+
+    def test_intermediate_layout(self):
+        stages = plan_rechunk((40, 64, 64), 4, (1, 64, 64), (40, 8, 8),
+                              max_mem_mb=0.1)
+        self.assertEqual([stage['write_chunks'] for stage in stages],
+                         [(1, 8, 8), (40, 8, 8)])
+        self.assertTrue(all([stage['aligned'] for stage in stages]))
+
+
+class TestRechunkDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'source.h5'), shape=(40, 32, 32),
+            dim_types=('spectral', 'spatial', 'spatial'), chunks=(1, 32, 32),
+            compression='gzip', chunk_checksums=True)
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_in_place(self):
+        h5_new = rechunk_dataset(self.h5_main, (40, 8, 8), max_mem_mb=0.05)
+        self.assertEqual(h5_new.name, '/Measurement_000/Raw_Data')
+        self.assertEqual(h5_new.chunks, (40, 8, 8))
+        self.assertEqual(h5_new.compression, 'gzip')
+        self.assertTrue(check_if_main(h5_new))
+        self.assertTrue(np.array_equal(h5_new[()], self.data))
+        self.assertEqual(verify_chunk_checksums(h5_new), [])
+        self.assertEqual(sorted(h5_new.parent.keys()),
+                         ['Raw_Data', 'Raw_Data_chunk_checksums',
+                          'Raw_Data_dim_0', 'Raw_Data_dim_1', 'Raw_Data_dim_2'])
+
+    def test_new_file(self):
+        with h5py.File(os.path.join(self.tmp_dir, 'dest.h5'), mode='w') as h5_dest:
+            h5_new = rechunk_dataset(self.h5_main, (5, 32, 32), h5_dest_grp=h5_dest,
+                                     compression='lzf')
+            self.assertEqual(h5_new.compression, 'lzf')
+            self.assertTrue(check_if_main(h5_new))
+            self.assertTrue(np.array_equal(h5_new[()], self.data))
+        self.assertEqual(self.h5_main.chunks, (1, 32, 32))
+
+
+if __name__ == '__main__':
+    unittest.main()
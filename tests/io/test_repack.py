@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import repack_file, check_if_main
+
+from .data_utils import write_nsid_file
+
+
+class TestRepackFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'source.h5')
+        h5_file, h5_main, self.data = write_nsid_file(
+            self.file_path, shape=(20, 16, 16),
+            dim_types=('spectral', 'spatial', 'spatial'), chunks=(1, 16, 16),
+            compression='gzip')
+        h5_grp = h5_main.parent
+        h5_grp.create_dataset('Intermediate', data=np.random.rand(64, 64, 32))
+        h5_file.flush()
+        del h5_grp['Intermediate']
+        h5_grp['Alias'] = h5py.SoftLink(h5_main.name)
+        h5_file.attrs['main'] = h5_main.ref
+        h5_file.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_in_place(self):
+        report = repack_file(self.file_path)
+        self.assertGreater(report['reclaimed_bytes'], 0)
+        self.assertEqual(report['repacked_size'],
+                         os.path.getsize(self.file_path))
+        self.assertEqual(os.listdir(self.tmp_dir), ['source.h5'])
+        with h5py.File(self.file_path, mode='r') as h5_file:
+            h5_main = h5_file['Measurement_000/Raw_Data']
+            self.assertTrue(check_if_main(h5_main))
+            self.assertEqual(h5_main.compression, 'gzip')
+            self.assertTrue(np.array_equal(h5_main[()], self.data))
+            self.assertEqual(h5_file[h5_file.attrs['main']], h5_main)
+            link = h5_file['Measurement_000'].get('Alias', getlink=True)
+            self.assertIsInstance(link, h5py.SoftLink)
+            self.assertEqual(h5_file['Measurement_000/Alias'], h5_main)
+
+    def test_new_layout(self):
+        out_path = os.path.join(self.tmp_dir, 'dest.h5')
+        repack_file(self.file_path, output_path=out_path,
+                    layouts={'/Measurement_000/Raw_Data': {'chunks': (20, 4, 4)}})
+        with h5py.File(out_path, mode='r') as h5_file:
+            h5_main = h5_file['Measurement_000/Raw_Data']
+            self.assertEqual(h5_main.chunks, (20, 4, 4))
+            self.assertEqual(h5_main.compression, 'gzip')
+            self.assertTrue(check_if_main(h5_main))
+            self.assertTrue(np.array_equal(h5_main[()], self.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import write_summed_area_table, \
+    get_summed_area_table, get_binned_spectrum
+
+
+class TestSummedAreaTable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file = h5py.File(os.path.join(self.tmp_dir, 'si.h5'), mode='w')
+        # spectral, spatial, spatial
+        self.data = np.random.rand(15, 9, 7).astype(np.float32)
+        self.h5_dset = self.h5_file.create_dataset('Raw_Data', data=self.data)
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_binned_spectra(self):
+        # Small blocks exercise the accumulation across rows and energies
+        write_summed_area_table(self.h5_dset, [2, 1], 0, max_mem_mb=0.0005)
+        h5_table = get_summed_area_table(self.h5_dset, [1, 2], 0)
+        self.assertEqual(h5_table.shape, (10, 8, 15))
+        self.assertEqual(h5_table.chunks, (10, 8, 15))
+        spectrum = get_binned_spectrum(h5_table, [2, 3], [6, 7])
+        self.assertTrue(np.allclose(spectrum,
+                                    self.data[:, 2:6, 3:7].mean(axis=(1, 2))))
+        spectra = get_binned_spectrum(h5_table, [[0, 0], [8, 6]],
+                                      [[9, 7], [9, 7]], reduction='sum')
+        self.assertTrue(np.allclose(spectra[0], self.data.sum(axis=(1, 2))))
+        self.assertTrue(np.allclose(spectra[1], self.data[:, 8, 6]))
+
+    def test_tiled_chunks(self):
+        h5_dset = self.h5_file.create_dataset('Large',
+                                              data=np.ones((40, 50, 3)))
+        h5_table = write_summed_area_table(h5_dset, [0, 1], 2)
+        self.assertEqual(h5_table.chunks, (16, 16, 3))
+        self.assertTrue(np.allclose(get_binned_spectrum(h5_table, [0, 0],
+                                                        [40, 50],
+                                                        reduction='sum'),
+                                    2000))
+
+    def test_mismatched_dims(self):
+        write_summed_area_table(self.h5_dset, [1, 2], 0)
+        self.assertIsNone(get_summed_area_table(self.h5_dset, [0, 1], 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from io import StringIO
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import print_tree, iter_tree_summary, \
+    get_tree_summary, check_if_main
+
+from .data_utils import write_nsid_file
+
+
+def _baseline_print_tree(parent, rel_paths=False, main_dsets_only=False):
+    # print_tree as it was implemented with visititems
+    def __print(name, obj):
+        if main_dsets_only and not (isinstance(obj, h5py.Group) or
+                                    check_if_main(obj)):
+            return
+        if rel_paths:
+            print(name)
+        else:
+            levels = name.count('/')
+            curr_name = name[name.rfind('/') + 1:]
+            print(levels * '  ' + '├ ' + curr_name)
+            if isinstance(obj, h5py.Group):
+                print((levels + 1) * '  ' + len(curr_name) * '-')
+
+    print(parent.name)
+    parent.visititems(__print)
+
+
+def _capture(func, *args, **kwargs):
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        func(*args, **kwargs)
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdout = stdout
+
+
+class TestTreeSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, _ = write_nsid_file(
+            os.path.join(self.tmp_dir, 'tree.h5'), shape=(4, 5, 6))
+        h5_nested = self.h5_file.create_group('Outer/Inner')
+        h5_nested.create_dataset('deep', data=np.arange(10), chunks=(5,),
+                                 compression='gzip')
+        self.h5_file['Outer'].create_dataset('shallow', data=np.zeros(3))
+
+        other_path = os.path.join(self.tmp_dir, 'other.h5')
+        with h5py.File(other_path, mode='w') as h5_other:
+            h5_other.create_dataset('remote', data=np.ones(2))
+        self.h5_file['Links/soft'] = h5py.SoftLink('/Outer/shallow')
+        self.h5_file['Links/external'] = h5py.ExternalLink(other_path,
+                                                           '/remote')
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_depth_limit(self):
+        paths = [node['path'] for node in iter_tree_summary(self.h5_file,
+                                                            max_depth=0)]
+        self.assertEqual(paths, ['Links', 'Measurement_000', 'Outer'])
+        paths = [node['path'] for node in iter_tree_summary(self.h5_file,
+                                                            max_depth=1)]
+        self.assertIn('Outer/Inner', paths)
+        self.assertNotIn('Outer/Inner/deep', paths)
+        nodes = dict((node['path'], node) for node
+                     in iter_tree_summary(self.h5_file))
+        self.assertEqual(nodes['Outer/Inner/deep']['depth'], 2)
+        self.assertEqual(nodes['Outer/Inner/deep']['chunks'], (5,))
+        self.assertEqual(nodes['Outer/Inner/deep']['filters'], ['gzip'])
+        self.assertEqual(nodes['Outer']['num_children'], 2)
+
+    def test_main_dsets_only(self):
+        nodes = list(iter_tree_summary(self.h5_file, main_dsets_only=True,
+                                       validate_main=True))
+        datasets = [node['path'] for node in nodes
+                    if node['type'] == 'dataset']
+        self.assertEqual(datasets, ['Measurement_000/Raw_Data'])
+        self.assertTrue(all(node['type'] in ['group', 'dataset']
+                            for node in nodes))
+
+    def test_links(self):
+        nodes = dict((node['path'], node) for node
+                     in iter_tree_summary(self.h5_file))
+        self.assertEqual(nodes['Links/soft']['type'], 'soft_link')
+        self.assertEqual(nodes['Links/soft']['target'], '/Outer/shallow')
+        self.assertEqual(nodes['Links/external']['type'], 'external_link')
+        self.assertEqual(nodes['Links/external']['target'][1], '/remote')
+        # Links are reported but not followed
+        self.assertNotIn('Links/external/remote', nodes)
+
+    def test_nested_summary(self):
+        tree = get_tree_summary(self.h5_file)
+        outer = [node for node in tree['children']
+                 if node['name'] == 'Outer'][0]
+        self.assertEqual(outer['nbytes'], 10 * 8 + 3 * 8)
+        self.assertEqual(tree['nbytes'],
+                         outer['nbytes'] + 4 * 5 * 6 * 4 + (4 + 5 + 6) * 8)
+        self.assertEqual([node['name'] for node in outer['children']],
+                         ['Inner', 'shallow'])
+
+    def test_print_tree_matches_baseline(self):
+        for kwargs in [{}, {'rel_paths': True}, {'main_dsets_only': True}]:
+            self.assertEqual(_capture(print_tree, self.h5_file, **kwargs),
+                             _capture(_baseline_print_tree, self.h5_file,
+                                      **kwargs))
+        output = _capture(print_tree, self.h5_file, rel_paths=True,
+                          max_depth=0)
+        self.assertEqual(output.split(), ['/', 'Links', 'Measurement_000',
+                                          'Outer'])
+
+
+if __name__ == '__main__':
+    unittest.main()
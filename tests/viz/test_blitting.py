@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from pyNSID.viz.blitting import BlitManager, FrameTimer
+from pyNSID.viz.plot_nsid import plot_stack, plot_spectrum_image
+
+from ..io.data_utils import write_nsid_file
+
+
+class TestBlitManager(unittest.TestCase):
+
+    def test_fallback_until_drawn(self):
+        fig, axis = plt.subplots()
+        line, = axis.plot(np.arange(5))
+        timer = FrameTimer()
+        manager = BlitManager(fig, [line], timer=timer)
+        self.assertTrue(manager.blit)
+        self.assertTrue(line.get_animated())
+        self.assertIsNone(manager._background)
+        # Draws the whole figure, which is immediate on Agg canvases
+        manager.update()
+        self.assertEqual(timer.num_frames, 1)
+        self.assertIsNotNone(manager._background)
+        line.set_ydata(np.ones(5))
+        manager.update()
+        self.assertEqual(timer.summary()['num_frames'], 2)
+        plt.close(fig)
+
+    def test_no_blit(self):
+        fig, axis = plt.subplots()
+        line, = axis.plot(np.arange(5))
+        manager = BlitManager(fig, [line], blit=False)
+        self.assertFalse(line.get_animated())
+        manager.disconnect()
+        plt.close(fig)
+
+
+class TestViewers(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        plt.close('all')
+        shutil.rmtree(self.tmp_dir)
+
+    def test_stack(self):
+        h5_file, h5_main, data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'stack.h5'), shape=(12, 10, 6),
+            dim_types=('spatial', 'spatial', 'time'))
+        view = plot_stack(h5_main, {'spatial': [0, 1], 'stack': [2]})
+        view.fig.canvas.draw()
+        view.slider.set_val(4)
+        np.testing.assert_array_equal(view.img.get_array(), data[:, :, 4].T)
+        summary = view.frame_timer.summary()
+        self.assertEqual(summary['num_fetches'], 2)
+        self.assertEqual(summary['num_frames'], 2)
+        view.frames.close()
+        h5_file.close()
+
+    def test_spectrum_image(self):
+        h5_file, h5_main, data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'si.h5'), shape=(12, 10, 16))
+        view = plot_spectrum_image(h5_main, {'spatial': [0, 1],
+                                             'spectral': [2]})
+        view.fig.canvas.draw()
+        view.x, view.y = 3, 5
+        view.set_bin(2)
+        np.testing.assert_allclose(view.line.get_ydata(),
+                                   data[3:5, 5:7].mean(axis=(0, 1)), rtol=1E-5)
+        self.assertEqual(view.axes[1].get_title(), ' spectrum 3,5 ')
+        self.assertEqual(len(view.axes[1].lines), 1)
+        self.assertEqual(view.frame_timer.num_fetches, 2)
+        h5_file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
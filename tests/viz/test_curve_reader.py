@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from pyNSID.viz.curve_reader import CurveReader
+from pyNSID.viz.plot_nsid import plot_curve
+
+from ..io.data_utils import write_nsid_file
+
+
+class TestCurveReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # Dimension scales run in steps of 0.5
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'trace.h5'), shape=(200000,),
+            dim_types=('time',), data_type='spectrum', chunks=(4096,))
+        self.data[123457] = 5.
+        self.h5_main[123457] = 5.
+
+    def tearDown(self):
+        plt.close('all')
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_read_range(self):
+        reader = CurveReader(self.h5_main)
+        # Summaries are only written to the file when asked to
+        self.assertNotIn('Raw_Data_minmax', self.h5_main.parent)
+        self.assertNotIn('minmax_pyramid', self.h5_main.attrs)
+        self.assertGreater(len(reader.levels), 0)
+        x, y = reader.read_range(0, len(self.data), 500)
+        self.assertLessEqual(len(y), 2 * 1000)
+        self.assertEqual(y.max(), 5.)
+        self.assertEqual(y.min(), self.data.min())
+        x, y = reader.read_range(1000, 1100, 500)
+        np.testing.assert_array_equal(y, self.data[1000:1100])
+        np.testing.assert_array_equal(x, np.arange(1000, 1100) * 0.5)
+        self.assertAlmostEqual(reader.index_of(61728.25), 123456.5)
+
+    def test_stored_pyramid(self):
+        reader = CurveReader(self.h5_main, pyramid=True)
+        self.assertIn('Raw_Data_minmax', self.h5_main.parent)
+        x, y = reader.read_range(0, len(self.data), 500)
+        self.assertEqual(y.max(), 5.)
+        self.assertEqual(len(CurveReader(self.h5_main).levels),
+                         len(reader.levels))
+
+    def test_zoom(self):
+        view = plot_curve(self.h5_main, [0], decimate=True)
+        self.assertLessEqual(len(view.axis.lines[0].get_xdata()),
+                             4 * view.axis.get_window_extent().width)
+        view.axis.set_xlim(61700, 61750)
+        view.refresh()
+        x, y = view.axis.lines[0].get_data()
+        np.testing.assert_array_equal(y, self.data[123400:123501])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.viz.frame_reader import FrameReader
+
+
+class TestFrameReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file = h5py.File(os.path.join(self.tmp_dir, 'stack.h5'),
+                                 mode='w')
+        self.data = np.random.rand(12, 7, 9)
+        self.h5_dset = self.h5_file.create_dataset('stack', data=self.data,
+                                                   chunks=(12, 7, 1))
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_axis_order(self):
+        reader = FrameReader(self.h5_dset, 2, [1, 0], prefetch_frames=0)
+        self.assertEqual(reader.num_frames, 9)
+        self.assertEqual(reader.frame_shape, (7, 12))
+        self.assertTrue(np.array_equal(reader.get_frame(4),
+                                       self.data[:, :, 4].T))
+
+    def test_lru_cache(self):
+        frame_mb = 12 * 7 * 8 / 1024 ** 2
+        reader = FrameReader(self.h5_dset, 2, [0, 1], max_mem_mb=3 * frame_mb,
+                             prefetch_frames=0)
+        for index in [0, 1, 2, 0, 3]:
+            reader.get_frame(index)
+        self.assertEqual((reader.hits, reader.misses), (1, 4))
+        self.assertTrue(reader.is_cached(0))
+        self.assertFalse(reader.is_cached(1))
+
+    def test_prefetch_backwards(self):
+        reader = FrameReader(self.h5_dset, 2, [0, 1], prefetch_frames=3)
+        reader.get_frame(1)
+        reader.prefetch(1, direction=-1)
+        for _ in range(100):
+            if reader.is_cached(7):
+                break
+            time.sleep(0.01)
+        cached = [reader.is_cached(index) for index in range(9)]
+        reader.close()
+        self.assertEqual(cached, [True, True] + [False] * 5 + [True, True])
+        self.assertFalse(reader._thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
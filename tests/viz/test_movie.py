@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from pyNSID.io.hdf_utils import get_contrast_limits, get_statistics
+from pyNSID.viz.movie import export_movie
+
+from ..io.data_utils import write_nsid_file
+
+
+class TestExportMovie(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        file_path = os.path.join(self.tmp_dir, 'stack.h5')
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            file_path, shape=(7, 12, 10), dim_types=('time', 'spatial',
+                                                      'spatial'))
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_statistics(self):
+        stats = get_statistics(self.h5_main, bins=64, persist=True)
+        self.assertAlmostEqual(stats['mean'], self.data.mean(), places=5)
+        self.assertAlmostEqual(stats['std'], self.data.std(), places=5)
+        self.assertEqual(stats['histogram'].sum(), self.data.size)
+        self.assertIn('Raw_Data_statistics', self.h5_main.parent)
+        low, high = get_contrast_limits(self.h5_main, percentiles=(0, 100),
+                                        bins=64)
+        self.assertAlmostEqual(low, self.data.min())
+        self.assertAlmostEqual(high, self.data.max())
+
+    def test_gif(self):
+        output_path = os.path.join(self.tmp_dir, 'stack.gif')
+        report = export_movie(self.h5_main, output_path, start=1, stride=2,
+                              fps=10, read_ahead=1)
+        # Contrast limits come from statistics held in memory
+        self.assertEqual(sorted(self.h5_main.parent.keys()),
+                         ['Raw_Data', 'Raw_Data_dim_0', 'Raw_Data_dim_1',
+                          'Raw_Data_dim_2'])
+        self.assertEqual(report['num_frames'], 3)
+        image = Image.open(output_path)
+        self.assertEqual(image.n_frames, 3)
+        self.assertEqual(image.size, (12, 10))
+        self.assertEqual(image.info['duration'], 100)
+        image.close()
+
+    def test_sequence(self):
+        output_path = os.path.join(self.tmp_dir, 'frames')
+        report = export_movie(self.h5_main, output_path, stop=2, bin_factor=2,
+                              sequence_format='tiff')
+        self.assertEqual(report['num_frames'], 2)
+        image = Image.open(os.path.join(output_path, 'frame_000001.tiff'))
+        frame = self.data[1].reshape(6, 2, 5, 2).mean(axis=(1, 3)).T
+        np.testing.assert_allclose(np.asarray(image), frame, rtol=1E-5)
+        image.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
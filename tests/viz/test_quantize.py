@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from pyNSID.io.hdf_utils import get_contrast_limits
+from pyNSID.viz.quantize import DisplayQuantizer
+from pyNSID.viz.frame_reader import FrameReader
+from pyNSID.viz.plot_nsid import plot_stack, plot_image
+
+from ..io.data_utils import write_nsid_file
+
+
+class TestDisplayQuantizer(unittest.TestCase):
+
+    def test_uint8(self):
+        quantizer = DisplayQuantizer('uint8', clim=(-1., 3.))
+        data = np.array([[-2., -1., 0.], [1., 3., np.nan]])
+        buffer = quantizer.quantize(data)
+        self.assertEqual(buffer.dtype, np.uint8)
+        np.testing.assert_array_equal(buffer, [[0, 0, 64], [128, 255, 0]])
+        values = np.linspace(-1, 3, 101)
+        error = np.abs(quantizer.dequantize(quantizer.quantize(values)) -
+                       values)
+        self.assertLessEqual(error.max(), 4. / 510 + 1E-12)
+        self.assertEqual(quantizer.display_limits, (0, 255))
+
+    def test_float16(self):
+        quantizer = DisplayQuantizer('float16', clim=(10., 20.))
+        buffer = quantizer.quantize([5., 15., 20., np.nan])
+        self.assertEqual(buffer.dtype, np.float16)
+        np.testing.assert_array_equal(buffer[:3], [-0.5, 0.5, 1.])
+        self.assertTrue(np.isnan(buffer[3]))
+        self.assertTrue(np.allclose(quantizer.dequantize(buffer[:3]),
+                                    [5., 15., 20.]))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            DisplayQuantizer('float32', clim=(0, 1))
+        with self.assertRaises(ValueError):
+            DisplayQuantizer('uint8')
+
+
+class TestQuantizedViewers(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'stack.h5'), shape=(16, 12, 20),
+            dim_types=('spatial', 'spatial', 'time'), data_type='image_stack',
+            dtype=np.float64)
+
+    def tearDown(self):
+        plt.close('all')
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_frame_cache(self):
+        quantizer = DisplayQuantizer('uint8', clim=(0, 1))
+        frame_mb = 16 * 12 * 8 / 1024. ** 2
+        reader = FrameReader(self.h5_main, 2, [0, 1], max_mem_mb=2 * frame_mb,
+                             prefetch_frames=0, quantizer=quantizer)
+        self.assertEqual(reader.max_frames, 16)
+        frame = reader.get_frame(3)
+        np.testing.assert_array_equal(frame,
+                                      quantizer.quantize(self.data[:, :, 3]))
+        self.assertEqual(reader.read_frame(3).dtype, np.float64)
+
+    def test_stack(self):
+        view = plot_stack(self.h5_main, {'spatial': [0, 1], 'time': [2]},
+                          display_dtype='uint8')
+        # Contrast limits come from statistics cached in memory
+        self.assertNotIn('Raw_Data_statistics', self.h5_main.parent)
+        clim = get_contrast_limits(self.h5_main)
+        self.assertEqual(view.quantizer.clim, clim)
+        self.assertEqual(view.img.get_array().dtype, np.uint8)
+        self.assertEqual(view.img.get_clim(), (0, 255))
+        self.assertEqual(view.frames.get_frame(0).dtype, np.uint8)
+        colorbar = [axis for axis in view.fig.axes
+                    if axis.get_ylabel() == self.h5_main.data_descriptor][0]
+        self.assertTrue(np.allclose(sorted(colorbar.get_ylim()), clim))
+
+    def test_image_limits(self):
+        h5_file, h5_image, data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'image.h5'), shape=(16, 12),
+            dim_types=('spatial', 'spatial'), data_type='image')
+        view = plot_image(h5_image, {'spatial': [0, 1]},
+                          display_dtype='float16', vmin=0.2, vmax=0.6)
+        self.assertEqual(view.quantizer.clim, (0.2, 0.6))
+        self.assertEqual(view.img.get_array().dtype, np.float16)
+        np.testing.assert_allclose(view.img.get_array(),
+                                   (data.T - 0.2) / 0.4, atol=1E-3)
+        h5_file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
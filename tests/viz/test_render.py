@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from pyNSID.viz.render import choose_plot_type, render_files
+
+from ..io.data_utils import write_nsid_file
+
+
+class TestRenderFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_paths = []
+        for index, dim_types in enumerate([('spatial', 'spatial', 'spectral'),
+                                           ('spatial', 'spatial')]):
+            file_path = os.path.join(self.tmp_dir, 'scan_{}.h5'.format(index))
+            shape = (12, 10, 16)[:len(dim_types)]
+            h5_file, _, _ = write_nsid_file(file_path, shape=shape,
+                                            dim_types=dim_types)
+            h5_file.close()
+            self.file_paths.append(file_path)
+        self.out_dir = os.path.join(self.tmp_dir, 'renderings')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_plot_type(self):
+        self.assertEqual(choose_plot_type({'SPATIAL': [1, 2], 'TEMPORAL': [0]}),
+                         'stack')
+        self.assertIsNone(choose_plot_type({'spatial': [0], 'spectral': [1]}))
+
+    def test_index(self):
+        records = render_files(self.file_paths, self.out_dir,
+                               formats=['png', 'svg'], n_jobs=1)
+        self.assertEqual([rec['plot_type'] for rec in records],
+                         ['spectrum_image', 'image'])
+        with open(os.path.join(self.out_dir, 'index.json')) as file_handle:
+            self.assertEqual(json.load(file_handle), records)
+        self.assertTrue(records[0]['outputs'][0].startswith(
+            'scan_0__Measurement_000__Raw_Data__'))
+        for name in records[0]['outputs'] + records[1]['outputs'] + \
+                ['index.html']:
+            self.assertTrue(os.path.isfile(os.path.join(self.out_dir, name)))
+
+    def test_same_file_names(self):
+        other_dir = os.path.join(self.tmp_dir, 'other')
+        os.makedirs(other_dir)
+        file_path = os.path.join(other_dir, 'scan_0.h5')
+        h5_file, _, _ = write_nsid_file(file_path, shape=(12, 10),
+                                        dim_types=('spatial', 'spatial'))
+        h5_file.close()
+        records = render_files([self.file_paths[0], file_path], self.out_dir,
+                               n_jobs=1)
+        outputs = [rec['outputs'][0] for rec in records]
+        self.assertNotEqual(outputs[0], outputs[1])
+        self.assertEqual(len(os.listdir(self.out_dir)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
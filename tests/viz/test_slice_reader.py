@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import MouseEvent
+
+from pyNSID.io.hdf_utils import get_volume_pyramid, write_volume_pyramid
+from pyNSID.viz.slice_reader import SliceReader
+from pyNSID.viz.plot_nsid import plot_volume
+
+from ..io.data_utils import write_nsid_file
+
+
+class TestSliceReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # Dimension scales run in steps of 0.5
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            os.path.join(self.tmp_dir, 'volume.h5'), shape=(70, 40, 36),
+            dim_types=('spatial', 'spatial', 'spatial'), data_type='volume',
+            dtype=np.float64, chunks=(10, 10, 10))
+
+    def tearDown(self):
+        plt.close('all')
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_planes(self):
+        reader = SliceReader(self.h5_main, [2, 0, 1], pyramid=False)
+        self.assertEqual(reader.shape, (36, 70, 40))
+        plane, factor = reader.get_plane(0, 5)
+        self.assertEqual(factor, 1)
+        np.testing.assert_array_equal(plane, self.data[:, :, 5])
+        np.testing.assert_array_equal(reader.get_plane(1, 7)[0],
+                                      self.data[7].T)
+        np.testing.assert_array_equal(reader.get_plane(2, 3)[0],
+                                      self.data[:, 3].T)
+        reader.get_plane(0, 5)
+        self.assertEqual((reader.hits, reader.misses), (1, 3))
+        # Without a pyramid, previews are full resolution planes
+        self.assertEqual(reader.get_plane(1, 7, preview=True)[1], 1)
+
+    def test_pyramid(self):
+        write_volume_pyramid(self.h5_main, [0, 1, 2], min_size=20)
+        reader = SliceReader(self.h5_main, [0, 1, 2], preview_size=20)
+        levels = get_volume_pyramid(self.h5_main)
+        self.assertEqual([factor for factor, _ in levels], [2, 4])
+        self.assertTrue(np.allclose(levels[1][1][()],
+                                    self.data[:68, :40, :36].reshape(
+                                        17, 4, 10, 4, 9, 4).mean(
+                                            axis=(1, 3, 5))))
+        self.assertEqual(reader.preview_factor(0), 2)
+        self.assertEqual(reader.preview_factor(2), 4)
+        preview, factor = reader.get_plane(2, 30, preview=True)
+        self.assertEqual(factor, 4)
+        np.testing.assert_array_equal(preview, levels[1][1][:, :, 7])
+
+    def test_viewer(self):
+        write_volume_pyramid(self.h5_main, [0, 1, 2], min_size=20)
+        view = plot_volume(self.h5_main, {'spatial': [0, 1, 2]})
+        self.assertEqual(view.position, [35, 20, 18])
+        np.testing.assert_array_equal(view.images[0].get_array(),
+                                      self.data[:, :, 18].T)
+        np.testing.assert_array_equal(view.images[2].get_array(),
+                                      self.data[35])
+
+        # Dragging in the XY plane shows previews, releasing full planes
+        view.fig.canvas.draw()
+        axis = view.axes[0]
+        x, y = axis.transData.transform((10.2, 3.1))
+        view._onpress(MouseEvent('button_press_event', view.fig.canvas, x, y,
+                                 button=1))
+        self.assertEqual(view.position, [20, 6, 18])
+        self.assertEqual(view.images[1].get_array().shape, (18, 35))
+        self.assertEqual(view.cursors[2][1].get_ydata()[0], 3.)
+        view._onrelease(MouseEvent('button_release_event', view.fig.canvas,
+                                   x, y, button=1))
+        np.testing.assert_array_equal(view.images[1].get_array(),
+                                      self.data[:, 6].T)
+        np.testing.assert_array_equal(view.images[2].get_array(),
+                                      self.data[20])
+        self.assertEqual(view.images[1].get_extent(), [-0.25, 34.75, 17.75, -0.25])
+
+        view.set_position([0, 0, 35])
+        np.testing.assert_array_equal(view.images[0].get_array(),
+                                      self.data[:, :, 35].T)
+
+
+if __name__ == '__main__':
+    unittest.main()
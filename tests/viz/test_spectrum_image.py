@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from pyNSID.io import NSIDataset
+from pyNSID.io.hdf_utils import clear_projection_cache
+from pyNSID.viz.plot_nsid import plot_spectrum_image
+
+from ..io.data_utils import write_nsid_file
+
+
+class TestSpectrumImage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'si.h5')
+        self.h5_file, self.h5_main, self.data = write_nsid_file(
+            self.file_path, shape=(12, 10, 16), chunks=(4, 5, 16))
+        self.dim_dict = {'spatial': [0, 1], 'spectral': [2]}
+
+    def tearDown(self):
+        plt.close('all')
+        clear_projection_cache()
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_survey_and_spectrum(self):
+        view = plot_spectrum_image(self.h5_main, self.dim_dict)
+        np.testing.assert_allclose(view.image, self.data.sum(axis=2),
+                                   rtol=1E-5)
+        view.x, view.y = 7, 2
+        view.set_bin(1)
+        np.testing.assert_allclose(view.line.get_ydata(), self.data[7, 2],
+                                   rtol=1E-5)
+
+    def test_file_untouched_by_default(self):
+        names = []
+        self.h5_file.visit(names.append)
+        attrs = sorted(self.h5_main.attrs.keys())
+        plot_spectrum_image(self.h5_main, self.dim_dict)
+        after = []
+        self.h5_file.visit(after.append)
+        self.assertEqual(after, names)
+        self.assertEqual(sorted(self.h5_main.attrs.keys()), attrs)
+
+    def test_persisted_survey(self):
+        plot_spectrum_image(self.h5_main, self.dim_dict, persist=True)
+        name = 'Raw_Data_projection_sum_dim_2_0_16'
+        self.assertIn(name, self.h5_main.parent)
+        self.h5_file.close()
+        clear_projection_cache()
+        self.h5_file = h5py.File(self.file_path, mode='r')
+        h5_main = NSIDataset(self.h5_file['Measurement_000/Raw_Data'])
+        view = plot_spectrum_image(h5_main, self.dim_dict)
+        np.testing.assert_allclose(view.image, self.data.sum(axis=2),
+                                   rtol=1E-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
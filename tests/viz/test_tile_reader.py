@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import h5py
+import numpy as np
+
+from pyNSID.io.hdf_utils import get_image_pyramid
+from pyNSID.viz.tile_reader import TileReader
+
+
+class TestTileReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_file = h5py.File(os.path.join(self.tmp_dir, 'image.h5'),
+                                 mode='w')
+        # stack, spatial, spatial
+        self.data = np.random.rand(2, 600, 520)
+        self.h5_dset = self.h5_file.create_dataset('image', data=self.data,
+                                                   chunks=(1, 100, 100))
+
+    def tearDown(self):
+        self.h5_file.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pyramid_overview(self):
+        reader = TileReader(self.h5_dset, [2, 1], pyramid=True)
+        levels = get_image_pyramid(self.h5_dset, [1, 2])
+        self.assertEqual([factor for factor, _ in levels], [2, 4])
+        self.assertTrue(np.allclose(levels[0][1][0, 0],
+                                    self.data[0, :2, :2].mean()))
+        data, region = reader.read_region([0, 520], [0, 600], (130, 150))
+        self.assertEqual(data.shape, (130, 150))
+        self.assertEqual(region, [0, 520, 0, 600])
+
+    def test_full_resolution_region(self):
+        reader = TileReader(self.h5_dset, [1, 2], pyramid=False)
+        reader.request([10.5, 40], [300, 350], (100, 100))
+        for _ in range(200):
+            result = reader.poll()
+            if result is not None:
+                break
+            time.sleep(0.01)
+        reader.close()
+        data, region = result
+        self.assertEqual(region, [10, 40, 300, 350])
+        self.assertTrue(np.array_equal(data, self.data[0, 10:40, 300:350]))
+        self.assertFalse(reader.busy())
+
+
+if __name__ == '__main__':
+    unittest.main()